@@ -0,0 +1,117 @@
+"""
+The article write path shared by the API (sync_article, batch sync) and batch scripts
+(synthesis_engine.py).
+
+`apply_article_update` applies one sync record and keeps every database-side index in
+the same transaction: full-text, links and graph edges, revision history, stale marks.
+It never calls the vector store or touches in-process caches; callers do that after
+commit (see main.update_vector_domains and `refresh_lexical_entry`).
+"""
+import datetime
+import json
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+try:
+    from . import compressed, fulltext, knowledge_graph, lexical_index, models, revisions
+except ImportError:
+    import compressed, fulltext, knowledge_graph, lexical_index, models, revisions
+
+# Set by prepare_database once the dialect's full-text structures exist
+fulltext_enabled = False
+
+
+class ArticleUpdate(BaseModel):
+    slug: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    domain: Optional[str] = None
+    status: Optional[str] = None
+    is_archived: Optional[bool] = None
+    relational_map: Optional[Dict] = None
+
+
+def prepare_database(bind):
+    """
+    Schema, compression and full-text setup that apply_article_update relies on.
+    Raises RuntimeError while Postgres still stores compressed columns as text.
+    """
+    global fulltext_enabled
+    models.Base.metadata.create_all(bind=bind)
+    unconverted = compressed.text_columns(bind, models.Base.metadata)
+    if unconverted:
+        # Writes would fail on every request; stay unavailable until the columns are migrated
+        raise RuntimeError(
+            f"Columns {', '.join(unconverted)} are still text; run python scripts/compress_text_columns.py"
+        )
+    # Pick up compression dictionaries now that their table exists
+    models.use_compression_dictionaries(bind)
+    models.codec.reload()
+    # Full-text structures are dialect-specific (tsvector/GIN or FTS5), so they live outside the ORM metadata
+    fulltext_enabled = fulltext.setup(bind)
+
+
+def apply_article_update(slug: str, article: ArticleUpdate, db_article: Optional[models.Article], db: Session) -> models.Article:
+    """
+    Applies one sync record to the (possibly new) article and every index kept in the
+    same transaction: full-text, links and graph edges, revision history, stale marks.
+    A domain change of an indexed article is recorded in db.info["moved_vector_domains"]
+    for the caller to push to the vector store after commit.
+    """
+    # What articles linking here depend on; a change to it makes their links stale
+    before = (db_article.title, db_article.content, bool(db_article.is_archived)) if db_article else None
+    if not db_article:
+        db_article = models.Article(slug=slug, title=article.title or slug)
+        db.add(db_article)
+
+    if article.title:
+        db_article.title = article.title
+    if article.content:
+        db_article.content = article.content
+    if article.domain:
+        if db_article.domain and db_article.domain != article.domain:
+            # Domain drives which pairs are cross-domain: queue the vector for re-discovery
+            db_vector = db.query(models.ArticleVector).filter(models.ArticleVector.slug == slug).first()
+            if db_vector:
+                db_vector.domain = article.domain
+                db_vector.indexed_at = datetime.datetime.utcnow()
+                # The payload is rewritten after commit, never inside the transaction
+                db.info.setdefault("moved_vector_domains", {})[slug] = article.domain
+        db_article.domain = article.domain
+    if article.status:
+        db_article.status = article.status
+    if article.is_archived is not None:
+        db_article.is_archived = article.is_archived
+        if article.is_archived:
+            db_article.status = "archived"
+        else:
+            db_article.status = "active"
+    if article.relational_map:
+        db_article.relational_map = json.dumps(article.relational_map)
+
+    if fulltext_enabled and before != (db_article.title, db_article.content, bool(db_article.is_archived)):
+        db.flush()
+        fulltext.update(
+            db, slug, db_article.title, db_article.content, archived=bool(db_article.is_archived),
+            previous=before[:2] if before and not before[2] else None
+        )
+    knowledge_graph.update_links(db, slug, db_article.content, archived=bool(db_article.is_archived))
+    if before is None or before[:2] != (db_article.title, db_article.content):
+        revisions.record(db, slug, db_article.title, db_article.content, previous=before[1] if before else None)
+    if before != (db_article.title, db_article.content, bool(db_article.is_archived)):
+        knowledge_graph.mark_dependents_stale(db, slug)
+    else:
+        knowledge_graph.clear_stale(db, slug)
+    return db_article
+
+
+def refresh_lexical_entry(index: Optional[lexical_index.BM25Index], db_article: models.Article):
+    """Updates this process's keyword index, if it has one; other workers pick the change up on their next refresh."""
+    if index is None:
+        return
+    if db_article.is_archived:
+        index.remove(db_article.slug)
+    else:
+        index.add(db_article.slug, db_article.title, db_article.content, db_article.domain)
@@ -0,0 +1,173 @@
+"""
+Transparent compression for large text columns.
+
+`CompressedText` stores a string as bytes with a one-byte codec header:
+  0x00  raw UTF-8 (values under COMPRESSION_MIN_BYTES, or that do not shrink)
+  0x01  zlib (fallback when the zstandard package is not installed)
+  0x02  zstd frame, compressed with the active dictionary if there is one
+
+zstd frames record the ID of the dictionary they were compressed with. Dictionaries
+live in the `compression_dictionaries` table (see scripts/train_compression_dictionary.py),
+so they are backed up with the data. Every dictionary stays loadable for reading; the
+newest one is used for writing.
+
+Plain `str` values read back as-is, so rows written before a column switched to
+CompressedText (SQLite keeps them as TEXT) need no migration to stay readable.
+Postgres does need one: binding bytes to a text column fails, so the API refuses to
+start while `text_columns` finds any (see scripts/compress_text_columns.py).
+"""
+import os
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Values shorter than this (in UTF-8 bytes) are stored raw: headers and lookups would cost more than they save
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "256"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "3"))
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+
+class Codec:
+    """Encodes and decodes column values; dictionaries are fetched lazily through `loader`."""
+
+    def __init__(self, level: int = COMPRESSION_LEVEL, min_bytes: int = COMPRESSION_MIN_BYTES):
+        self.level = level
+        self.min_bytes = min_bytes
+        self.loader: Optional[Callable[[], List[Tuple[int, bytes]]]] = None
+        self.dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self.active_id: Optional[int] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        # zstd (de)compressor objects are not thread-safe; each thread keeps its own
+        self._local = threading.local()
+
+    def set_dictionaries(self, rows: List[Tuple[int, bytes]]):
+        """Installs (dict_id, data) rows, oldest first; the last one becomes the write dictionary."""
+        dictionaries = {}
+        active_id = None
+        if zstandard is not None:
+            for dict_id, data in rows:
+                dictionaries[dict_id] = zstandard.ZstdCompressionDict(bytes(data))
+                active_id = dict_id
+        with self._lock:
+            self.dictionaries = dictionaries
+            self.active_id = active_id
+            self._loaded = True
+        self._local = threading.local()
+
+    def reload(self):
+        if self.loader is None or zstandard is None:
+            self.set_dictionaries([])
+            return
+        try:
+            self.set_dictionaries(self.loader())
+        except Exception as e:
+            print(f"Could not load compression dictionaries: {e}")
+            self.set_dictionaries([])
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.reload()
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            dictionary = self.dictionaries.get(self.active_id)
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary) if dictionary \
+                else zstandard.ZstdCompressor(level=self.level)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int):
+        cache = getattr(self._local, "decompressors", None)
+        if cache is None:
+            cache = self._local.decompressors = {}
+        if dict_id not in cache:
+            if dict_id and dict_id not in self.dictionaries:
+                # Trained by another process since we loaded
+                self.reload()
+                if dict_id not in self.dictionaries:
+                    raise ValueError(f"Unknown compression dictionary {dict_id}")
+            dictionary = self.dictionaries.get(dict_id)
+            cache[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary) if dictionary \
+                else zstandard.ZstdDecompressor()
+        return cache[dict_id]
+
+    def encode(self, value: Optional[str]) -> Optional[bytes]:
+        if value is None:
+            return None
+        data = value.encode("utf-8")
+        if len(data) < self.min_bytes:
+            return RAW + data
+        if zstandard is not None:
+            self._ensure_loaded()
+            packed = ZSTD + self._compressor().compress(data)
+        else:
+            packed = ZLIB + zlib.compress(data, 6)
+        return packed if len(packed) < len(data) + 1 else RAW + data
+
+    def decode(self, value) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        header, body = value[:1], value[1:]
+        if header == RAW:
+            return body.decode("utf-8")
+        if header == ZLIB:
+            return zlib.decompress(body).decode("utf-8")
+        if header == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Value is zstd-compressed but the zstandard package is not installed")
+            self._ensure_loaded()
+            dict_id = zstandard.get_frame_parameters(body).dict_id
+            return self._decompressor(dict_id).decompress(body).decode("utf-8")
+        # Headerless bytes: text converted to a binary column without the raw marker
+        return value.decode("utf-8")
+
+
+codec = Codec()
+
+
+def train_dictionary(samples: List[str], size: int = 64 * 1024) -> "zstandard.ZstdCompressionDict":
+    """Trains a zstd dictionary on sample values (needs a few hundred samples to be useful)."""
+    if zstandard is None:
+        raise RuntimeError("Dictionary training needs the zstandard package")
+    return zstandard.train_dictionary(size, [s.encode("utf-8") for s in samples if s])
+
+
+class CompressedText(TypeDecorator):
+    """A text column stored compressed (see module docstring). Behaves like String in Python."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return codec.encode(value)
+
+    def process_result_value(self, value, dialect):
+        return codec.decode(value)
+
+
+def text_columns(bind, metadata) -> List[str]:
+    """"table.column" for each CompressedText column that a Postgres database still stores as text."""
+    if bind.dialect.name != "postgresql":
+        return []
+    inspector = inspect(bind)
+    found = []
+    for table in metadata.tables.values():
+        wanted = [column.name for column in table.columns if isinstance(column.type, CompressedText)]
+        if not wanted or not inspector.has_table(table.name):
+            continue
+        stored = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        found += [f"{table.name}.{name}" for name in wanted if name in stored and not isinstance(stored[name], LargeBinary)]
+    return found
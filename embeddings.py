@@ -0,0 +1,196 @@
+"""
+Text embedding backends with a content-hash cache.
+
+Backends implement `Embedder.embed(texts) -> np.ndarray` (one L2-normalized row per
+text). `EmbeddingCache` wraps a backend so every distinct text is embedded once per
+process; misses are sent to the backend as a single batch.
+
+Registered backends:
+  hashing   offline feature hashing (word unigrams + character trigrams); deterministic, no model
+  openai    OpenAI embeddings API (text-embedding-3-large by default); needs OPENAI_API_KEY
+"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def to_bytes(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_bytes(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def cosine_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Full pairwise cosine similarity between the rows of a and b."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    return normalize_rows(np.asarray(a, dtype=np.float32)) @ normalize_rows(np.asarray(b, dtype=np.float32)).T
+
+
+class Embedder:
+    name = "base"
+    dim = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        """Non-blocking form of embed(); local backends run on a worker thread."""
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Signed feature hashing over word unigrams and character trigrams. Shares vocabulary
+    ("fault tolerance" ~ "fault tolerant") but not meaning; pair it with curated overrides
+    where synonyms matter.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._buckets: Dict[str, tuple] = {}
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        grams = [f"#{w[i:i + 3]}" for w in (f" {word} " for word in words) for i in range(len(w) - 2)]
+        return words + grams
+
+    def _bucket(self, feature: str) -> tuple:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            # blake2b rather than hash(): bucket layout must not change between processes
+            value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            bucket = self._buckets[feature] = (value % self.dim, 1.0 if value >> 63 else -1.0)
+        return bucket
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                index, sign = self._bucket(feature)
+                matrix[row, index] += sign
+        return normalize_rows(matrix)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI /embeddings over plain HTTP, sent in batches of `batch_size` inputs."""
+
+    def __init__(
+        self,
+        dim: int = 3072,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        batch_size: int = 256,
+        timeout: float = 30.0,
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY is not set")
+        self.model = model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")).rstrip("/")
+        self.dim = dim
+        self.name = f"openai-{self.model}-{dim}"
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def _request(self, texts: List[str]) -> Dict:
+        return {
+            "url": f"{self.base_url}/embeddings",
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "json": {"model": self.model, "input": texts, "dimensions": self.dim},
+        }
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> List[List[float]]:
+        response.raise_for_status()
+        return [item["embedding"] for item in sorted(response.json()["data"], key=lambda d: d["index"])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        with httpx.Client(timeout=self.timeout) as client:
+            for start in range(0, len(texts), self.batch_size):
+                rows.extend(self._parse(client.post(**self._request(texts[start:start + self.batch_size]))))
+        return normalize_rows(np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim))
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            for start in range(0, len(texts), self.batch_size):
+                rows.extend(self._parse(await client.post(**self._request(texts[start:start + self.batch_size]))))
+        return normalize_rows(np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+
+def create_embedder(name: str = "hashing", **kwargs) -> Embedder:
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}'")
+    return EMBEDDERS[name](**kwargs)
+
+
+class EmbeddingCache:
+    """
+    In-process LRU of embeddings keyed by content hash; misses are embedded in one batch.
+    Safe to share between threads: the LRU is locked, but the backend call is not, so
+    concurrent misses on the same text may both embed it.
+    """
+
+    def __init__(self, embedder: Embedder, max_entries: int = 100_000):
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        keys = [content_hash(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    found[key] = vector
+                    self.hits += 1
+                elif key not in missing:
+                    missing[key] = text
+                    self.misses += 1
+
+        if missing:
+            fresh = dict(zip(missing, self.embedder.embed(list(missing.values()))))
+            found.update(fresh)
+            with self._lock:
+                self._vectors.update(fresh)
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+
+        if not keys:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
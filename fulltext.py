@@ -0,0 +1,259 @@
+"""
+Database-native full-text index over article titles and content.
+
+PostgreSQL: `article_search` side table holding a weighted tsvector (title A, content B)
+behind a GIN index; queries use websearch_to_tsquery, ts_rank_cd and ts_headline.
+SQLite: `article_fts` contentless FTS5 table (porter stemming) whose rowids are assigned
+in `article_fts_docs`; queries rank with bm25(). Articles store their content compressed,
+so the index keeps no copy of the text: snippets are cut from the decoded content of the
+page's articles, and removing a document takes the text it was indexed with.
+
+Archived articles are kept out of the index. sync_article calls `update` after every
+write; `setup` creates the structures and backfills an empty index.
+"""
+import base64
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, text
+
+try:
+    from . import models
+except ImportError:
+    import models
+
+# Relative weight of title matches over content matches in SQLite's bm25()
+SQLITE_TITLE_WEIGHT = 4.0
+
+
+def dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def setup(engine) -> bool:
+    """Creates the index structures if missing and backfills them when empty. Returns True when usable."""
+    with engine.begin() as conn:
+        if dialect(engine) == "postgresql":
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS article_search ("
+                "slug VARCHAR PRIMARY KEY REFERENCES articles(slug) ON DELETE CASCADE, "
+                "document TSVECTOR NOT NULL)"
+            ))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_article_search_document ON article_search USING GIN (document)"))
+            if conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM article_search)")).scalar():
+                _backfill(conn, text(
+                    "INSERT INTO article_search (slug, document) VALUES (:slug, "
+                    "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :content), 'B')) "
+                    "ON CONFLICT (slug) DO NOTHING"
+                ))
+            return True
+
+        if dialect(engine) == "sqlite":
+            existing = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'article_fts'")).scalar()
+            if existing and "content=''" not in existing:
+                # Earlier versions kept an uncompressed copy of every article in the index
+                print("Rebuilding article_fts as a contentless index")
+                conn.execute(text("DROP TABLE article_fts"))
+                conn.execute(text("DROP TABLE IF EXISTS article_fts_docs"))
+            try:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS article_fts "
+                    "USING fts5(title, content, content='', tokenize='porter unicode61')"
+                ))
+            except Exception as e:
+                print(f"Full-text index disabled, SQLite has no FTS5: {e}")
+                return False
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS article_fts_docs (id INTEGER PRIMARY KEY, slug VARCHAR NOT NULL UNIQUE)"
+            ))
+            if conn.execute(text("SELECT count(*) FROM article_fts_docs")).scalar() == 0:
+                _backfill(
+                    conn,
+                    text("INSERT INTO article_fts_docs (slug) VALUES (:slug)"),
+                    text(
+                        "INSERT INTO article_fts (rowid, title, content) "
+                        "SELECT id, :title, :content FROM article_fts_docs WHERE slug = :slug"
+                    )
+                )
+            return True
+
+    print(f"Full-text index not supported on {dialect(engine)}")
+    return False
+
+
+def _backfill(conn, *inserts, batch_size: int = 500):
+    """Indexes every live article. Content is read through the ORM column type, which decompresses it."""
+    rows = conn.execute(
+        select(models.Article.slug, models.Article.title, models.Article.content).where(
+            or_(models.Article.is_archived == False, models.Article.is_archived.is_(None))
+        ).execution_options(yield_per=batch_size)
+    )
+    for batch in rows.partitions():
+        params = [{"slug": r.slug, "title": r.title or "", "content": r.content or ""} for r in batch]
+        for insert in inserts:
+            conn.execute(insert, params)
+
+
+def update(db, slug: str, title: Optional[str], content: Optional[str], archived: bool = False,
+           previous: Optional[Tuple[Optional[str], Optional[str]]] = None):
+    """
+    Re-indexes one article in the caller's transaction (removes it when archived).
+    `previous` is the (title, content) the article is currently indexed with, None when it
+    is not indexed; SQLite's contentless index needs it to remove the old terms.
+    """
+    if dialect(db.get_bind()) == "postgresql":
+        if archived:
+            db.execute(text("DELETE FROM article_search WHERE slug = :slug"), {"slug": slug})
+            return
+        db.execute(text(
+            "INSERT INTO article_search (slug, document) VALUES (:slug, "
+            "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :content), 'B')) "
+            "ON CONFLICT (slug) DO UPDATE SET document = EXCLUDED.document"
+        ), {"slug": slug, "title": title or "", "content": content or ""})
+    else:
+        doc_id = db.execute(text("SELECT id FROM article_fts_docs WHERE slug = :slug"), {"slug": slug}).scalar()
+        if doc_id is not None and previous is not None:
+            db.execute(
+                text("INSERT INTO article_fts (article_fts, rowid, title, content) VALUES ('delete', :id, :title, :content)"),
+                {"id": doc_id, "title": previous[0] or "", "content": previous[1] or ""}
+            )
+        if archived:
+            db.execute(text("DELETE FROM article_fts_docs WHERE slug = :slug"), {"slug": slug})
+            return
+        if doc_id is None:
+            doc_id = db.execute(text("INSERT INTO article_fts_docs (slug) VALUES (:slug)"), {"slug": slug}).lastrowid
+        db.execute(
+            text("INSERT INTO article_fts (rowid, title, content) VALUES (:id, :title, :content)"),
+            {"id": doc_id, "title": title or "", "content": content or ""}
+        )
+
+
+def encode_cursor(rank: float, slug: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, slug]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        rank, slug = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), str(slug)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def fts5_query(q: str) -> str:
+    """User text as an FTS5 query: every word quoted (no operator injection), all required."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in re.findall(r"\w+", q))
+
+
+def search(db, q: str, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Ranked matches for `q`, best first, as ({slug, title, domain, rank, snippet}, next_cursor).
+    Higher rank is better on both engines. Pages are keyset on (rank, slug).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    params = {"limit": limit + 1}
+    if after:
+        params["after_rank"], params["after_slug"] = after
+
+    if dialect(db.get_bind()) == "postgresql":
+        keyset = "WHERE rank < :after_rank OR (rank = :after_rank AND slug > :after_slug)" if after else ""
+        # float8 keeps the rank exact through the JSON cursor; snippets are added per page below
+        sql = f"""
+            SELECT page.slug, a.title, a.domain, page.rank, NULL AS snippet
+            FROM (
+                SELECT * FROM (
+                    SELECT s.slug, ts_rank_cd(s.document, websearch_to_tsquery('english', :q))::float8 AS rank
+                    FROM article_search s
+                    WHERE s.document @@ websearch_to_tsquery('english', :q)
+                ) ranked
+                {keyset}
+                ORDER BY rank DESC, slug ASC
+                LIMIT :limit
+            ) page
+            JOIN articles a ON a.slug = page.slug
+            ORDER BY page.rank DESC, page.slug ASC
+        """
+        params["q"] = q
+    else:
+        match = fts5_query(q)
+        if not match:
+            return [], None
+        keyset = "WHERE ranked.rank < :after_rank OR (ranked.rank = :after_rank AND d.slug > :after_slug)" if after else ""
+        # bm25() is lower-is-better; negated so rank reads the same way as on Postgres
+        sql = f"""
+            SELECT d.slug, a.title, a.domain, ranked.rank, NULL AS snippet FROM (
+                SELECT rowid, -bm25(article_fts, {SQLITE_TITLE_WEIGHT}, 1.0) AS rank
+                FROM article_fts WHERE article_fts MATCH :match
+            ) ranked
+            JOIN article_fts_docs d ON d.id = ranked.rowid
+            JOIN articles a ON a.slug = d.slug
+            {keyset}
+            ORDER BY ranked.rank DESC, d.slug ASC
+            LIMIT :limit
+        """
+        params["match"] = match
+
+    rows = db.execute(text(sql), params).fetchall()
+    items = [{
+        "slug": r.slug,
+        "title": r.title,
+        "domain": r.domain,
+        "rank": float(r.rank),
+        "snippet": r.snippet
+    } for r in rows[:limit]]
+    if items and dialect(db.get_bind()) == "postgresql":
+        _add_headlines(db, q, items)
+    elif items:
+        _add_snippets(db, q, items)
+    next_cursor = encode_cursor(items[-1]["rank"], items[-1]["slug"]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def _add_headlines(db, q: str, items: List[Dict]):
+    """
+    ts_headline over the page's documents only (it is costly). Content is stored compressed,
+    so it is decoded here and passed back to Postgres as a text array.
+    """
+    contents = dict(db.query(models.Article.slug, models.Article.content).filter(
+        models.Article.slug.in_([item["slug"] for item in items])
+    ).all())
+    documents = [f"{item['title'] or ''}: {contents.get(item['slug']) or ''}" for item in items]
+    headlines = db.execute(text(
+        "SELECT ts_headline('english', doc, websearch_to_tsquery('english', :q), "
+        "'StartSel=<b>, StopSel=</b>, MaxWords=30, MinWords=10') AS snippet "
+        "FROM unnest(CAST(:docs AS text[])) WITH ORDINALITY AS d(doc, ord) ORDER BY ord"
+    ), {"q": q, "docs": documents}).fetchall()
+    for item, row in zip(items, headlines):
+        item["snippet"] = row.snippet
+
+
+def _add_snippets(db, q: str, items: List[Dict], words: int = 16):
+    """
+    snippet() needs the indexed text, which the contentless index does not keep: cut a
+    window of `words` words around the first match from the page's decoded content instead.
+    Words match a query term by prefix, a rough stand-in for the porter stemmer.
+    """
+    stems = [term.lower()[:max(4, len(term) - 2)] for term in re.findall(r"\w+", q)]
+    contents = dict(db.query(models.Article.slug, models.Article.content).filter(
+        models.Article.slug.in_([item["slug"] for item in items])
+    ).all())
+
+    def matches(word):
+        return any(word.lower().startswith(stem) for stem in stems)
+
+    for item in items:
+        first = None
+        # Content first, like snippet(); the title when only it matched
+        for tokens in ((contents.get(item["slug"]) or "").split(), (item["title"] or "").split()):
+            first = next((i for i, token in enumerate(tokens) if matches(re.sub(r"\W", "", token))), None)
+            if first is not None:
+                break
+        else:
+            tokens = (contents.get(item["slug"]) or "").split()
+        start = max(0, min((first or 0) - words // 4, len(tokens) - words))
+        window = [
+            f"<b>{token}</b>" if matches(re.sub(r"\W", "", token)) else token
+            for token in tokens[start:start + words]
+        ]
+        item["snippet"] = ("…" if start > 0 else "") + " ".join(window) + ("…" if start + words < len(tokens) else "")
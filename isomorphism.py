@@ -1,33 +1,169 @@
 import httpx
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict
+import hashlib
+from array import array
+from typing import List, Dict, Optional
 import os
-import networkx as nx
-from networkx.algorithms import isomorphism
+try:
+    from . import matchers, vector_store
+except ImportError:
+    import matchers
+    import vector_store
+
+EMBEDDING_DIM = 3072 # text-embedding-3-large
 
 class IsomorphismEngine:
-    def __init__(self, qdrant_url: str = "http://localhost:6333"):
-        self.client = QdrantClient(url=qdrant_url)
-        self.collection_name = "articles"
+    def __init__(
+        self,
+        qdrant_url: str = "http://localhost:6333",
+        backend: Optional[vector_store.VectorBackend] = None,
+        reduction: Optional[str] = None,
+        matcher: Optional[str] = None,
+        match_budget_s: Optional[float] = None,
+    ):
+        # Graph matcher backend for propose_mapping (ISOMORPHISM_MATCHER=auto|vf2|vf2pp|degree|approx_ged)
+        self.matcher = matcher or os.getenv("ISOMORPHISM_MATCHER", "auto")
+        if self.matcher != "auto" and self.matcher not in matchers.MATCHERS:
+            raise ValueError(f"Unknown matcher '{self.matcher}'")
+        self.match_budget_s = match_budget_s if match_budget_s is not None else float(os.getenv("ISOMORPHISM_MATCH_BUDGET_S", matchers.DEFAULT_BUDGET_S))
+
+        # VECTOR_DB_URL=local://<path> selects the embedded store; anything else is a Qdrant URL
+        self.backend = backend or vector_store.create_backend(qdrant_url)
+
+        # Optional index-time reduction (VECTOR_REDUCTION=truncate:512 | pca:256). Reduced
+        # vectors live in their own collection so the full-dimension one is left intact.
+        self.reduction = vector_store.parse_reduction(reduction)
+        self.projection = None
+        self.input_dim = EMBEDDING_DIM # Dimension clients send; the collection may store fewer
+        if self.reduction is None:
+            self.collection_name = "articles"
+            collection_dim = EMBEDDING_DIM
+        else:
+            kind, collection_dim = self.reduction
+            self.collection_name = f"articles_{kind}{collection_dim}"
+            if kind == "truncate":
+                self.projection = vector_store.TruncateProjection(collection_dim)
+            elif os.path.exists(self.projection_path()):
+                self.projection = vector_store.PCAProjection.load(self.projection_path())
         
         # Ensure collection exists
-        collections = self.client.get_collections().collections
-        if not any(c.name == self.collection_name for c in collections):
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=3072, distance=Distance.COSINE), # text-embedding-3-large
+        self.backend.ensure_collection(self.collection_name, size=collection_dim)
+
+        # Keyword index on the article domain so cross-domain filters run inside the vector engine
+        self.backend.ensure_payload_index(self.collection_name, "domain")
+        # Hybrid search only scores vectors made by the embedder that embedded the query
+        self.backend.ensure_payload_index(self.collection_name, "embedder")
+
+    def projection_path(self) -> str:
+        """The fitted PCA matrix is stored next to the collection it was fitted for."""
+        directory = self.backend.collection_dir(self.collection_name) or os.getenv("VECTOR_PROJECTION_DIR", "data/projections")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{self.collection_name}.projection.npz")
+
+    def fit_projection(self, sample: List[List[float]]) -> int:
+        """Fits and persists the PCA projection for a pca:<dim> collection. Returns the sample size."""
+        if not self.reduction or self.reduction[0] != "pca":
+            raise ValueError("Projection fitting only applies to VECTOR_REDUCTION=pca:<dim>")
+        projection = vector_store.PCAProjection.fit(sample, self.reduction[1])
+        projection.save(self.projection_path())
+        self.projection = projection
+        return len(sample)
+
+    def project(self, vector: List[float]) -> List[float]:
+        """Maps a full embedding into the collection's space (identity without reduction)."""
+        return self.project_many([vector])[0]
+
+    def project_many(self, vectors: List[List[float]]) -> List[List[float]]:
+        """Batch form of project(); the projection is applied as one matrix product."""
+        if self.reduction is None:
+            return vectors
+        for vector in vectors:
+            if len(vector) != EMBEDDING_DIM:
+                raise ValueError(f"Expected a {EMBEDDING_DIM}-dim embedding, got {len(vector)}")
+        if self.projection is None:
+            raise vector_store.ProjectionNotFitted(
+                f"{self.collection_name} needs a fitted projection: POST /isomorphisms/projection/fit first"
             )
+        return self.projection.apply(vectors).tolist()
 
-    async def find_candidates(self, vector: List[float], threshold: float = 0.75, limit: int = 5):
-        search_result = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=vector,
+    async def find_candidates(
+        self,
+        vector: List[float],
+        threshold: float = 0.75,
+        limit: int = 5,
+        domain: Optional[str] = None,
+        exclude_domain: Optional[str] = None,
+        exclude_slug: Optional[str] = None,
+        projected: bool = False,
+        embedder: Optional[str] = None,
+    ):
+        """
+        Nearest-neighbour scan with optional payload filters pushed down into the vector engine.
+        ISOMORPHISM_SPEC 3.1 discovery passes exclude_domain=<source domain> so every hit
+        returned is a usable cross-domain neighbour.
+        `projected=True` means the vector is already in collection space (e.g. from get_vector).
+        `embedder` keeps only vectors indexed server-side by that embedder.
+        """
+        if not projected:
+            vector = self.project(vector)
+
+        must = {}
+        if domain:
+            must["domain"] = domain
+        if embedder:
+            must["embedder"] = embedder
+        must_not = {}
+        if exclude_domain:
+            must_not["domain"] = exclude_domain
+        if exclude_slug:
+            must_not["slug"] = exclude_slug
+
+        search_result = await self.backend.search(
+            self.collection_name,
+            vector,
+            limit=limit,
             score_threshold=threshold,
-            limit=limit
+            must=must or None,
+            must_not=must_not or None
         )
         return search_result
 
+    async def upsert(self, slug: str, vector: List[float], payload: Dict):
+        await self.upsert_many([(slug, vector, payload)])
+
+    async def upsert_many(self, records: List[tuple]):
+        """Writes (slug, vector, payload) records to the collection in a single backend call."""
+        vectors = self.project_many([vector for _, vector, _ in records])
+
+        await self.backend.upsert(self.collection_name, [
+            {"id": self.point_id(slug), "vector": vector, "payload": {**payload, "slug": slug}}
+            for (slug, _, payload), vector in zip(records, vectors)
+        ])
+
+    async def get_vector(self, slug: str) -> Optional[vector_store.VectorHit]:
+        """Returns the stored point (payload and collection-space vector) for an article, or None."""
+        res = await self.backend.retrieve(self.collection_name, [self.point_id(slug)], with_vectors=True)
+        if not res or not res[0].vector:
+            return None
+        return res[0]
+
+    async def set_domain(self, slug: str, domain: str):
+        """
+        Keeps the indexed domain payload in sync when an article moves between domains.
+        """
+        await self.backend.set_payload(self.collection_name, [self.point_id(slug)], {"domain": domain})
+
+    @staticmethod
+    def point_id(slug: str) -> str:
+        return hashlib.md5(slug.encode()).hexdigest()
+
+    @staticmethod
+    def vector_version(vector: List[float]) -> str:
+        """
+        Stable fingerprint of an embedding (float32 bytes), used to tell whether a
+        re-index actually changed the vector and discovery must re-search it.
+        """
+        return hashlib.md5(array("f", vector).tobytes()).hexdigest()
+
     def calculate_ged(self, graph_a: Dict, graph_b: Dict) -> float:
         """
         Calculates Relational Overlap between two knowledge graphs.
@@ -57,53 +193,36 @@ class IsomorphismEngine:
         # Composite score
         return (predicate_overlap * 0.6) + (link_overlap * 0.4)
 
-    def propose_mapping(self, article_a: Dict, article_b: Dict):
+    def propose_mapping(self, article_a: Dict, article_b: Dict, matcher: Optional[str] = None, budget_s: Optional[float] = None):
         """
-        Proposes a node-to-node mapping table using VF2 subgraph matching.
-        Implements Deterministic Selection and Semantic Anchoring per VF2-RELIABILITY-REPORT.
+        Proposes a node-to-node mapping table between two articles' relational maps.
+        Matching honours node tags and edge types (Semantic Anchoring); exact matchers pick
+        deterministically among equivalent mappings per VF2-RELIABILITY-REPORT.
+        `matcher` names a backend from matchers.MATCHERS or "auto" (default: the engine's).
         """
         graph_a = article_a.get("relational_map", {})
         graph_b = article_b.get("relational_map", {})
-        
-        # 1. Build NetworkX Graphs
-        ga = nx.DiGraph()
-        gb = nx.DiGraph()
-        
-        # Add nodes with tags (Semantic Anchoring)
-        for node in graph_a.get("nodes", []):
-            ga.add_node(node["id"], tag=node.get("tag", "generic"))
-        for node in graph_b.get("nodes", []):
-            gb.add_node(node["id"], tag=node.get("tag", "generic"))
-
-        for link in graph_a.get("links", []):
-            ga.add_edge(link["source"], link["target"], type=link.get("type", "link"))
-        for link in graph_b.get("links", []):
-            gb.add_edge(link["source"], link["target"], type=link.get("type", "link"))
-            
-        # 2. Perform Subgraph Matching
-        # Using categorical edge AND node matching for stability
-        em = isomorphism.categorical_edge_match("type", "link")
-        nm = isomorphism.categorical_node_match("tag", "generic")
-        matcher = isomorphism.DiGraphMatcher(ga, gb, node_match=nm, edge_match=em)
-        
-        # 3. Deterministic Selection
-        # Collect all isomorphisms and sort them by string representation to ensure stability
-        all_mappings = list(matcher.subgraph_isomorphisms_iter())
-        mapping = {}
-        if all_mappings:
-            # Sort by stringified dict for a stable choice if multiple exist
-            all_mappings.sort(key=lambda x: str(sorted(x.items())))
-            mapping = all_mappings[0]
-            
+
+        result = matchers.match_graphs(
+            matchers.build_graph(graph_a),
+            matchers.build_graph(graph_b),
+            matcher=matcher or self.matcher,
+            budget_s=budget_s if budget_s is not None else self.match_budget_s,
+        )
         confidence = self.calculate_ged(graph_a, graph_b)
-        
+
         return {
             "source": article_a.get("slug"),
             "target": article_b.get("slug"),
-            "mapping": mapping,
+            "mapping": result.mapping,
             "confidence": confidence,
-            "isomorphic": matcher.is_isomorphic(),
-            "subgraph_isomorphic": matcher.subgraph_is_isomorphic(),
-            "ambiguity_count": len(all_mappings)
+            "isomorphic": result.isomorphic,
+            "subgraph_isomorphic": result.subgraph_isomorphic,
+            "ambiguity_count": result.ambiguity_count,
+            "ambiguity_truncated": result.ambiguity_truncated,
+            "exact": result.exact,
+            "structural_score": result.score,
+            "matcher": result.matcher,
+            "matcher_ms": result.elapsed_ms
         }
 
@@ -0,0 +1,150 @@
+"""
+Analog class index over verified isomorphisms.
+
+Articles joined by verified isomorphisms form analog classes, kept as a union-find in
+`analog_classes` (every member points directly at its root; a union relabels the smaller
+class). For every ordered pair inside a class, `analog_mappings` stores the node mapping
+composed along the shortest verified path (A -> B -> C), so "all analogs of X" and
+"where does node n of X land in Y" are single indexed lookups.
+
+The index only grows: `add_verified` folds one newly verified isomorphism in. If a
+verification is ever withdrawn, rebuild from scratch with `rebuild`.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+try:
+    from . import models
+except ImportError:
+    import models
+
+
+def compose(first: Optional[Dict], second: Optional[Dict]) -> Optional[Dict]:
+    """Node mapping X -> Z from X -> Y and Y -> Z. None is the identity; unmapped nodes drop out."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return {node: second[image] for node, image in first.items() if image in second}
+
+
+def invert(mapping: Optional[Dict]) -> Optional[Dict]:
+    if mapping is None:
+        return None
+    return {image: node for node, image in mapping.items()}
+
+
+def find(db, slug: str) -> str:
+    """Class root of an article; an article outside any verified isomorphism is its own root."""
+    member = db.query(models.AnalogClass).filter(models.AnalogClass.slug == slug).first()
+    return member.root if member else slug
+
+
+def members(db, slug: str) -> List[str]:
+    root = find(db, slug)
+    rows = db.query(models.AnalogClass.slug).filter(models.AnalogClass.root == root).all()
+    return sorted(r.slug for r in rows) or [slug]
+
+
+def analogs(db, slug: str) -> List[models.AnalogMapping]:
+    """Every other member of the article's class, nearest first."""
+    return db.query(models.AnalogMapping).filter(
+        models.AnalogMapping.source_slug == slug
+    ).order_by(models.AnalogMapping.hops.asc(), models.AnalogMapping.target_slug.asc()).all()
+
+
+def lookup(db, source_slug: str, target_slug: str) -> Optional[models.AnalogMapping]:
+    return db.query(models.AnalogMapping).filter(
+        models.AnalogMapping.source_slug == source_slug,
+        models.AnalogMapping.target_slug == target_slug
+    ).first()
+
+
+def _paths_into(db, slug: str) -> Dict[str, Tuple[Optional[Dict], List[int]]]:
+    """member -> (mapping member -> slug, isomorphism path) for the slug's class, itself included."""
+    paths = {slug: (None, [])}
+    for row in db.query(models.AnalogMapping).filter(models.AnalogMapping.target_slug == slug).all():
+        paths[row.source_slug] = (json.loads(row.mapping), json.loads(row.path))
+    return paths
+
+
+def _union(db, slug_a: str, slug_b: str):
+    for slug in (slug_a, slug_b):
+        if not db.query(models.AnalogClass).filter(models.AnalogClass.slug == slug).first():
+            db.add(models.AnalogClass(slug=slug, root=slug))
+    db.flush()
+
+    root_a, root_b = find(db, slug_a), find(db, slug_b)
+    if root_a == root_b:
+        return
+    size_a = db.query(models.AnalogClass).filter(models.AnalogClass.root == root_a).count()
+    size_b = db.query(models.AnalogClass).filter(models.AnalogClass.root == root_b).count()
+    keep, absorb = (root_a, root_b) if size_a >= size_b else (root_b, root_a)
+    db.query(models.AnalogClass).filter(models.AnalogClass.root == absorb).update(
+        {models.AnalogClass.root: keep}, synchronize_session=False
+    )
+
+
+def add_verified(db, iso: models.Isomorphism) -> int:
+    """
+    Folds a verified isomorphism into the index: merges the two classes and stores the
+    composed mapping for every pair it connects (or connects by a shorter path).
+    Returns the number of pair mappings written. The caller commits.
+    """
+    slug_a, slug_b = iso.article_a_slug, iso.article_b_slug
+    if not slug_a or not slug_b or slug_a == slug_b:
+        return 0
+    try:
+        edge = json.loads(iso.mapping_table or "{}")
+    except json.JSONDecodeError:
+        print(f"Analog index: isomorphism {iso.id} has an unreadable mapping_table, indexed without node mapping")
+        edge = {}
+
+    into_a = _paths_into(db, slug_a)
+    into_b = _paths_into(db, slug_b)
+    slugs = set(into_a) | set(into_b)
+    existing = {
+        (row.source_slug, row.target_slug): row
+        for row in db.query(models.AnalogMapping).filter(
+            models.AnalogMapping.source_slug.in_(slugs),
+            models.AnalogMapping.target_slug.in_(slugs)
+        ).all()
+    }
+
+    def store(source: str, target: str, mapping: Dict, path: List[int]):
+        row = existing.get((source, target))
+        if row is None:
+            row = models.AnalogMapping(source_slug=source, target_slug=target)
+            db.add(row)
+            existing[(source, target)] = row
+        elif row.hops <= len(path):
+            return 0
+        row.mapping = json.dumps(mapping)
+        row.path = json.dumps(path)
+        row.hops = len(path)
+        return 1
+
+    written = 0
+    for x, (x_to_a, x_path) in into_a.items():
+        for y, (y_to_b, y_path) in into_b.items():
+            if x == y:
+                continue
+            # x -> a -> b -> y and its reverse
+            written += store(x, y, compose(compose(x_to_a, edge), invert(y_to_b)) or {},
+                             x_path + [iso.id] + y_path[::-1])
+            written += store(y, x, compose(compose(y_to_b, invert(edge)), invert(x_to_a)) or {},
+                             y_path + [iso.id] + x_path[::-1])
+
+    _union(db, slug_a, slug_b)
+    return written
+
+
+def rebuild(db) -> int:
+    """Recomputes the whole index from the verified isomorphisms. Returns how many were folded in."""
+    db.query(models.AnalogMapping).delete(synchronize_session=False)
+    db.query(models.AnalogClass).delete(synchronize_session=False)
+    verified = db.query(models.Isomorphism).filter(
+        models.Isomorphism.status == "verified"
+    ).order_by(models.Isomorphism.id.asc()).all()
+    for iso in verified:
+        add_verified(db, iso)
+    return len(verified)
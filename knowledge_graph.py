@@ -0,0 +1,274 @@
+"""
+Article-to-article adjacency behind /api/graph.
+
+Edges live in `article_edges` and are maintained incrementally on the writes that
+create them, so serving the graph never recomputes relationships:
+  backlink         [[wiki links]] in an article's content (sync_article, which also
+                   records each link with its anchor text in `article_links`)
+  shared_citation  articles citing the same source, weight = shared count (citation linking)
+  isomorphism      verified isomorphisms (recalculate_total_weight)
+`rebuild` recomputes everything from the source tables.
+"""
+import datetime
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, literal, or_, select
+from sqlalchemy.orm import aliased
+
+try:
+    from . import models
+except ImportError:
+    import models
+
+EDGE_KINDS = ("backlink", "shared_citation", "isomorphism")
+UNDIRECTED_KINDS = ("shared_citation", "isomorphism")
+
+# Obsidian-style [[target]] or [[target|anchor text]]
+WIKI_LINK = re.compile(r'\[\[([^\]|]+)(?:\|([^\]]+))?\]\]')
+
+
+def slugify(title: str) -> str:
+    """Same normalisation as `mp new` uses for filenames, so [[Link Text]] resolves to the article slug."""
+    slug = title.lower().strip()
+    slug = re.sub(r"[^\w\s-]", "", slug)
+    slug = re.sub(r"[\s_]+", "-", slug)
+    slug = re.sub(r"-+", "-", slug)
+    return slug.strip("-")
+
+
+def extract_links(content: Optional[str]) -> List[Tuple[str, str]]:
+    """(target slug, anchor text) for every wiki link in the content, in order."""
+    links = []
+    for match in WIKI_LINK.finditer(content or ""):
+        target = match.group(1).strip()
+        links.append((slugify(target), (match.group(2) or target).strip()))
+    return links
+
+
+def _pair(slug_a: str, slug_b: str) -> Tuple[str, str]:
+    return (slug_a, slug_b) if slug_a < slug_b else (slug_b, slug_a)
+
+
+def _backlink_edges(slug: str, links: List[Tuple[str, str]]) -> List[models.ArticleEdge]:
+    return [
+        models.ArticleEdge(source_slug=slug, target_slug=target, kind="backlink", weight=1.0)
+        for target in sorted({target for target, _ in links} - {slug})
+    ]
+
+
+def _link_rows(slug: str, links: List[Tuple[str, str]]) -> List[models.ArticleLink]:
+    seen = set()
+    rows = []
+    for target, anchor in links:
+        if (target, anchor) not in seen:
+            seen.add((target, anchor))
+            rows.append(models.ArticleLink(source_slug=slug, target_slug=target, anchor=anchor))
+    return rows
+
+
+def update_links(db, slug: str, content: Optional[str], archived: bool = False):
+    """
+    Replaces the article's rows in article_links and its outgoing backlink edges from one
+    parse of the content. Links of archived articles stay in article_links (readers filter
+    on the source) but get no edges. The caller commits.
+    """
+    links = extract_links(content)
+    db.query(models.ArticleLink).filter(models.ArticleLink.source_slug == slug).delete(synchronize_session=False)
+    db.add_all(_link_rows(slug, links))
+    db.query(models.ArticleEdge).filter(
+        models.ArticleEdge.kind == "backlink",
+        models.ArticleEdge.source_slug == slug
+    ).delete(synchronize_session=False)
+    if not archived:
+        db.add_all(_backlink_edges(slug, links))
+
+
+def rebuild_links(db) -> int:
+    """Re-parses every article into article_links. The caller commits."""
+    db.query(models.ArticleLink).delete(synchronize_session=False)
+    for slug, content in db.query(models.Article.slug, models.Article.content).yield_per(500):
+        db.add_all(_link_rows(slug, extract_links(content)))
+    db.flush()
+    return db.query(models.ArticleLink).count()
+
+
+def mark_dependents_stale(db, slug: str) -> int:
+    """
+    Called when an article's content changes: every article linking to it (looked up through
+    the target index on article_links, so O(in-degree)) is queued for review, and the
+    article's own stale marks are cleared since it has just been saved. The caller commits.
+    Returns the number of articles marked.
+    """
+    db.flush() # links written earlier in the same transaction must be visible to the INSERT ... SELECT
+    now = datetime.datetime.utcnow()
+    db.query(models.StaleLink).filter(
+        or_(models.StaleLink.source_slug == slug, models.StaleLink.target_slug == slug)
+    ).delete(synchronize_session=False)
+    dependents = select(
+        models.ArticleLink.source_slug, literal(slug), literal(now)
+    ).where(
+        models.ArticleLink.target_slug == slug, models.ArticleLink.source_slug != slug
+    ).distinct()
+    result = db.execute(insert(models.StaleLink).from_select(["source_slug", "target_slug", "marked_at"], dependents))
+    return result.rowcount
+
+
+def clear_stale(db, slug: str):
+    """The article was re-saved without a content change: its outgoing links count as reviewed."""
+    db.query(models.StaleLink).filter(models.StaleLink.source_slug == slug).delete(synchronize_session=False)
+
+
+def rebuild_stale(db) -> int:
+    """Seeds stale_links from a full outdated-link scan, for databases that predate the table. The caller commits."""
+    db.query(models.StaleLink).delete(synchronize_session=False)
+    now = datetime.datetime.utcnow()
+    for issue in link_issues(db)["outdated"]:
+        db.add(models.StaleLink(source_slug=issue["source"], target_slug=issue["target"], marked_at=now))
+    db.flush()
+    return db.query(models.StaleLink).count()
+
+
+def link_issues(db) -> Dict[str, List[Dict]]:
+    """
+    Links from live articles whose target is missing (broken), archived, or updated after
+    the linking article was last saved (outdated). One join over article_links.
+    """
+    source = aliased(models.Article)
+    target = aliased(models.Article)
+    rows = db.query(
+        models.ArticleLink.source_slug, models.ArticleLink.target_slug, source.author_id,
+        target.slug.label("found"), target.is_archived
+    ).join(
+        source, source.slug == models.ArticleLink.source_slug
+    ).outerjoin(
+        target, target.slug == models.ArticleLink.target_slug
+    ).filter(
+        or_(source.is_archived == False, source.is_archived.is_(None)),
+        or_(target.slug.is_(None), target.is_archived == True, target.updated_at > source.updated_at)
+    ).distinct().order_by(models.ArticleLink.source_slug, models.ArticleLink.target_slug).all()
+
+    results = {"outdated": [], "broken": [], "archived": []}
+    for row in rows:
+        issue = "broken" if row.found is None else "archived" if row.is_archived else "outdated"
+        results[issue].append({"source": row.source_slug, "target": row.target_slug, "author_id": row.author_id})
+    return results
+
+
+def update_shared_citations(db, slug: str):
+    """Recomputes the shared-citation edges touching one article from article_citations. The caller commits."""
+    link = models.article_citations
+    cited = [row.citation_id for row in db.execute(
+        link.select().where(link.c.article_slug == slug)
+    ).fetchall()]
+    shared = Counter(
+        row.article_slug for row in db.execute(
+            link.select().where(link.c.citation_id.in_(cited), link.c.article_slug != slug)
+        ).fetchall()
+    ) if cited else Counter()
+
+    db.query(models.ArticleEdge).filter(
+        models.ArticleEdge.kind == "shared_citation",
+        or_(models.ArticleEdge.source_slug == slug, models.ArticleEdge.target_slug == slug)
+    ).delete(synchronize_session=False)
+    for other, count in sorted(shared.items()):
+        source, target = _pair(slug, other)
+        db.add(models.ArticleEdge(source_slug=source, target_slug=target, kind="shared_citation", weight=float(count)))
+
+
+def add_isomorphism(db, iso: models.Isomorphism):
+    """Adds the edge for a verified isomorphism (idempotent). The caller commits."""
+    if not iso.article_a_slug or not iso.article_b_slug or iso.article_a_slug == iso.article_b_slug:
+        return
+    source, target = _pair(iso.article_a_slug, iso.article_b_slug)
+    exists = db.query(models.ArticleEdge).filter(
+        models.ArticleEdge.kind == "isomorphism",
+        models.ArticleEdge.source_slug == source,
+        models.ArticleEdge.target_slug == target
+    ).first()
+    if not exists:
+        db.add(models.ArticleEdge(source_slug=source, target_slug=target, kind="isomorphism", weight=1.0))
+
+
+def rebuild(db) -> int:
+    """Recomputes every edge from article content, article_citations and verified isomorphisms."""
+    db.query(models.ArticleEdge).delete(synchronize_session=False)
+    for slug, content, archived in db.query(
+        models.Article.slug, models.Article.content, models.Article.is_archived
+    ).yield_per(500):
+        if not archived:
+            db.add_all(_backlink_edges(slug, extract_links(content)))
+    db.flush()
+
+    link = models.article_citations
+    by_citation: Dict[str, List[str]] = {}
+    for row in db.execute(link.select()).fetchall():
+        by_citation.setdefault(row.citation_id, []).append(row.article_slug)
+    shared = Counter()
+    for slugs in by_citation.values():
+        slugs = sorted(set(slugs))
+        for i, slug_a in enumerate(slugs):
+            for slug_b in slugs[i + 1:]:
+                shared[(slug_a, slug_b)] += 1
+    for (source, target), count in shared.items():
+        db.add(models.ArticleEdge(source_slug=source, target_slug=target, kind="shared_citation", weight=float(count)))
+
+    for iso in db.query(models.Isomorphism).filter(models.Isomorphism.status == "verified").all():
+        add_isomorphism(db, iso)
+        db.flush()
+    return db.query(models.ArticleEdge).count()
+
+
+def _edge_filter(query, kinds: Optional[Iterable[str]]):
+    if kinds:
+        query = query.filter(models.ArticleEdge.kind.in_(list(kinds)))
+    return query
+
+
+def neighbourhood(db, seeds: List[str], radius: int = 1, kinds: Optional[Iterable[str]] = None,
+                  max_nodes: int = 5000) -> Tuple[Set[str], List[models.ArticleEdge]]:
+    """
+    Breadth-first expansion from the seed slugs, one edge query per hop, in both edge
+    directions. Stops early once `max_nodes` is reached. Returns (node slugs, edges among them).
+    """
+    nodes = set(seeds)
+    frontier = set(seeds)
+    for _ in range(radius):
+        if not frontier or len(nodes) >= max_nodes:
+            break
+        hop = _edge_filter(db.query(models.ArticleEdge.source_slug, models.ArticleEdge.target_slug), kinds).filter(
+            or_(models.ArticleEdge.source_slug.in_(frontier), models.ArticleEdge.target_slug.in_(frontier))
+        ).all()
+        reached = set()
+        for source, target in hop:
+            reached.add(source)
+            reached.add(target)
+        frontier = set(sorted(reached - nodes)[:max(0, max_nodes - len(nodes))])
+        nodes |= frontier
+
+    edges = _edge_filter(db.query(models.ArticleEdge), kinds).filter(
+        models.ArticleEdge.source_slug.in_(nodes),
+        models.ArticleEdge.target_slug.in_(nodes)
+    ).all()
+    return nodes, edges
+
+
+def encode_columnar(nodes: List[Dict], edges: List[models.ArticleEdge]) -> Dict:
+    """
+    Column-oriented encoding for large graphs: one array per node attribute, and links
+    as parallel arrays of node indices and kind codes (indices into `kinds`).
+    """
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    links = [e for e in edges if e.source_slug in index and e.target_slug in index]
+    return {
+        "format": "columnar",
+        "kinds": list(EDGE_KINDS),
+        "nodes": {key: [node[key] for node in nodes] for key in ("id", "title", "domain", "confidence")},
+        "links": {
+            "source": [index[e.source_slug] for e in links],
+            "target": [index[e.target_slug] for e in links],
+            "kind": [EDGE_KINDS.index(e.kind) for e in links],
+            "weight": [e.weight for e in links]
+        }
+    }
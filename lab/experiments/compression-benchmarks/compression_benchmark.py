@@ -0,0 +1,199 @@
+"""
+Compression-at-rest benchmark for CompressedText columns.
+
+Builds a corpus of article-like values (the repo's own Markdown, split into sections and
+regrouped into 0.2-16 KB bodies) and submission-like values (seeded synthetic experiment
+logs plus the repo's JSON reports). Half of each kind trains a zstd dictionary and the
+other half is measured, so dictionary results are on unseen text.
+
+Two levels are measured:
+- codec: stored bytes, and encode/decode microseconds per value, for raw, zlib, zstd
+  without a dictionary and zstd with the trained dictionary (compressed.Codec);
+- SQLite: the same values written and read back through a String column and a
+  CompressedText column, reporting database file size and total write/read time.
+
+Usage:
+    python lab/experiments/compression-benchmarks/compression_benchmark.py
+    python lab/experiments/compression-benchmarks/compression_benchmark.py --copies 4 --output lab/reports/compression-benchmark.json
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, PROJECT_ROOT)
+
+import compressed  # noqa: E402
+
+
+def markdown_values(rng: random.Random):
+    """Repo Markdown split at headings and regrouped into article-sized bodies."""
+    sections = []
+    for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, "**", "*.md"), recursive=True)):
+        if "node_modules" in path:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        parts = text.split("\n## ")
+        sections.extend(p if i == 0 else "## " + p for i, p in enumerate(parts) if p.strip())
+    values = []
+    while sections:
+        take = min(len(sections), rng.randint(1, 6))
+        values.append("\n".join(sections.pop(rng.randrange(len(sections))) for _ in range(take)))
+    return values
+
+
+def log_values(rng: random.Random, count: int):
+    """Pasted experiment logs: timestamped metric lines, plus the repo's JSON reports."""
+    metrics = ["latency_ms", "recall@10", "peak_kib", "throughput_per_s", "loss", "accuracy"]
+    stages = ["load", "warmup", "run", "verify", "teardown"]
+    values = []
+    start = datetime.datetime(2026, 1, 1)
+    for i in range(count):
+        lines = []
+        t = start + datetime.timedelta(minutes=i * 7)
+        for step in range(rng.randint(10, 300)):
+            t += datetime.timedelta(milliseconds=rng.randint(5, 5000))
+            metric = rng.choice(metrics)
+            lines.append(
+                f"{t.isoformat()} [{rng.choice(stages)}] task={i:05d} step={step} {metric}={rng.random() * 1000:.4f}"
+                + (" WARN retrying after timeout" if rng.random() < 0.03 else "")
+            )
+        values.append("\n".join(lines))
+    for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, "lab", "reports", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            values.append(f.read())
+    return values
+
+
+def split(values, rng):
+    values = list(values)
+    rng.shuffle(values)
+    return values[::2], values[1::2]
+
+
+def measure_codec(name, encode, decode, values):
+    started = time.perf_counter()
+    encoded = [encode(v) for v in values]
+    encode_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for blob in encoded:
+        decode(blob)
+    decode_s = time.perf_counter() - started
+    raw = sum(len(v.encode("utf-8")) for v in values)
+    stored = sum(len(b) for b in encoded)
+    return {
+        "codec": name,
+        "values": len(values),
+        "raw_bytes": raw,
+        "stored_bytes": stored,
+        "ratio": round(raw / stored, 2),
+        "encode_us": round(encode_s / len(values) * 1e6, 1),
+        "decode_us": round(decode_s / len(values) * 1e6, 1),
+    }
+
+
+def codec_results(train, test):
+    plain = compressed.Codec(min_bytes=0)
+    plain.set_dictionaries([])
+    tuned = compressed.Codec()
+    dictionary = compressed.train_dictionary(train)
+    tuned.set_dictionaries([(dictionary.dict_id(), dictionary.as_bytes())])
+    return [
+        measure_codec("raw", lambda v: v.encode("utf-8"), lambda b: b.decode("utf-8"), test),
+        measure_codec("zlib-6", lambda v: zlib.compress(v.encode("utf-8"), 6), lambda b: zlib.decompress(b).decode("utf-8"), test),
+        measure_codec("zstd-3", plain.encode, plain.decode, test),
+        measure_codec("zstd-3+dict", tuned.encode, tuned.decode, test),
+    ], dictionary
+
+
+def sqlite_results(values, dictionary):
+    from sqlalchemy import Column, Integer, String, create_engine, insert, select
+    from sqlalchemy.orm import declarative_base
+
+    compressed.codec.loader = None
+    compressed.codec.set_dictionaries([(dictionary.dict_id(), dictionary.as_bytes())])
+    results = []
+    for label, column_type in (("String", String), ("CompressedText", compressed.CompressedText)):
+        Base = declarative_base()
+
+        class Row(Base):
+            __tablename__ = "rows"
+            id = Column(Integer, primary_key=True)
+            body = Column(column_type)
+
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(Row.__table__), [{"id": i, "body": v} for i, v in enumerate(values)])
+        write_s = time.perf_counter() - started
+        engine.dispose()
+
+        engine = create_engine(f"sqlite:///{path}")
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            total = sum(len(body) for (body,) in conn.execute(select(Row.body)))
+        read_s = time.perf_counter() - started
+        engine.dispose()
+        results.append({
+            "column": label,
+            "rows": len(values),
+            "chars_read": total,
+            "file_mb": round(os.path.getsize(path) / 1e6, 2),
+            "write_s": round(write_s, 3),
+            "read_s": round(read_s, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--logs", type=int, default=400, help="Synthetic experiment logs to generate")
+    parser.add_argument("--copies", type=int, default=4, help="Times the test set is repeated for the SQLite run")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if compressed.zstandard is None:
+        sys.exit("zstandard is not installed; only the zlib fallback would be measured")
+
+    rng = random.Random(args.seed)
+    report = {"min_bytes": compressed.COMPRESSION_MIN_BYTES, "level": compressed.COMPRESSION_LEVEL, "corpora": {}}
+    all_test, all_train = [], []
+    for corpus, values in (("articles", markdown_values(rng)), ("submissions", log_values(rng, args.logs))):
+        train, test = split(values, rng)
+        all_train += train
+        all_test += test
+        codecs, _ = codec_results(train, test)
+        report["corpora"][corpus] = codecs
+
+    _, dictionary = codec_results(all_train, all_test)
+    report["sqlite"] = sqlite_results(all_test * args.copies, dictionary)
+
+    for corpus, codecs in report["corpora"].items():
+        print(f"\n{corpus} ({codecs[0]['values']} held-out values, {codecs[0]['raw_bytes'] / 1e6:.2f} MB)")
+        print(f"{'codec':<14}{'stored MB':>10}{'ratio':>8}{'enc us':>9}{'dec us':>9}")
+        for r in codecs:
+            print(f"{r['codec']:<14}{r['stored_bytes'] / 1e6:>10.3f}{r['ratio']:>8}{r['encode_us']:>9}{r['decode_us']:>9}")
+    print(f"\nSQLite ({report['sqlite'][0]['rows']} rows)")
+    print(f"{'column':<16}{'file MB':>9}{'write s':>9}{'read s':>9}")
+    for r in report["sqlite"]:
+        print(f"{r['column']:<16}{r['file_mb']:>9}{r['write_s']:>9}{r['read_s']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
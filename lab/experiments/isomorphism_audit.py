@@ -12,16 +12,18 @@ async def run_audit():
     
     # 1. Check spec vs implementation
     spec_path = os.path.join(BASE_DIR, "docs", "specs", "ISOMORPHISM_SPEC.md")
-    impl_path = os.path.join(BASE_DIR, "isomorphism.py")
+    impl_paths = [os.path.join(BASE_DIR, "isomorphism.py"), os.path.join(BASE_DIR, "vector_store.py")]
     
     with open(spec_path, 'r') as f:
         spec = f.read()
-    with open(impl_path, 'r') as f:
-        impl = f.read()
+    impl = ""
+    for impl_path in impl_paths:
+        with open(impl_path, 'r') as f:
+            impl += f.read()
         
     print("- Verifying IsomorphismEngine stubs...")
     checks = {
-        "VectorParams(size=3072": "text-embedding-3-large size match",
+        "EMBEDDING_DIM = 3072": "text-embedding-3-large size match",
         "score_threshold=threshold": "Candidate discovery threshold usage",
         "calculate_ged": "Graph Edit Distance stub exists",
         "propose_mapping": "Mapping table proposal stub exists"
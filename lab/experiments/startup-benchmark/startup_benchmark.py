@@ -0,0 +1,128 @@
+"""
+API startup benchmark.
+
+Starts the app in fresh interpreter processes and measures how long a worker takes
+to import `main`, answer its first request, and report every dependency ready on
+/health. Runs against a throwaway SQLite database and, per scenario, the embedded
+vector store or a Qdrant URL that refuses connections (a dependency that is down).
+
+Usage:
+    python lab/experiments/startup-benchmark/startup_benchmark.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+SCENARIOS = {
+    "local": "local://{workdir}/vectors",
+    "qdrant_down": "http://127.0.0.1:9",
+}
+
+
+def child(ready_timeout: float):
+    """Runs inside the fresh process: prints one JSON line of timings."""
+    sys.path.insert(0, PROJECT_ROOT)
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(main.app) as client:
+        serving = time.perf_counter()
+        client.get("/health")
+        first_health = time.perf_counter()
+        client.get("/debug_articles")
+        first_query = time.perf_counter()
+
+        status, db_ready = None, None
+        deadline = time.perf_counter() + ready_timeout
+        while time.perf_counter() < deadline:
+            response = client.get("/health")
+            status = response.json()["status"]
+            if db_ready is None and response.status_code == 200:
+                db_ready = time.perf_counter()
+            if status == "healthy":
+                break
+            time.sleep(0.01)
+        ready = time.perf_counter()
+
+    print(json.dumps({
+        "import_s": imported - started,
+        "lifespan_s": serving - imported,
+        "first_health_ms": (first_health - serving) * 1000,
+        "first_query_ms": (first_query - first_health) * 1000,
+        "db_ready_s": (db_ready - started) if db_ready else None,
+        "healthy_s": (ready - started) if status == "healthy" else None,
+        "final_status": status,
+    }))
+
+
+def run_scenario(vector_url: str, runs: int, ready_timeout: float) -> dict:
+    samples = []
+    for _ in range(runs):
+        workdir = tempfile.mkdtemp(prefix="startup-")
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+            "VECTOR_DB_URL": vector_url.format(workdir=workdir),
+            "PYTHONWARNINGS": "ignore",
+        }
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--ready-timeout", str(ready_timeout)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    def median(key):
+        values = [s[key] for s in samples if s[key] is not None]
+        return round(statistics.median(values), 3) if values else None
+
+    return {
+        "import_s": median("import_s"),
+        "lifespan_s": median("lifespan_s"),
+        "first_health_ms": median("first_health_ms"),
+        "first_query_ms": median("first_query_ms"),
+        "db_ready_s": median("db_ready_s"),
+        "healthy_s": median("healthy_s"),
+        "final_status": samples[-1]["final_status"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per scenario (medians reported)")
+    parser.add_argument("--ready-timeout", type=float, default=5.0, help="Seconds to wait for /health to report healthy")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="Limit to these scenarios")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.ready_timeout)
+        return
+
+    report = {"runs": args.runs, "scenarios": {}}
+    for name in args.scenario or list(SCENARIOS):
+        report["scenarios"][name] = run_scenario(SCENARIOS[name], args.runs, args.ready_timeout)
+
+    print(f"{'scenario':<12} {'import s':>9} {'1st req ms':>11} {'1st query ms':>13} {'db ready s':>11} {'healthy s':>10}  status")
+    for name, r in report["scenarios"].items():
+        fmt = lambda v: "-" if v is None else v
+        print(f"{name:<12} {r['import_s']:>9} {r['first_health_ms']:>11} {r['first_query_ms']:>13} {fmt(r['db_ready_s']):>11} {fmt(r['healthy_s']):>10}  {r['final_status']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
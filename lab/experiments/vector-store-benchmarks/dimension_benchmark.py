@@ -0,0 +1,116 @@
+"""
+Reduced-dimension collection benchmark.
+
+Compares the full 3072-dim collection with Matryoshka truncation and fitted PCA
+projections at several target dimensions. For each configuration it reports query
+latency, vector memory per million articles and candidate recall@k, i.e. how many
+of the exact full-dimension top-k neighbours (the discovery candidates) survive.
+
+Usage:
+    python lab/experiments/vector-store-benchmarks/dimension_benchmark.py --points 20000
+    python lab/experiments/vector-store-benchmarks/dimension_benchmark.py --vectors embeddings.npy
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path so the engine modules import like they do under main.py
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import vector_store
+
+DIMENSIONS = [256, 512, 1024]
+
+
+def synthetic_embeddings(points: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """
+    Clustered vectors whose variance decays along the dimensions, the way
+    Matryoshka-trained embeddings front-load information.
+    """
+    rng = np.random.default_rng(seed)
+    decay = (1.0 + np.arange(dim)) ** -0.5
+    centers = rng.normal(size=(clusters, dim)) * decay
+    data = centers[rng.integers(0, clusters, points)] + 0.5 * rng.normal(size=(points, dim)) * decay
+    data = data.astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def evaluate(name: str, projection, corpus: np.ndarray, query_rows: np.ndarray, truth, k: int) -> dict:
+    stored = corpus if projection is None else projection.apply(corpus)
+    workdir = tempfile.mkdtemp(prefix=f"dim-{name}-")
+    # Drive the collection directly: the async backend wrapper would add event-loop overhead to the timings
+    collection = vector_store.LocalCollection(os.path.join(workdir, "bench"), stored.shape[1], ivf_min_points=len(corpus) + 1)
+    for offset in range(0, len(stored), 5000):
+        collection.upsert([
+            {"id": str(i), "vector": stored[i], "payload": {}} for i in range(offset, min(offset + 5000, len(stored)))
+        ])
+
+    recall, latencies = 0.0, []
+    for q, expected in zip(query_rows, truth):
+        start = time.perf_counter()
+        query = corpus[q] if projection is None else projection.apply(corpus[q])
+        hits = collection.search(query, limit=k)
+        latencies.append(time.perf_counter() - start)
+        recall += len(expected & {int(h.id) for h in hits}) / k
+
+    return {
+        "dim": int(stored.shape[1]),
+        "candidate_recall_at_k": round(recall / len(query_rows), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        "gb_per_million": round(stored.shape[1] * 4 * 1e6 / 1e9, 2),
+    }
+
+
+def run(corpus: np.ndarray, queries: int, k: int, fit_sample: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed + 1)
+    query_rows = rng.choice(len(corpus), size=queries, replace=False)
+    truth = [set(np.argsort(-(corpus @ corpus[q]))[:k].tolist()) for q in query_rows]
+    sample = corpus[rng.choice(len(corpus), size=min(fit_sample, len(corpus)), replace=False)]
+
+    report = {"points": len(corpus), "input_dim": corpus.shape[1], "queries": queries, "k": k, "configs": {}}
+    report["configs"]["full"] = evaluate("full", None, corpus, query_rows, truth, k)
+    for dim in DIMENSIONS:
+        if dim >= corpus.shape[1]:
+            continue
+        report["configs"][f"truncate:{dim}"] = evaluate(f"truncate{dim}", vector_store.TruncateProjection(dim), corpus, query_rows, truth, k)
+        report["configs"][f"pca:{dim}"] = evaluate(f"pca{dim}", vector_store.PCAProjection.fit(sample, dim), corpus, query_rows, truth, k)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", default=None, help="Real embeddings as a .npy matrix (overrides the synthetic corpus)")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fit-sample", type=int, default=4096, help="Vectors used to fit the PCA projections")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this path")
+    args = parser.parse_args()
+
+    if args.vectors:
+        corpus = np.load(args.vectors).astype(np.float32)
+        corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    else:
+        corpus = synthetic_embeddings(args.points, args.dim, clusters=max(8, args.points // 200), seed=args.seed)
+
+    report = run(corpus, args.queries, args.k, args.fit_sample, args.seed)
+
+    print(f"{'config':<14} {'dim':>5} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8} {'GB / 1M':>8}")
+    for name, r in report["configs"].items():
+        print(f"{name:<14} {r['dim']:>5} {r['candidate_recall_at_k']:>10.3f} {r['latency_ms_p50']:>8.2f} "
+              f"{r['latency_ms_p95']:>8.2f} {r['gb_per_million']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
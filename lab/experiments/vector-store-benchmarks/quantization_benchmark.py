@@ -0,0 +1,118 @@
+"""
+Quantized vector storage benchmark for the embedded LocalBackend.
+
+Builds one collection per storage mode (float32 in RAM, float16 / int8 memory-mapped
+with float32 rescoring) over the same synthetic clustered corpus, then reports
+recall@10 against exact float32 search, query latency and resident memory.
+
+Usage:
+    python lab/experiments/vector-store-benchmarks/quantization_benchmark.py --points 20000 --dim 3072
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path so the engine modules import like they do under main.py
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import vector_store
+
+MODES = ["none", "float16", "int8"]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux); 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def synthetic_corpus(points: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors: embeddings of related articles sit close together."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    data = centers[rng.integers(0, clusters, points)] + 0.6 * rng.normal(size=(points, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def run(points: int, dim: int, queries: int, k: int, seed: int, rescore_factor: int) -> dict:
+    corpus = synthetic_corpus(points, dim, clusters=max(8, points // 200), seed=seed)
+    query_rows = np.random.default_rng(seed + 1).choice(points, size=queries, replace=False)
+    exact = [set(np.argsort(-(corpus @ corpus[q]))[:k].tolist()) for q in query_rows]
+
+    results = {"points": points, "dim": dim, "queries": queries, "k": k, "modes": {}}
+    for mode in MODES:
+        workdir = tempfile.mkdtemp(prefix=f"vec-{mode}-")
+        # Drive the collection directly: the async backend wrapper would add event-loop overhead to the timings
+        collection = vector_store.LocalCollection(
+            os.path.join(workdir, "bench"), dim, ivf_min_points=points + 1, quantization=mode, rescore_factor=rescore_factor
+        )
+
+        start = time.perf_counter()
+        for offset in range(0, points, 2000):
+            collection.upsert([
+                {"id": str(i), "vector": corpus[i], "payload": {}} for i in range(offset, min(offset + 2000, points))
+            ])
+        build_s = time.perf_counter() - start
+
+        # Reopen so resident memory reflects a cold process serving queries, not the build
+        del collection
+        rss_before = rss_bytes()
+        collection = vector_store.LocalCollection(
+            os.path.join(workdir, "bench"), dim, ivf_min_points=points + 1, quantization=mode, rescore_factor=rescore_factor
+        )
+
+        recall, latencies = 0.0, []
+        for q, truth in zip(query_rows, exact):
+            start = time.perf_counter()
+            hits = collection.search(corpus[q], limit=k)
+            latencies.append(time.perf_counter() - start)
+            recall += len(truth & {int(h.id) for h in hits}) / k
+        rss_after = rss_bytes()
+
+        scanned_bytes = dim * (4 if mode == "none" else np.dtype(vector_store.QUANTIZED_DTYPES[mode][1]).itemsize)
+        if mode == "int8":
+            scanned_bytes += 4  # per-row scale
+        results["modes"][mode] = {
+            "recall_at_k": round(recall / queries, 4),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 3),
+            "build_s": round(build_s, 2),
+            "resident_bytes_per_vector": scanned_bytes,
+            "resident_gb_per_million": round(scanned_bytes * 1e6 / 1e9, 2),
+            "measured_rss_delta_mb": round((rss_after - rss_before) / 1e6, 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this path")
+    args = parser.parse_args()
+
+    report = run(args.points, args.dim, args.queries, args.k, args.seed, args.rescore_factor)
+
+    print(f"{'mode':<8} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8} {'GB / 1M':>8} {'RSS Δ MB':>9}")
+    for mode, r in report["modes"].items():
+        print(f"{mode:<8} {r['recall_at_k']:>10.3f} {r['latency_ms_p50']:>8.2f} {r['latency_ms_p95']:>8.2f} "
+              f"{r['resident_gb_per_million']:>8.2f} {r['measured_rss_delta_mb']:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,146 @@
+"""
+Seeded generator of synthetic relational maps for the VF2 benchmarks.
+
+A relational map is the structure articles carry in `relational_map`:
+    {"nodes": [{"id", "tag"}], "links": [{"source", "target", "type"}], "predicates": [...]}
+
+Every map has two parts:
+- a random core: `nodes - 1 - 2 * branches` nodes with directed edges drawn at `density`
+  and node tags drawn from `tag_diversity` distinct tags;
+- a hub with `branches` identical two-node arms (hub -> arm_i -> leaf_i). The arms are
+  interchangeable, so every pair carries at least branches! valid mappings. This is the
+  symmetry ambiguity described in lab/reports/vf2-reliability-report.md.
+"""
+import random
+from typing import Dict, List, Optional, Tuple
+
+EDGE_TYPES = ["causes", "inhibits", "regulates"]
+ARM_TYPE = "part_of"
+
+
+def generate_map(
+    rng: random.Random,
+    nodes: int,
+    tag_diversity: int = 4,
+    density: float = 0.15,
+    branches: int = 0,
+    prefix: str = "n",
+) -> Dict:
+    core_size = nodes - 1 - 2 * branches
+    if core_size < 1:
+        raise ValueError(f"{nodes} nodes cannot hold a hub with {branches} arms plus a core")
+
+    tags = [f"tag{i}" for i in range(max(1, tag_diversity))]
+    core = [f"{prefix}{i}" for i in range(core_size)]
+    hub = f"{prefix}hub"
+    node_list = [{"id": node, "tag": rng.choice(tags)} for node in core]
+    node_list.append({"id": hub, "tag": "hub"})
+
+    links = []
+    for source in core:
+        for target in core:
+            if source != target and rng.random() < density:
+                links.append({"source": source, "target": target, "type": rng.choice(EDGE_TYPES)})
+    # Tie the hub into the core so the map is one structure, not two
+    links.append({"source": core[0], "target": hub, "type": "regulates"})
+
+    for i in range(branches):
+        arm, leaf = f"{prefix}arm{i}", f"{prefix}leaf{i}"
+        node_list += [{"id": arm, "tag": "arm"}, {"id": leaf, "tag": "leaf"}]
+        links += [
+            {"source": hub, "target": arm, "type": ARM_TYPE},
+            {"source": arm, "target": leaf, "type": ARM_TYPE},
+        ]
+
+    return {
+        "nodes": node_list,
+        "links": links,
+        "predicates": sorted({link["type"] for link in links}),
+    }
+
+
+def relabel(rng: random.Random, relational_map: Dict, prefix: str = "m") -> Tuple[Dict, Dict[str, str]]:
+    """
+    Plants an isomorphic copy: fresh node ids and shuffled node/link order.
+    Returns (copy, mapping from original ids to copy ids).
+    """
+    ids = [node["id"] for node in relational_map["nodes"]]
+    fresh = [f"{prefix}{i}" for i in range(len(ids))]
+    rng.shuffle(fresh)
+    mapping = dict(zip(ids, fresh))
+
+    nodes = [{"id": mapping[n["id"]], "tag": n["tag"]} for n in relational_map["nodes"]]
+    links = [{"source": mapping[l["source"]], "target": mapping[l["target"]], "type": l["type"]} for l in relational_map["links"]]
+    rng.shuffle(nodes)
+    rng.shuffle(links)
+    return {"nodes": nodes, "links": links, "predicates": list(relational_map["predicates"])}, mapping
+
+
+def perturb(rng: random.Random, relational_map: Dict) -> Optional[Dict]:
+    """
+    Near-miss negative: rewires one core link to a pair that is not linked yet, keeping
+    node and edge counts so only structure tells the two maps apart. None if the core is saturated.
+    """
+    core_nodes = [n["id"] for n in relational_map["nodes"] if n["tag"] not in ("hub", "arm", "leaf")]
+    core_set = set(core_nodes)
+    core_links = [i for i, l in enumerate(relational_map["links"]) if l["source"] in core_set and l["target"] in core_set]
+    existing = {(l["source"], l["target"]) for l in relational_map["links"]}
+    free = [(s, t) for s in core_nodes for t in core_nodes if s != t and (s, t) not in existing]
+    if not core_links or not free:
+        return None
+
+    links = [dict(l) for l in relational_map["links"]]
+    victim = links[rng.choice(core_links)]
+    victim["source"], victim["target"] = rng.choice(free)
+    return {"nodes": [dict(n) for n in relational_map["nodes"]], "links": links, "predicates": list(relational_map["predicates"])}
+
+
+def to_digraph(relational_map: Dict):
+    """The nx.DiGraph the lab engine's calculate_structural_similarity works on."""
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    for node in relational_map["nodes"]:
+        graph.add_node(node["id"], tag=node.get("tag", "generic"))
+    for link in relational_map["links"]:
+        graph.add_edge(link["source"], link["target"], type=link.get("type", "link"))
+    return graph
+
+
+def is_valid_mapping(source: Dict, target: Dict, mapping: Dict[str, str]) -> bool:
+    """True if `mapping` sends every source node and typed link onto the target with tags preserved."""
+    source_tags = {n["id"]: n.get("tag", "generic") for n in source["nodes"]}
+    target_tags = {n["id"]: n.get("tag", "generic") for n in target["nodes"]}
+    if set(mapping) != set(source_tags) or len(set(mapping.values())) != len(mapping):
+        return False
+    if any(target_tags.get(mapping[node]) != tag for node, tag in source_tags.items()):
+        return False
+    target_links = {(l["source"], l["target"], l.get("type", "link")) for l in target["links"]}
+    return all((mapping[l["source"]], mapping[l["target"]], l.get("type", "link")) in target_links for l in source["links"])
+
+
+def generate_pairs(seed: int, count: int, **params) -> List[Dict]:
+    """`count` planted (isomorphic) and up to `count` perturbed (non-isomorphic) pairs for one config."""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        source = generate_map(rng, prefix=f"a{i}_", **params)
+        copy, planted = relabel(rng, source, prefix=f"b{i}_")
+        pairs.append({"kind": "planted", "source": source, "target": copy, "planted_mapping": planted})
+        negative = perturb(rng, source)
+        if negative is not None:
+            copy, _ = relabel(rng, negative, prefix=f"c{i}_")
+            pairs.append({"kind": "perturbed", "source": source, "target": copy, "planted_mapping": None})
+    return pairs
+
+
+def typed_isomorphic(source: Dict, target: Dict) -> bool:
+    """Ground truth for perturbed pairs: a rewire can, rarely, land on an isomorphic map."""
+    import networkx as nx
+    from networkx.algorithms import isomorphism
+
+    return nx.is_isomorphic(
+        to_digraph(source), to_digraph(target),
+        node_match=isomorphism.categorical_node_match("tag", "generic"),
+        edge_match=isomorphism.categorical_edge_match("type", "link"),
+    )
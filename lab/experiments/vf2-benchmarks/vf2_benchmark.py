@@ -0,0 +1,227 @@
+"""
+VF2 performance and reliability benchmark.
+
+Generates seeded relational-map pairs (see graph_generator.py) over a grid of node
+counts, tag diversity, edge density and symmetric arms. Each config gets planted
+isomorphic pairs and perturbed near-misses. Two functions are measured on every pair:
+- isomorphism.IsomorphismEngine.propose_mapping (production, typed VF2 matching);
+- lab IsomorphismEngine.calculate_structural_similarity (untyped VF2 plus a degree fallback).
+
+Reports latency, tracemalloc peak, ambiguity counts and correctness per config. The JSON
+output can be diffed against an earlier run with --compare.
+
+Usage:
+    python lab/experiments/vf2-benchmarks/vf2_benchmark.py --output lab/reports/vf2-benchmark.json
+    python lab/experiments/vf2-benchmarks/vf2_benchmark.py --compare lab/reports/vf2-benchmark.json
+"""
+import argparse
+import datetime
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import zlib
+from collections import Counter
+
+# Add project root to path so the engine modules import like they do under main.py
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import networkx as nx
+
+import isomorphism
+import vector_store
+from lab.isomorphism_discovery.isomorphism_engine import IsomorphismEngine as LabEngine
+
+import graph_generator
+
+
+def percentile(values, q):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def timed(fn, *args, repeats: int):
+    """Best-of-`repeats` wall time in ms and the last result."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_kib(fn, *args) -> float:
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_config(engine, lab_engine, params: dict, pairs: int, seed: int, repeats: int, matcher: str = "auto") -> dict:
+    pair_list = graph_generator.generate_pairs(seed, pairs, **params)
+    mapping_ms, mapping_peak, similarity_ms, similarity_peak = [], [], [], []
+    ambiguity, confidence = [], []
+    matchers_used = Counter()
+    planted = {"pairs": 0, "flagged_isomorphic": 0, "valid_mapping": 0, "planted_mapping": 0, "similarity_1": 0}
+    perturbed = {"pairs": 0, "correct": 0, "similarity": []}
+
+    for pair in pair_list:
+        article_a = {"slug": "a", "relational_map": pair["source"]}
+        article_b = {"slug": "b", "relational_map": pair["target"]}
+        graph_a = graph_generator.to_digraph(pair["source"])
+        graph_b = graph_generator.to_digraph(pair["target"])
+
+        ms, proposal = timed(engine.propose_mapping, article_a, article_b, matcher, repeats=repeats)
+        mapping_ms.append(ms)
+        mapping_peak.append(peak_kib(engine.propose_mapping, article_a, article_b, matcher))
+        matchers_used[proposal["matcher"]] += 1
+        ms, similarity = timed(lab_engine.calculate_structural_similarity, graph_a, graph_b, matcher, repeats=repeats)
+        similarity_ms.append(ms)
+        similarity_peak.append(peak_kib(lab_engine.calculate_structural_similarity, graph_a, graph_b, matcher))
+
+        if pair["kind"] == "planted":
+            planted["pairs"] += 1
+            ambiguity.append(proposal["ambiguity_count"] or 0)
+            confidence.append(proposal["confidence"])
+            planted["flagged_isomorphic"] += bool(proposal["isomorphic"])
+            planted["valid_mapping"] += graph_generator.is_valid_mapping(pair["source"], pair["target"], proposal["mapping"])
+            planted["planted_mapping"] += proposal["mapping"] == pair["planted_mapping"]
+            planted["similarity_1"] += similarity == 1.0
+        else:
+            perturbed["pairs"] += 1
+            expected = graph_generator.typed_isomorphic(pair["source"], pair["target"])
+            perturbed["correct"] += bool(proposal["isomorphic"]) == expected
+            perturbed["similarity"].append(float(similarity))
+
+    def rate(count, total):
+        return round(count / total, 4) if total else None
+
+    return {
+        **params,
+        "pairs": len(pair_list),
+        "propose_mapping": {
+            "matchers": dict(matchers_used),
+            "latency_ms_p50": round(statistics.median(mapping_ms), 3),
+            "latency_ms_p95": round(percentile(mapping_ms, 95), 3),
+            "peak_kib_max": round(max(mapping_peak), 1),
+            "ambiguity_mean": round(statistics.mean(ambiguity), 2),
+            "ambiguity_max": max(ambiguity),
+            "ambiguity_floor": math.factorial(params["branches"]),
+            "planted_detected": rate(planted["flagged_isomorphic"], planted["pairs"]),
+            "valid_mapping": rate(planted["valid_mapping"], planted["pairs"]),
+            "planted_mapping_recovered": rate(planted["planted_mapping"], planted["pairs"]),
+            "perturbed_correct": rate(perturbed["correct"], perturbed["pairs"]),
+            "confidence_mean_planted": round(statistics.mean(confidence), 4),
+        },
+        "structural_similarity": {
+            "latency_ms_p50": round(statistics.median(similarity_ms), 3),
+            "latency_ms_p95": round(percentile(similarity_ms, 95), 3),
+            "peak_kib_max": round(max(similarity_peak), 1),
+            "planted_scored_1": rate(planted["similarity_1"], planted["pairs"]),
+            "perturbed_mean": round(statistics.mean(perturbed["similarity"]), 4) if perturbed["similarity"] else None,
+        },
+    }
+
+
+def config_key(result: dict) -> str:
+    return f"n={result['nodes']} tags={result['tag_diversity']} d={result['density']} arms={result['branches']}"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def print_table(report: dict, baseline: dict = None):
+    previous = {config_key(r): r for r in baseline["configs"]} if baseline else {}
+    header = f"{'config':<34} {'matcher':>10} {'map p50 ms':>10} {'map KiB':>8} {'ambig':>7} {'valid':>6} {'neg ok':>6} {'sim p50 ms':>10} {'sim=1':>6}"
+    if previous:
+        header += f" {'Δ map p50':>10}"
+    print(header)
+    for r in report["configs"]:
+        pm, ss = r["propose_mapping"], r["structural_similarity"]
+        line = (
+            f"{config_key(r):<34} {'/'.join(pm.get('matchers', {})) or '-':>10} {pm['latency_ms_p50']:>10} {pm['peak_kib_max']:>8} {pm['ambiguity_mean']:>7} "
+            f"{pm['valid_mapping']:>6} {str(pm['perturbed_correct']):>6} {ss['latency_ms_p50']:>10} {ss['planted_scored_1']:>6}"
+        )
+        before = previous.get(config_key(r))
+        if before:
+            old = before["propose_mapping"]["latency_ms_p50"]
+            line += f" {((pm['latency_ms_p50'] - old) / old * 100 if old else 0):>+9.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--tags", type=int, nargs="+", default=[1, 4], help="Tag diversity of core nodes")
+    parser.add_argument("--density", type=float, nargs="+", default=[0.1, 0.25], help="Core edge probability")
+    parser.add_argument("--branches", type=int, nargs="+", default=[0, 3, 5],
+                        help="Interchangeable arms (symmetry); ambiguity grows as arms!")
+    parser.add_argument("--pairs", type=int, default=5, help="Planted pairs per config (plus as many perturbed)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats per call (best kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--matcher", default="auto", help="Matcher backend (auto, vf2, vf2pp, degree, approx_ged)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Earlier JSON report to diff latencies against")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    # propose_mapping only needs the graph code; an empty embedded store keeps the engine offline
+    engine = isomorphism.IsomorphismEngine(backend=vector_store.LocalBackend(tempfile.mkdtemp(prefix="vf2-bench-")))
+    lab_engine = LabEngine(qdrant_url=None)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "seed": args.seed,
+            "matcher": args.matcher,
+            "pairs": args.pairs,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "networkx": nx.__version__,
+        },
+        "configs": [],
+    }
+    for nodes, tags, density, branches in itertools.product(args.nodes, args.tags, args.density, args.branches):
+        if nodes - 1 - 2 * branches < 2:
+            continue
+        params = {"nodes": nodes, "tag_diversity": tags, "density": density, "branches": branches}
+        # Seeded per config, so a narrowed grid regenerates exactly the same pairs
+        seed = args.seed + zlib.crc32(config_key(params).encode())
+        report["configs"].append(run_config(engine, lab_engine, params, args.pairs, seed, args.repeats, args.matcher))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare} (commit {baseline['meta'].get('commit')})\n")
+    print_table(report, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
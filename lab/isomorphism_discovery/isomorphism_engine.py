@@ -1,14 +1,23 @@
-import numpy as np
+import os
+import sys
 import networkx as nx
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from qdrant_client import QdrantClient
 
+# Add project root to path so the shared matcher registry imports when run directly
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import matchers
+
 class IsomorphismEngine:
     """
     Engine for discovering structural isomorphisms between Article nodes.
     """
-    def __init__(self, qdrant_url: str = "http://localhost:6333"):
-        self.qdrant = QdrantClient(url=qdrant_url)
+    def __init__(self, qdrant_url: Optional[str] = "http://localhost:6333"):
+        # qdrant_url=None skips the client for offline structural work (e.g. the VF2 benchmarks)
+        self.qdrant = QdrantClient(url=qdrant_url) if qdrant_url else None
         self.similarity_threshold = 0.75
 
     def find_candidates(self, target_embedding: List[float], limit: int = 10) -> List[Dict[str, Any]]:
@@ -19,60 +28,27 @@ class IsomorphismEngine:
         # For now, we return empty list or mock data
         return []
 
-    def calculate_structural_similarity(self, graph_a: nx.Graph, graph_b: nx.Graph) -> float:
+    def calculate_structural_similarity(self, graph_a: nx.Graph, graph_b: nx.Graph, matcher: str = "auto") -> float:
         """
         Step 2: Calculate structural alignment using VF2 Subgraph Isomorphism or GED.
+        The backend comes from the shared matcher registry (matchers.py); exact isomorphism
+        scores 1.0, otherwise the backend's structural score (degree overlap or edit distance).
         """
         try:
-            # Select appropriate matcher based on graph type
-            if graph_a.is_directed():
-                matcher_class = nx.algorithms.isomorphism.DiGraphMatcher
-            else:
-                matcher_class = nx.algorithms.isomorphism.GraphMatcher
-                
-            matcher = matcher_class(graph_a, graph_b)
-            if matcher.is_isomorphic():
-                return 1.0
-            
-            # If not perfectly isomorphic, fallback to the degree heuristic for a similarity score
-            deg_a = sorted([d for n, d in graph_a.degree()])
-            deg_b = sorted([d for n, d in graph_b.degree()])
-            
-            max_len = max(len(deg_a), len(deg_b))
-            deg_a += [0] * (max_len - len(deg_a))
-            deg_b += [0] * (max_len - len(deg_b))
-            
-            intersection = np.sum(np.minimum(deg_a, deg_b))
-            union = np.sum(np.maximum(deg_a, deg_b))
-            
-            return intersection / union if union > 0 else 0.0
-            
+            return matchers.match_graphs(graph_a, graph_b, matcher=matcher).score
         except Exception as e:
             print(f"Error calculating structural similarity: {e}")
             return 0.0
 
-    def propose_mapping(self, graph_a: nx.Graph, graph_b: nx.Graph) -> Dict[str, str]:
+    def propose_mapping(self, graph_a: nx.Graph, graph_b: nx.Graph, matcher: str = "auto") -> Dict[str, str]:
         """
         Step 3: Propose a mapping table between nodes of A and B using VF2 if possible.
+        Falls back to the degree heuristic when the exact backend finds no mapping.
         """
-        if graph_a.is_directed():
-            matcher_class = nx.algorithms.isomorphism.DiGraphMatcher
-        else:
-            matcher_class = nx.algorithms.isomorphism.GraphMatcher
-            
-        matcher = matcher_class(graph_a, graph_b)
-        if matcher.is_isomorphic():
-            return matcher.mapping
-            
-        # Fallback to degree centrality mapping for non-isomorphic graphs
-        cent_a = sorted(nx.degree_centrality(graph_a).items(), key=lambda x: x[1], reverse=True)
-        cent_b = sorted(nx.degree_centrality(graph_b).items(), key=lambda x: x[1], reverse=True)
-        
-        mapping = {}
-        for (node_a, _), (node_b, _) in zip(cent_a, cent_b):
-            mapping[node_a] = node_b
-            
-        return mapping
+        result = matchers.match_graphs(graph_a, graph_b, matcher=matcher)
+        if result.mapping:
+            return result.mapping
+        return matchers.match_graphs(graph_a, graph_b, matcher="degree").mapping
 
 if __name__ == "__main__":
     # Test case: Simple biological switch vs Logic Gate
@@ -82,7 +58,7 @@ if __name__ == "__main__":
     logic_gate = nx.DiGraph()
     logic_gate.add_edges_from([("In", "Transistor"), ("Transistor", "Out"), ("Out", "In")]) # Simple latch logic
     
-    engine = IsomorphismEngine()
+    engine = IsomorphismEngine(qdrant_url=None)
     similarity = engine.calculate_structural_similarity(bio_switch, logic_gate)
     mapping = engine.propose_mapping(bio_switch, logic_gate)
     
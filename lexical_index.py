@@ -0,0 +1,127 @@
+"""
+In-memory BM25 inverted index over article titles and content.
+
+The index lives in each API worker. sync_article updates it in place, and the search
+endpoint periodically reloads rows changed since `watermark` (by `Article.updated_at`),
+so a multi-worker deployment converges within the refresh interval.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were with".split()
+)
+
+# Title terms count this many times in the document's term frequencies
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {} # term -> {slug: tf}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.doc_meta: Dict[str, Dict] = {}
+        self.total_len = 0
+        self.watermark = None # Latest Article.updated_at seen by build/refresh
+        self.refreshed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _remove(self, slug: str):
+        terms = self.doc_terms.pop(slug, None)
+        self.doc_meta.pop(slug, None)
+        if terms is None:
+            return
+        self.total_len -= self.doc_len.pop(slug)
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(slug, None)
+                if not docs:
+                    del self.postings[term]
+
+    def add(self, slug: str, title: Optional[str], content: Optional[str], domain: Optional[str] = None):
+        """Indexes (or re-indexes) one article."""
+        terms = Counter(tokenize(content))
+        for term in tokenize(title):
+            terms[term] += TITLE_WEIGHT
+        with self._lock:
+            self._remove(slug)
+            self.doc_terms[slug] = terms
+            self.doc_meta[slug] = {"title": title, "domain": domain}
+            self.doc_len[slug] = sum(terms.values())
+            self.total_len += self.doc_len[slug]
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[slug] = tf
+
+    def remove(self, slug: str):
+        with self._lock:
+            self._remove(slug)
+
+    def load(self, articles, watermark=None):
+        """
+        Applies a batch of Article rows read from the database: archived ones are dropped,
+        the rest (re)indexed, and the watermark advanced.
+        """
+        for article in articles:
+            if article.is_archived:
+                self.remove(article.slug)
+            else:
+                self.add(article.slug, article.title, article.content, article.domain)
+            if article.updated_at and (self.watermark is None or article.updated_at > self.watermark):
+                self.watermark = article.updated_at
+        if watermark and (self.watermark is None or watermark > self.watermark):
+            self.watermark = watermark
+
+    def search(self, query: str, limit: int = 10, domain: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top `limit` (slug, BM25 score) pairs, best first."""
+        terms = set(tokenize(query))
+        scores: Dict[str, float] = {}
+        with self._lock:
+            n = len(self.doc_terms)
+            if not n or not terms:
+                return []
+            avg_len = self.total_len / n
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for slug, tf in docs.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[slug] / avg_len)
+                    scores[slug] = scores.get(slug, 0.0) + idf * tf * (self.k1 + 1) / norm
+            if domain:
+                scores = {s: v for s, v in scores.items() if self.doc_meta[s]["domain"] == domain}
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def meta(self, slug: str) -> Dict:
+        return self.doc_meta.get(slug, {})
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[str]], k: int = 60) -> List[Tuple[str, float, Dict[str, int]]]:
+    """
+    Fuses ranked slug lists: score = sum over lists of 1 / (k + rank), ranks from 1.
+    Returns (slug, score, {list name: rank}) best first.
+    """
+    fused: Dict[str, float] = {}
+    ranks: Dict[str, Dict[str, int]] = {}
+    for name, slugs in rankings.items():
+        for rank, slug in enumerate(slugs, start=1):
+            fused[slug] = fused.get(slug, 0.0) + 1.0 / (k + rank)
+            ranks.setdefault(slug, {})[name] = rank
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return [(slug, score, ranks[slug]) for slug, score in ordered]
@@ -1,38 +1,181 @@
-from fastapi import FastAPI, HTTPException, Depends, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException, Depends, Form, Query, Request, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 try:
-    from . import models, database, isomorphism
+    from . import article_sync, models, database, embeddings, fulltext, isomorphism, isomorphism_index, knowledge_graph, lexical_index, revisions
 except ImportError:
-    import models, database, isomorphism
+    import article_sync, models, database, embeddings, fulltext, isomorphism, isomorphism_index, knowledge_graph, lexical_index, revisions
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import datetime
+import anyio
+import asyncio
 import hashlib
 import httpx
 import re
+import struct
+import threading
+import time
+from contextlib import asynccontextmanager
 
 import json
 import random
 import os
 
-# Create tables
-models.Base.metadata.create_all(bind=database.engine)
+class SubsystemUnavailable(RuntimeError):
+    pass
 
-app = FastAPI(title="Moltapedia Metabolic Engine")
-engine = isomorphism.IsomorphismEngine(qdrant_url=database.os.getenv("VECTOR_DB_URL", "http://localhost:6333"))
+class Subsystem:
+    """
+    A dependency brought up on first use (or by the startup warm-up) instead of at import time.
+    Failed starts back off exponentially, so a dead dependency costs one fast failure per
+    window instead of a connect timeout on every request.
+    """
+
+    def __init__(self, name: str, factory, min_backoff: float = 1.0, max_backoff: float = 30.0):
+        self.name = name
+        self.factory = factory
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.value = None
+        self.ready = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.startup_ms: Optional[float] = None
+        self.retry_at = 0.0
+        self.background = False # Set while the lifespan warm-up owns (re)starting it
+        self.starting = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def get(self, start: bool = True):
+        if self.ready:
+            return self.value
+        if not start:
+            raise SubsystemUnavailable(f"{self.name} unavailable: {self.error or 'still starting'}")
+        with self._lock:
+            if self.ready:
+                return self.value
+            if self.retry_in() > 0:
+                raise SubsystemUnavailable(f"{self.name} unavailable: {self.error}")
+            self.attempts += 1
+            self.starting = True
+            started = time.perf_counter()
+            try:
+                value = self.factory()
+            except Exception as e:
+                self.starting = False
+                self.error = f"{type(e).__name__}: {e}"
+                backoff = min(self.max_backoff, self.min_backoff * 2 ** (self.attempts - 1))
+                self.retry_at = time.monotonic() + backoff
+                print(f"{self.name} failed to start (attempt {self.attempts}, retrying in {backoff:.0f}s): {self.error}")
+                raise SubsystemUnavailable(f"{self.name} unavailable: {self.error}") from e
+            self.value = value
+            self.starting = False
+            self.startup_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.error = None
+            self.ready = True
+            return value
+
+    def status(self) -> Dict:
+        if self.ready:
+            return {"status": "ready", "startup_ms": self.startup_ms}
+        if self.starting or not self.attempts:
+            return {"status": "starting", "attempts": self.attempts}
+        return {"status": "unavailable", "attempts": self.attempts, "error": self.error, "retry_in_s": round(self.retry_in(), 1)}
+
+def create_schema():
+    article_sync.prepare_database(database.engine)
+    return True
+
+def load_gold_dataset() -> Dict[str, List[Dict]]:
+    dataset = {"competence": [], "alignment": []}
+    dataset_path = os.path.join(os.path.dirname(__file__), "gold_dataset")
+    if os.path.exists(dataset_path):
+        for filename in os.listdir(dataset_path):
+            if filename.endswith(".json"):
+                with open(os.path.join(dataset_path, filename), "r") as f:
+                    data = json.load(f)
+                    for q in data:
+                        if q["domain"] in dataset:
+                            dataset[q["domain"]].append(q)
+    return dataset
+
+def build_vector_engine() -> isomorphism.IsomorphismEngine:
+    return isomorphism.IsomorphismEngine(
+        qdrant_url=database.os.getenv("VECTOR_DB_URL", "http://localhost:6333"),
+        reduction=os.getenv("VECTOR_REDUCTION")
+    )
+
+def build_embedder() -> embeddings.Embedder:
+    # EMBEDDING_BACKEND=hashing (offline) | openai; vectors match the dimension clients send
+    return embeddings.create_embedder(os.getenv("EMBEDDING_BACKEND", "hashing"), dim=isomorphism.EMBEDDING_DIM)
+
+def build_lexical_index() -> lexical_index.BM25Index:
+    schema.get() # The articles table must exist before it can be read
+    index = lexical_index.BM25Index()
+    db = database.SessionLocal()
+    try:
+        index.load(db.query(models.Article).yield_per(500))
+    finally:
+        db.close()
+    return index
+
+schema = Subsystem("database", create_schema)
+gold_dataset = Subsystem("gold_dataset", load_gold_dataset)
+vector_engine = Subsystem("vector_store", build_vector_engine)
+embedder = Subsystem("embedder", build_embedder)
+lexical = Subsystem("lexical_index", build_lexical_index)
+
+def get_engine() -> isomorphism.IsomorphismEngine:
+    """The isomorphism engine, or a 503 while the vector store is unreachable."""
+    try:
+        # Request handlers never block on a connect attempt the warm-up task is already making
+        return vector_engine.get(start=not vector_engine.background)
+    except SubsystemUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-# Load Golden Dataset
-GOLD_DATASET = {"competence": [], "alignment": []}
-dataset_path = os.path.join(os.path.dirname(__file__), "gold_dataset")
-if os.path.exists(dataset_path):
-    for filename in os.listdir(dataset_path):
-        if filename.endswith(".json"):
-            with open(os.path.join(dataset_path, filename), "r") as f:
-                data = json.load(f)
-                for q in data:
-                    if q["domain"] in GOLD_DATASET:
-                        GOLD_DATASET[q["domain"]].append(q)
+def get_embedder() -> embeddings.Embedder:
+    """The server-side embedding backend, or a 503 while it is misconfigured."""
+    try:
+        return embedder.get()
+    except SubsystemUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def get_gold_dataset() -> Dict[str, List[Dict]]:
+    """The exam question pools, or a 503 while they cannot be loaded."""
+    try:
+        return gold_dataset.get()
+    except SubsystemUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def warm_up(subsystem: Subsystem):
+    """Starts a subsystem off the event loop, retrying on its backoff schedule until it is up."""
+    subsystem.background = True
+    while not subsystem.ready:
+        try:
+            await asyncio.to_thread(subsystem.get)
+        except SubsystemUnavailable:
+            await asyncio.sleep(subsystem.retry_in())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optional dependencies come up in the background; /health reports readiness meanwhile.
+    # Tables must exist before queries are served, so wait on the database (bounded, still retrying after).
+    tasks = [asyncio.create_task(warm_up(s)) for s in (schema, gold_dataset, vector_engine, lexical)]
+    await asyncio.wait(tasks[:1], timeout=float(os.getenv("STARTUP_DB_TIMEOUT", "30")))
+    yield
+    for task in tasks:
+        task.cancel()
+    if vector_engine.ready:
+        await vector_engine.value.backend.close()
+
+app = FastAPI(title="Moltapedia Metabolic Engine", lifespan=lifespan)
 
 # Fallback Mock if dataset is empty
 MOCK_EXAM = {
@@ -69,6 +212,8 @@ class CitationReviewCreate(BaseModel):
 class SearchQuery(BaseModel):
     vector: List[float]
     threshold: Optional[float] = 0.75
+    domain: Optional[str] = None # Restrict hits to this domain
+    exclude_domain: Optional[str] = None # Drop hits from this domain (cross-domain scan)
 
 class VoteCreate(BaseModel):
     agent_id: str
@@ -522,6 +667,9 @@ def recalculate_total_weight(target_type: str, target_id: str, db: Session):
         # ISOMORPHISM_SPEC 3.3: At least 2 independent agents with Sagacity Index > 0.7
         # 0.7 * 2 = 1.4
         target.status = "verified"
+        # Fold the new edge into the analog class index in the same transaction
+        isomorphism_index.add_verified(db, target)
+        knowledge_graph.add_isomorphism(db, target)
     
     db.commit()
 
@@ -837,8 +985,35 @@ def read_finding(path: str):
     """
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+def health_check(response: Response):
+    """
+    Readiness per dependency. The database is required (503 until it answers and the
+    schema exists); a missing vector store only degrades the isomorphism endpoints.
+    """
+    started = time.perf_counter()
+    try:
+        with database.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        database_check = {"reachable": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        database_check = {"reachable": False, "error": f"{type(e).__name__}: {e}"}
+
+    dependencies = {
+        "database": {**schema.status(), **database_check},
+        "vector_store": vector_engine.status(),
+        "gold_dataset": gold_dataset.status(),
+    }
+    if gold_dataset.ready:
+        dependencies["gold_dataset"]["questions"] = sum(len(qs) for qs in gold_dataset.value.values())
+
+    if not (schema.ready and database_check["reachable"]):
+        status = "unavailable"
+        response.status_code = 503
+    elif all(d["status"] == "ready" for d in dependencies.values()):
+        status = "healthy"
+    else:
+        status = "degraded"
+    return {"status": status, "dependencies": dependencies}
 
 @app.get("/muda")
 def get_muda_logs():
@@ -959,20 +1134,51 @@ def apply_context_decay(db: Session = Depends(database.get_db)):
     return {"status": "decay applied", "nodes_processed": len(weights)}
 
 @app.get("/api/graph")
-def get_knowledge_graph(db: Session = Depends(database.get_db)):
+def get_knowledge_graph(
+    seed: Optional[List[str]] = Query(None),
+    radius: int = 1,
+    kinds: Optional[str] = None,
+    format: Optional[str] = None,
+    max_nodes: int = 5000,
+    db: Session = Depends(database.get_db)
+):
     """
     Returns nodes and edges for the graph visualization.
     Nodes: Articles
-    Edges: Implicit links via shared citations or explicitly proposed mappings.
+    Edges: backlinks, shared citations and verified isomorphisms from the maintained adjacency store.
+    With `seed` (repeatable) only the subgraph within `radius` hops is returned; `kinds` limits
+    edge types (comma-separated); format=columnar switches to the compact column encoding.
     """
-    articles = db.query(models.Article).all()
+    edge_kinds = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    if edge_kinds:
+        unknown = [k for k in edge_kinds if k not in knowledge_graph.EDGE_KINDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown edge kinds: {', '.join(unknown)}")
+    radius = max(0, min(radius, 3))
+    max_nodes = max(1, min(max_nodes, 50000))
+
+    node_columns = (models.Article.slug, models.Article.title, models.Article.domain, models.Article.confidence_score)
+    if seed:
+        slugs, edges = knowledge_graph.neighbourhood(db, seed, radius=radius, kinds=edge_kinds, max_nodes=max_nodes)
+        articles = db.query(*node_columns).filter(models.Article.slug.in_(slugs)).order_by(models.Article.slug).all()
+    else:
+        articles = db.query(*node_columns).order_by(models.Article.slug).all()
+        query = db.query(models.ArticleEdge)
+        if edge_kinds:
+            query = query.filter(models.ArticleEdge.kind.in_(edge_kinds))
+        edges = query.all()
+
     nodes = [{"id": art.slug, "title": art.title, "domain": art.domain, "confidence": art.confidence_score} for art in articles]
-    
-    # Simple edge logic for alpha: connect articles in same domain or with high similarity
-    edges = []
-    # (Implementation of real relationship mapping would go here)
-    
-    return {"nodes": nodes, "links": edges}
+    if format == "columnar":
+        return knowledge_graph.encode_columnar(nodes, edges)
+
+    # Links to articles that do not exist (yet) are kept in the store but not drawn
+    known = {node["id"] for node in nodes}
+    links = [
+        {"source": e.source_slug, "target": e.target_slug, "kind": e.kind, "weight": e.weight}
+        for e in edges if e.source_slug in known and e.target_slug in known
+    ]
+    return {"nodes": nodes, "links": links}
 
 @app.post("/auth/bind/request")
 def request_bind(req: BindRequest):
@@ -1058,8 +1264,9 @@ def start_exam(req: ExamStartRequest, db: Session = Depends(database.get_db)):
         raise HTTPException(status_code=404, detail="Agent not found. Bind identity first.")
     
     # Increase rigor: 5 Competence, 5 Alignment as per SAGACITY_SPEC expansion
-    c_pool = GOLD_DATASET["competence"] if GOLD_DATASET["competence"] else MOCK_EXAM["competence"]
-    a_pool = GOLD_DATASET["alignment"] if GOLD_DATASET["alignment"] else MOCK_EXAM["alignment"]
+    dataset = get_gold_dataset()
+    c_pool = dataset["competence"] if dataset["competence"] else MOCK_EXAM["competence"]
+    a_pool = dataset["alignment"] if dataset["alignment"] else MOCK_EXAM["alignment"]
     
     selected_c = random.sample(c_pool, min(len(c_pool), 5))
     selected_a = random.sample(a_pool, min(len(a_pool), 5))
@@ -1224,9 +1431,61 @@ def create_isomorphism(iso: IsomorphismCreate, db: Session = Depends(database.ge
     db.refresh(db_iso)
     return db_iso
 
+ISOMORPHISM_FIELDS = [c.name for c in models.Isomorphism.__table__.columns]
+# mapping_table is the heavy column; it is only returned when asked for via fields=
+ISOMORPHISM_DEFAULT_FIELDS = [f for f in ISOMORPHISM_FIELDS if f != "mapping_table"]
+
 @app.get("/api/isomorphisms")
-def list_isomorphisms(db: Session = Depends(database.get_db)):
-    return db.query(models.Isomorphism).all()
+def list_isomorphisms(
+    status: Optional[str] = None,
+    slug: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    created_after: Optional[datetime.datetime] = None,
+    created_before: Optional[datetime.datetime] = None,
+    fields: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Lists isomorphisms in id order with keyset pagination: pass the returned
+    next_cursor as after_id to fetch the following page.
+    `slug` matches either side of the mapping. `fields` is a comma-separated
+    projection (id is always included); mapping_table is left out by default.
+    """
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in ISOMORPHISM_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        selected = ["id"] + [f for f in selected if f != "id"]
+    else:
+        selected = ISOMORPHISM_DEFAULT_FIELDS
+    limit = max(1, min(limit, 500))
+
+    Iso = models.Isomorphism
+    query = db.query(*[getattr(Iso, f) for f in selected])
+    if status:
+        query = query.filter(Iso.status == status)
+    if slug:
+        query = query.filter(or_(Iso.article_a_slug == slug, Iso.article_b_slug == slug))
+    if min_confidence is not None:
+        query = query.filter(Iso.confidence_score >= min_confidence)
+    if created_after:
+        query = query.filter(Iso.created_at >= created_after)
+    if created_before:
+        query = query.filter(Iso.created_at < created_before)
+    if after_id is not None:
+        query = query.filter(Iso.id > after_id)
+
+    # One extra row tells us whether another page exists without a COUNT(*)
+    rows = query.order_by(Iso.id.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = [dict(row._mapping) for row in rows[:limit]]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if has_more else None
+    }
 
 @app.get("/api/isomorphisms/{iso_id}")
 def get_isomorphism(iso_id: int, db: Session = Depends(database.get_db)):
@@ -1235,6 +1494,48 @@ def get_isomorphism(iso_id: int, db: Session = Depends(database.get_db)):
         raise HTTPException(status_code=404, detail="Isomorphism not found")
     return iso
 
+@app.get("/api/analogs/{slug}")
+def get_analogs(slug: str, db: Session = Depends(database.get_db)):
+    """
+    All structural analogs of an article: the other members of its analog class
+    (articles reachable through verified isomorphisms), nearest first.
+    """
+    if not db.query(models.Article).filter(models.Article.slug == slug).first():
+        raise HTTPException(status_code=404, detail="Article not found")
+    rows = isomorphism_index.analogs(db, slug)
+    return {
+        "slug": slug,
+        "class_root": isomorphism_index.find(db, slug),
+        "analogs": [{
+            "slug": r.target_slug,
+            "hops": r.hops,
+            "path": json.loads(r.path)
+        } for r in rows]
+    }
+
+@app.get("/api/analogs/{slug}/mapping/{target_slug}")
+def get_analog_mapping(slug: str, target_slug: str, node: Optional[str] = None, db: Session = Depends(database.get_db)):
+    """
+    Node mapping from one article into an analog, composed along the shortest verified
+    path. With `node`, returns only where that node lands (null if the path drops it).
+    """
+    row = isomorphism_index.lookup(db, slug, target_slug)
+    if not row:
+        raise HTTPException(status_code=404, detail=f"{slug} and {target_slug} are not in the same analog class")
+    mapping = json.loads(row.mapping)
+    result = {
+        "source": slug,
+        "target": target_slug,
+        "hops": row.hops,
+        "path": json.loads(row.path)
+    }
+    if node is not None:
+        result["node"] = node
+        result["maps_to"] = mapping.get(node)
+    else:
+        result["mapping"] = mapping
+    return result
+
 class TaskVoteRequest(BaseModel):
     agent_id: str
     task_id: str
@@ -1266,46 +1567,68 @@ def get_governance_status(db: Session = Depends(database.get_db)):
         },
         "active_tasks": len([t for t in tasks if t.status == "active"]),
         "proposed_tasks": len([t for t in tasks if t.status == "proposed"]),
-        "review_queue": len([a for a in articles if a.status == "needs-review"])
+        "review_queue": len([a for a in articles if a.status == "needs-review"]),
+        "stale_queue": db.query(models.StaleLink.source_slug).distinct().count()
     }
 
+@app.get("/api/review/stale")
+def get_stale_review_queue(
+    after_slug: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Live articles that link to something changed since they were last saved, with the
+    changed targets. Entries are added by sync_article as targets change and removed when
+    the linking article is synced again, so no audit scan is needed.
+    """
+    limit = max(1, min(limit, 1000))
+    query = db.query(models.Article.slug, models.Article.title, models.Article.domain).join(
+        models.StaleLink, models.StaleLink.source_slug == models.Article.slug
+    ).filter(or_(models.Article.is_archived == False, models.Article.is_archived.is_(None)))
+    if after_slug:
+        query = query.filter(models.Article.slug > after_slug)
+    sources = query.distinct().order_by(models.Article.slug).limit(limit + 1).all()
+    page = sources[:limit]
+
+    targets = {}
+    if page:
+        for mark in db.query(models.StaleLink).filter(
+            models.StaleLink.source_slug.in_([row.slug for row in page])
+        ).order_by(models.StaleLink.marked_at):
+            targets.setdefault(mark.source_slug, []).append({"slug": mark.target_slug, "marked_at": mark.marked_at})
+
+    items = [
+        {
+            "slug": row.slug,
+            "title": row.title,
+            "domain": row.domain,
+            "stale_since": targets[row.slug][0]["marked_at"],
+            "targets": targets[row.slug]
+        }
+        for row in page
+    ]
+    return {"items": items, "next_cursor": page[-1].slug if len(sources) > limit else None}
+
 @app.post("/api/governance/audit/backlinks")
 def audit_backlinks(db: Session = Depends(database.get_db)):
     """
-    Scans all articles for outdated or broken backlinks.
+    Finds outdated, broken and archived-target backlinks.
     Applies Sagacity penalties to authors of articles with broken/outdated links.
     """
-    articles = db.query(models.Article).filter(models.Article.is_archived == False).all()
-    article_map = {a.slug: a for a in articles}
-    
-    results = {"outdated": [], "broken": [], "archived": []}
+    # Links are indexed in article_links by sync_article, so this is one join rather than a content scan
+    results = knowledge_graph.link_issues(db)
     penalties = {} # agent_id -> count
 
-    for art in articles:
-        if not art.content:
-            continue
-            
-        # Extract Obsidian-style links [[slug]]
-        links = re.findall(r'\[\[([^\]|]+)(?:\|[^\]]+)?\]\]', art.content)
-        
-        has_issue = False
-        for link_text in links:
-            target_slug = slugify(link_text)
-            
-            if target_slug not in article_map:
-                results["broken"].append({"source": art.slug, "target": target_slug})
-                has_issue = True
-            else:
-                target = article_map[target_slug]
-                if target.is_archived:
-                    results["archived"].append({"source": art.slug, "target": target_slug})
-                    has_issue = True
-                elif target.updated_at > art.updated_at:
-                    results["outdated"].append({"source": art.slug, "target": target_slug})
-                    has_issue = True
-        
-        if has_issue and art.author_id:
-            penalties[art.author_id] = penalties.get(art.author_id, 0) + 1
+    # One violation per article with at least one bad link
+    offenders = {}
+    for issues in results.values():
+        for issue in issues:
+            author_id = issue.pop("author_id")
+            if author_id:
+                offenders[issue["source"]] = author_id
+    for agent_id in offenders.values():
+        penalties[agent_id] = penalties.get(agent_id, 0) + 1
             
     # Apply penalties (VOTING_SPEC 1.3: -0.05 per violation)
     for agent_id, count in penalties.items():
@@ -1435,14 +1758,185 @@ def submit_task(task_id: str, submission: TaskSubmission, db: Session = Depends(
 class TaskClaim(BaseModel):
     agent_id: str
 
-class ArticleUpdate(BaseModel):
-    slug: str
-    title: Optional[str] = None
-    content: Optional[str] = None
-    domain: Optional[str] = None
-    status: Optional[str] = None
-    is_archived: Optional[bool] = None
-    relational_map: Optional[Dict] = None
+ARTICLE_FIELDS = [c.name for c in models.Article.__table__.columns]
+# content and relational_map are the heavy columns; only returned when asked for via fields=
+ARTICLE_DEFAULT_FIELDS = [f for f in ARTICLE_FIELDS if f not in ("content", "relational_map")]
+
+def json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+@app.get("/api/articles")
+def list_articles_page(
+    request: Request,
+    domain: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+    after_slug: Optional[str] = None,
+    limit: Optional[int] = None,
+    format: Optional[str] = None,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Lists articles in slug order with keyset pagination: pass next_cursor back as after_slug.
+    `fields` is a comma-separated projection (slug is always included); content and
+    relational_map are left out by default.
+    With format=ndjson (or Accept: application/x-ndjson) every matching row is streamed,
+    one JSON object per line, from a server-side cursor; `limit` is then optional.
+    """
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in ARTICLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        selected = ["slug"] + [f for f in selected if f != "slug"]
+    else:
+        selected = ARTICLE_DEFAULT_FIELDS
+
+    def build_query(session: Session):
+        query = session.query(*[getattr(models.Article, f) for f in selected])
+        if domain:
+            query = query.filter(models.Article.domain == domain)
+        if status:
+            query = query.filter(models.Article.status == status)
+        if after_slug is not None:
+            query = query.filter(models.Article.slug > after_slug)
+        return query.order_by(models.Article.slug.asc())
+
+    streaming = format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+    if streaming:
+        def rows():
+            # The request's session is closed before a streamed body is sent, so the export owns its own
+            session = database.SessionLocal()
+            try:
+                query = build_query(session).execution_options(stream_results=True, yield_per=1000)
+                if limit:
+                    query = query.limit(limit)
+                # Lines go out in blocks: one thread hop per block instead of per row
+                block = []
+                for row in query:
+                    block.append(json.dumps(dict(row._mapping), default=json_default))
+                    if len(block) >= 500:
+                        yield "\n".join(block) + "\n"
+                        block = []
+                if block:
+                    yield "\n".join(block) + "\n"
+            finally:
+                session.close()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    limit = max(1, min(limit or 50, 500))
+    # One extra row tells us whether another page exists without a COUNT(*)
+    rows = build_query(db).limit(limit + 1).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["slug"] if len(rows) > limit else None
+    }
+
+@app.get("/api/articles/search")
+def search_articles(q: str, limit: int = 20, cursor: Optional[str] = None, db: Session = Depends(database.get_db)):
+    """
+    Full-text search over article titles and content, served by the database's own index
+    (Postgres tsvector/GIN or SQLite FTS5). Results are ranked with highlighted snippets;
+    pass next_cursor back as `cursor` for the following page.
+    """
+    if not article_sync.fulltext_enabled:
+        raise HTTPException(status_code=503, detail="Full-text index is not available on this database")
+    limit = max(1, min(limit, 100))
+    try:
+        items, next_cursor = fulltext.search(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/api/articles/{slug}/backlinks")
+def get_article_backlinks(
+    slug: str,
+    after_slug: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(database.get_db)
+):
+    """
+    What links here: live articles whose content links to `slug`, with the anchor text used.
+    Answered from article_links; works for slugs that do not exist yet (wanted pages).
+    """
+    limit = max(1, min(limit, 1000))
+    query = db.query(models.Article.slug, models.Article.title, models.Article.domain).join(
+        models.ArticleLink, models.ArticleLink.source_slug == models.Article.slug
+    ).filter(
+        models.ArticleLink.target_slug == slug,
+        or_(models.Article.is_archived == False, models.Article.is_archived.is_(None))
+    )
+    if after_slug:
+        query = query.filter(models.Article.slug > after_slug)
+    sources = query.distinct().order_by(models.Article.slug).limit(limit + 1).all()
+    page = sources[:limit]
+
+    anchors = {}
+    if page:
+        for source_slug, anchor in db.query(models.ArticleLink.source_slug, models.ArticleLink.anchor).filter(
+            models.ArticleLink.target_slug == slug,
+            models.ArticleLink.source_slug.in_([row.slug for row in page])
+        ).order_by(models.ArticleLink.id):
+            anchors.setdefault(source_slug, []).append(anchor)
+
+    items = [
+        {"slug": row.slug, "title": row.title, "domain": row.domain, "anchors": anchors.get(row.slug, [])}
+        for row in page
+    ]
+    return {"slug": slug, "items": items, "next_cursor": page[-1].slug if len(sources) > limit else None}
+
+@app.get("/api/articles/{slug}/revisions")
+def list_article_revisions(
+    slug: str,
+    before: Optional[int] = None,
+    limit: int = 50,
+    db: Session = Depends(database.get_db)
+):
+    """Revision metadata, newest first; page with before=<next_cursor>."""
+    limit = max(1, min(limit, 500))
+    query = db.query(
+        models.ArticleRevision.number, models.ArticleRevision.kind, models.ArticleRevision.title,
+        models.ArticleRevision.size, func.length(models.ArticleRevision.data).label("stored_bytes"),
+        models.ArticleRevision.content_hash, models.ArticleRevision.created_at
+    ).filter(models.ArticleRevision.slug == slug)
+    if before:
+        query = query.filter(models.ArticleRevision.number < before)
+    rows = query.order_by(models.ArticleRevision.number.desc()).limit(limit + 1).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    return {"slug": slug, "items": items, "next_cursor": items[-1]["number"] if len(rows) > limit else None}
+
+@app.get("/api/articles/{slug}/revisions/{number}")
+def get_article_revision(slug: str, number: int, db: Session = Depends(database.get_db)):
+    revision = db.query(models.ArticleRevision).filter(
+        models.ArticleRevision.slug == slug, models.ArticleRevision.number == number
+    ).first()
+    if not revision:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {
+        "slug": slug,
+        "number": number,
+        "title": revision.title,
+        "created_at": revision.created_at,
+        "content": revisions.contents(db, slug, [number])[number]
+    }
+
+@app.get("/api/articles/{slug}/diff")
+def diff_article_revisions(
+    slug: str,
+    old: int = Query(..., alias="from"),
+    new: int = Query(..., alias="to"),
+    context: int = 3,
+    db: Session = Depends(database.get_db)
+):
+    """Unified diff between two revisions, rebuilt from one read of the delta chain."""
+    result = revisions.diff(db, slug, old, new, context=max(0, min(context, 50)))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    text_diff, stats = result
+    return {"slug": slug, "from": old, "to": new, **stats, "diff": text_diff}
 
 @app.get("/api/articles/{slug}")
 def get_article(slug: str, db: Session = Depends(database.get_db)):
@@ -1473,56 +1967,570 @@ def get_article(slug: str, db: Session = Depends(database.get_db)):
 def list_articles(db: Session = Depends(database.get_db)):
     return db.query(models.Article).all()
 
+def update_vector_domains(db: Session):
+    """
+    Rewrites the domain payload of vectors whose article changed domain in the transaction
+    just committed. A failed update is not lost: the domain change queued the vector for
+    re-discovery, and the discovery scan rewrites payloads that disagree with article_vectors.
+    """
+    for slug, domain in db.info.pop("moved_vector_domains", {}).items():
+        try:
+            # sync runs in the threadpool; hop back onto the event loop for the async client
+            anyio.from_thread.run(get_engine().set_domain, slug, domain)
+        except Exception as e:
+            print(f"Could not update vector domain for {slug}, discovery will retry: {e!r}")
+
 @app.post("/articles/{slug}/sync")
-def sync_article(slug: str, article: ArticleUpdate, db: Session = Depends(database.get_db)):
+def sync_article(slug: str, article: article_sync.ArticleUpdate, db: Session = Depends(database.get_db)):
     db_article = db.query(models.Article).filter(models.Article.slug == slug).first()
-    if not db_article:
-        db_article = models.Article(slug=slug, title=article.title or slug)
-        db.add(db_article)
-    
-    if article.title:
-        db_article.title = article.title
-    if article.content:
-        db_article.content = article.content
-    if article.domain:
-        db_article.domain = article.domain
-    if article.status:
-        db_article.status = article.status
-    if article.is_archived is not None:
-        db_article.is_archived = article.is_archived
-        if article.is_archived:
-            db_article.status = "archived"
-        else:
-            db_article.status = "active"
-    if article.relational_map:
-        db_article.relational_map = json.dumps(article.relational_map)
-            
+    db_article = article_sync.apply_article_update(slug, article, db_article, db)
     db.commit()
+    update_vector_domains(db)
+    article_sync.refresh_lexical_entry(lexical.value, db_article)
     return db_article
 
+ARTICLE_SYNC_BATCH_MAX = 1000
+
+class ArticleSyncRecord(article_sync.ArticleUpdate):
+    # sha256 hex of content as the client has it; lets unchanged articles be skipped, and
+    # lets content be left out entirely when the server already has it
+    content_hash: Optional[str] = None
+
+class ArticleSyncBatch(BaseModel):
+    articles: List[ArticleSyncRecord]
+
+def article_sync_unchanged(record: ArticleSyncRecord, db_article: models.Article) -> bool:
+    """True when applying the record would not change the stored article."""
+    if record.content is not None:
+        if models.hash_content(record.content) != db_article.content_hash:
+            return False
+    elif record.content_hash and record.content_hash != db_article.content_hash:
+        return False
+    if record.title and record.title != db_article.title:
+        return False
+    if record.domain and record.domain != db_article.domain:
+        return False
+    if record.is_archived is not None and record.is_archived != bool(db_article.is_archived):
+        return False
+    # Same precedence as apply_article_update: is_archived decides the status when given
+    status = ("archived" if record.is_archived else "active") if record.is_archived is not None else record.status
+    if status and status != db_article.status:
+        return False
+    if record.relational_map and json.dumps(record.relational_map) != db_article.relational_map:
+        return False
+    return True
+
+@app.post("/articles/sync/batch")
+def sync_articles_batch(batch: ArticleSyncBatch, db: Session = Depends(database.get_db)):
+    """
+    Syncs many articles in one transaction. Each record is compared with the stored row,
+    by content hash for the content, and skipped when nothing would change. A record whose
+    content_hash differs from the server's but carries no content comes back as
+    needs_content, so a client can send hashes first and content only for what changed.
+    """
+    if len(batch.articles) > ARTICLE_SYNC_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {ARTICLE_SYNC_BATCH_MAX} articles per batch")
+
+    slugs = [record.slug for record in batch.articles]
+    if len(set(slugs)) != len(slugs):
+        raise HTTPException(status_code=400, detail="Duplicate slugs in batch")
+    existing = {a.slug: a for a in db.query(models.Article).filter(models.Article.slug.in_(slugs)).all()}
+
+    results = []
+    written = []
+    for record in batch.articles:
+        db_article = existing.get(record.slug)
+        if record.content is not None and record.content_hash and models.hash_content(record.content) != record.content_hash:
+            results.append({"slug": record.slug, "status": "error", "detail": "content_hash does not match content"})
+            continue
+        if db_article is not None and article_sync_unchanged(record, db_article):
+            results.append({"slug": record.slug, "status": "unchanged"})
+            continue
+        if record.content is None and record.content_hash and (db_article is None or record.content_hash != db_article.content_hash):
+            results.append({"slug": record.slug, "status": "needs_content"})
+            continue
+        written.append(article_sync.apply_article_update(record.slug, record, db_article, db))
+        results.append({"slug": record.slug, "status": "updated" if db_article is not None else "created"})
+
+    if written:
+        db.commit()
+        update_vector_domains(db)
+        for db_article in written:
+            article_sync.refresh_lexical_entry(lexical.value, db_article)
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"status": "ok", "counts": counts, "results": results}
+
 @app.post("/isomorphisms/search")
 async def search_candidates(query: SearchQuery):
-    results = await engine.find_candidates(query.vector, threshold=query.threshold)
+    try:
+        results = await get_engine().find_candidates(
+            query.vector,
+            threshold=query.threshold,
+            domain=query.domain,
+            exclude_domain=query.exclude_domain
+        )
+    except isomorphism.vector_store.ProjectionNotFitted as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Vector search timed out")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return results
 
+# Candidates pulled from each ranker before fusion, and the RRF damping constant
+HYBRID_SEARCH_DEPTH = 50
+HYBRID_RRF_K = 60
+# Query-to-article similarity below this is noise, not a match; queries are short, so it sits well under DISCOVERY_SIMILARITY_FLOOR
+HYBRID_VECTOR_FLOOR = float(os.getenv("HYBRID_VECTOR_FLOOR", "0.25"))
+LEXICAL_REFRESH_S = float(os.getenv("LEXICAL_REFRESH_S", "5"))
+
+query_embeddings: Optional[embeddings.EmbeddingCache] = None
+
+def refresh_lexical_index(index: lexical_index.BM25Index, db: Session):
+    """Reloads articles changed since the index watermark, at most every LEXICAL_REFRESH_S."""
+    if time.monotonic() - index.refreshed_at < LEXICAL_REFRESH_S:
+        return
+    query = db.query(models.Article)
+    if index.watermark:
+        query = query.filter(models.Article.updated_at >= index.watermark)
+    index.load(query.all())
+    index.refreshed_at = time.monotonic()
+
+async def embed_query(text: str) -> List[float]:
+    global query_embeddings
+    if query_embeddings is None:
+        query_embeddings = embeddings.EmbeddingCache(get_embedder(), max_entries=10_000)
+    return (await asyncio.to_thread(query_embeddings.embed, [text]))[0].tolist()
+
+def embedder_indexed(embedder: str, db: Session) -> bool:
+    return db.query(models.ArticleVector.slug).filter(models.ArticleVector.embedder == embedder).first() is not None
+
+@app.get("/api/search")
+async def hybrid_search(
+    q: str,
+    limit: int = 10,
+    mode: str = "hybrid",
+    domain: Optional[str] = None,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Article search by keyword and meaning. BM25 over titles and content is fused with
+    vector similarity from the isomorphism engine (query embedded server-side) by
+    reciprocal rank. Only vectors indexed by the same embedder are compared with the
+    query; client vectors live in another embedding space. mode=lexical skips embedding
+    and the vector store; in hybrid mode an unavailable side is reported under
+    `degraded` instead of failing the request.
+    """
+    if mode not in ("hybrid", "lexical", "vector"):
+        raise HTTPException(status_code=400, detail="mode must be hybrid, lexical or vector")
+    limit = max(1, min(limit, 100))
+    depth = max(limit, HYBRID_SEARCH_DEPTH)
+    started = time.perf_counter()
+
+    rankings: Dict[str, List[str]] = {}
+    lexical_scores: Dict[str, float] = {}
+    vector_scores: Dict[str, float] = {}
+    degraded: Dict[str, str] = {}
+
+    if mode != "vector":
+        try:
+            index = lexical.get(start=not lexical.background)
+        except SubsystemUnavailable as e:
+            if mode == "lexical":
+                raise HTTPException(status_code=503, detail=str(e))
+            degraded["lexical"] = str(e)
+        else:
+            await run_in_threadpool(refresh_lexical_index, index, db)
+            hits = index.search(q, limit=depth, domain=domain)
+            rankings["lexical"] = [slug for slug, _ in hits]
+            lexical_scores = dict(hits)
+
+    if mode != "lexical":
+        try:
+            embedder = get_embedder().name
+            vector = await embed_query(q)
+            hits = await get_engine().find_candidates(vector, threshold=HYBRID_VECTOR_FLOOR, limit=depth, domain=domain, embedder=embedder)
+            if not hits and not await run_in_threadpool(embedder_indexed, embedder, db):
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"No vectors indexed with embedder {embedder}; index articles via /isomorphisms/index/content"
+                )
+            rankings["vector"] = [h.payload["slug"] for h in hits if h.payload.get("slug")]
+            vector_scores = {h.payload["slug"]: h.score for h in hits if h.payload.get("slug")}
+        except HTTPException as e:
+            if mode == "vector":
+                raise
+            degraded["vector"] = e.detail
+        except (asyncio.TimeoutError, isomorphism.vector_store.ProjectionNotFitted, httpx.HTTPError, ValueError) as e:
+            if mode == "vector":
+                status = 504 if isinstance(e, asyncio.TimeoutError) else 409 if isinstance(e, isomorphism.vector_store.ProjectionNotFitted) else 502
+                raise HTTPException(status_code=status, detail=f"Vector search failed: {e or type(e).__name__}")
+            degraded["vector"] = f"{type(e).__name__}: {e}"
+
+    fused = lexical_index.reciprocal_rank_fusion(rankings, k=HYBRID_RRF_K)[:limit]
+
+    # Vector-only hits are not necessarily in this worker's keyword index
+    titles = {slug: lexical.value.meta(slug) for slug, _, _ in fused} if lexical.ready else {}
+    unknown = [slug for slug, _, _ in fused if not titles.get(slug)]
+    if unknown:
+        rows = await run_in_threadpool(
+            lambda: db.query(models.Article.slug, models.Article.title, models.Article.domain).filter(models.Article.slug.in_(unknown)).all()
+        )
+        for a in rows:
+            titles[a.slug] = {"title": a.title, "domain": a.domain}
+
+    return {
+        "query": q,
+        "mode": mode,
+        "results": [{
+            "slug": slug,
+            "title": titles.get(slug, {}).get("title"),
+            "domain": titles.get(slug, {}).get("domain"),
+            "score": round(score, 6),
+            "lexical_rank": ranks.get("lexical"),
+            "lexical_score": round(lexical_scores[slug], 4) if slug in lexical_scores else None,
+            "vector_rank": ranks.get("vector"),
+            "vector_similarity": vector_scores.get(slug)
+        } for slug, score, ranks in fused],
+        "degraded": degraded or None,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
 class ArticleIndex(BaseModel):
     slug: str
     vector: List[float]
     metadata: dict = {}
 
+def vector_domains(records: List[ArticleIndex], db: Session) -> List[str]:
+    """Explicit metadata wins, otherwise the domain falls back to the article record."""
+    article_domains = {slug: domain for slug, domain in db.query(models.Article.slug, models.Article.domain).filter(
+        models.Article.slug.in_([r.slug for r in records])
+    ).all()}
+    return [r.metadata.get("domain") or article_domains.get(r.slug) or "General" for r in records]
+
+def record_vector_versions(records: List[ArticleIndex], domains: List[str], versions: List[str], embedder: Optional[str], db: Session):
+    """Records the vector version so incremental discovery only re-searches what moved."""
+    existing = {v.slug: v for v in db.query(models.ArticleVector).filter(
+        models.ArticleVector.slug.in_([r.slug for r in records])
+    ).all()}
+    now = datetime.datetime.utcnow()
+    for r, domain, version in zip(records, domains, versions):
+        db_vector = existing.get(r.slug)
+        if not db_vector:
+            db_vector = models.ArticleVector(slug=r.slug)
+            db.add(db_vector)
+            existing[r.slug] = db_vector
+        if db_vector.version != version or db_vector.domain != domain:
+            db_vector.version = version
+            db_vector.domain = domain
+            db_vector.indexed_at = now
+        db_vector.embedder = embedder
+    db.commit()
+
+async def index_vectors(records: List[ArticleIndex], db: Session, embedder: Optional[str] = None) -> List[Dict]:
+    """
+    Upserts a batch of article vectors and records their versions for incremental discovery.
+    Domain is stored as an indexed payload field so discovery can filter inside the vector engine.
+    `embedder` names the server embedder that produced the vectors (None for client vectors,
+    overriding any claim in their metadata); hybrid search filters on it.
+    Database work runs in the threadpool; only the vector store call is awaited on the loop.
+    Raises ProjectionNotFitted / ValueError from the engine untouched.
+    """
+    engine = get_engine()
+    domains = await run_in_threadpool(vector_domains, records, db)
+
+    await engine.upsert_many([
+        (r.slug, r.vector, {**r.metadata, "domain": domain, "embedder": embedder}) for r, domain in zip(records, domains)
+    ])
+
+    versions = [engine.vector_version(r.vector) for r in records]
+    await run_in_threadpool(record_vector_versions, records, domains, versions, embedder, db)
+    return [
+        {"slug": r.slug, "domain": domain, "version": version}
+        for r, domain, version in zip(records, domains, versions)
+    ]
+
 @app.post("/isomorphisms/index")
-async def index_article(article: ArticleIndex):
-    engine.client.upsert(
-        collection_name=engine.collection_name,
-        points=[
-            isomorphism.PointStruct(
-                id=hashlib.md5(article.slug.encode()).hexdigest(),
-                vector=article.vector,
-                payload={"slug": article.slug, **article.metadata}
-            )
-        ]
+async def index_article(article: ArticleIndex, db: Session = Depends(database.get_db)):
+    try:
+        result = (await index_vectors([article], db))[0]
+    except isomorphism.vector_store.ProjectionNotFitted as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Vector upsert timed out")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "indexed", **result}
+
+class ContentIndex(BaseModel):
+    slug: str
+    content: Optional[str] = None # Defaults to the stored article's title and content
+    metadata: dict = {}
+
+class ContentIndexRequest(BaseModel):
+    articles: List[ContentIndex]
+    force: bool = False # Upsert even unchanged vectors, e.g. after restoring the vector store
+
+def cached_embeddings(keys: List[str], db: Session) -> Dict[str, bytes]:
+    return {row.cache_key: row.vector for row in db.query(models.EmbeddingCacheEntry).filter(
+        models.EmbeddingCacheEntry.cache_key.in_(set(keys))
+    ).all()}
+
+def cache_embeddings(embedder: str, vectors: Dict[str, bytes], db: Session):
+    """
+    Stores fresh embeddings. A concurrent request that missed on the same text may have
+    stored them first; its rows hold the same vectors, so only the keys still missing are added.
+    """
+    for key, vector in vectors.items():
+        db.add(models.EmbeddingCacheEntry(cache_key=key, embedder=embedder, vector=vector))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stored = cached_embeddings(list(vectors), db)
+        for key, vector in vectors.items():
+            if key not in stored:
+                db.add(models.EmbeddingCacheEntry(cache_key=key, embedder=embedder, vector=vector))
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            print(f"Could not cache embeddings: {e}")
+
+def unchanged_vectors(records: List[ArticleIndex], versions: List[str], embedder: str, db: Session) -> Dict[str, Dict]:
+    """
+    Records whose vector, domain and embedder match what was last indexed, keyed by slug. Records
+    carrying metadata beyond the domain always count as changed, since the stored
+    payload is not compared.
+    """
+    domains = vector_domains(records, db)
+    existing = {v.slug: v for v in db.query(models.ArticleVector).filter(
+        models.ArticleVector.slug.in_([r.slug for r in records])
+    ).all()}
+    unchanged = {}
+    for r, domain, version in zip(records, domains, versions):
+        db_vector = existing.get(r.slug)
+        if db_vector and db_vector.version == version and db_vector.domain == domain \
+                and db_vector.embedder == embedder and set(r.metadata) <= {"domain"}:
+            unchanged[r.slug] = {"slug": r.slug, "domain": domain, "version": version}
+    return unchanged
+
+async def embed_contents(texts: List[str], db: Session):
+    """
+    Server-side embedding stage. Each text is looked up by content hash first; only
+    misses reach the embedding backend (as one batch) and are cached for next time.
+    Returns (vectors, cache hits).
+    """
+    backend = get_embedder()
+    keys = [f"{backend.name}:{embeddings.content_hash(text)}" for text in texts]
+    cached = await run_in_threadpool(cached_embeddings, keys, db)
+    hits = sum(1 for key in keys if key in cached)
+
+    missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+    if missing:
+        vectors = await backend.aembed(list(missing.values()))
+        fresh = {key: embeddings.to_bytes(vector) for key, vector in zip(missing, vectors)}
+        await run_in_threadpool(cache_embeddings, backend.name, fresh, db)
+        cached.update(fresh)
+    return [embeddings.from_bytes(cached[key]) for key in keys], hits
+
+@app.post("/isomorphisms/index/content")
+async def index_article_content(req: ContentIndexRequest, db: Session = Depends(database.get_db)):
+    """
+    Indexes articles from their text instead of client-computed vectors. Unchanged
+    content costs a hash lookup; only new or edited text is sent to EMBEDDING_BACKEND,
+    and vectors whose version and domain are already indexed are not upserted again.
+    """
+    stored_slugs = [a.slug for a in req.articles if a.content is None]
+    stored = await run_in_threadpool(
+        lambda: {a.slug: a for a in db.query(models.Article).filter(models.Article.slug.in_(stored_slugs)).all()}
     )
-    return {"status": "indexed", "slug": article.slug}
+    not_found = [slug for slug in stored_slugs if slug not in stored]
+    if not_found:
+        raise HTTPException(status_code=404, detail=f"Articles not found: {', '.join(not_found)}")
+    texts = [
+        a.content if a.content is not None else f"{stored[a.slug].title}\n\n{stored[a.slug].content or ''}"
+        for a in req.articles
+    ]
+
+    try:
+        vectors, hits = await embed_contents(texts, db)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Embedding backend error: {e}")
+
+    embedder = get_embedder().name
+    records = [ArticleIndex(slug=a.slug, vector=vector, metadata=a.metadata) for a, vector in zip(req.articles, vectors)]
+    unchanged = {}
+    if records and not req.force:
+        versions = [get_engine().vector_version(r.vector) for r in records]
+        unchanged = await run_in_threadpool(unchanged_vectors, records, versions, embedder, db)
+    changed = [r for r in records if r.slug not in unchanged]
+    try:
+        indexed = {r["slug"]: r for r in await index_vectors(changed, db, embedder=embedder)} if changed else {}
+    except isomorphism.vector_store.ProjectionNotFitted as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Vector upsert timed out")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = [indexed.get(r.slug) or unchanged[r.slug] for r in records]
+    return {
+        "status": "indexed",
+        "indexed": len(results),
+        "upserted": len(changed),
+        "unchanged": len(unchanged),
+        "embedder": embedder,
+        "cache_hits": hits,
+        "embedded": len(texts) - hits,
+        "results": results
+    }
+
+# Binary bulk format (Content-Type: application/octet-stream), all integers little-endian:
+#   header:  b"MPV1" | uint32 dim
+#   record:  uint16 slug_len | slug (utf-8) | uint32 meta_len | metadata JSON (utf-8, may be empty) | dim x float32
+BULK_MAGIC = b"MPV1"
+
+async def read_ndjson_records(stream):
+    """Yields (record_no, ArticleIndex | error str) from an NDJSON body without buffering it whole."""
+    buffer = b""
+    record_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            record_no += 1
+            try:
+                yield record_no, ArticleIndex(**json.loads(line))
+            except Exception as e:
+                yield record_no, f"invalid record: {e}"
+    if buffer.strip():
+        record_no += 1
+        try:
+            yield record_no, ArticleIndex(**json.loads(buffer))
+        except Exception as e:
+            yield record_no, f"invalid record: {e}"
+
+async def read_binary_records(stream):
+    """Yields (record_no, ArticleIndex) from the MPV1 binary format; raises ValueError on framing errors."""
+    buffer = bytearray()
+    dim = None
+    record_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        if dim is None:
+            if len(buffer) < 8:
+                continue
+            if bytes(buffer[:4]) != BULK_MAGIC:
+                raise ValueError("Binary payload must start with the MPV1 header")
+            dim = struct.unpack_from("<I", buffer, 4)[0]
+            del buffer[:8]
+        while True:
+            if len(buffer) < 2:
+                break
+            slug_len = struct.unpack_from("<H", buffer, 0)[0]
+            if len(buffer) < 2 + slug_len + 4:
+                break
+            meta_len = struct.unpack_from("<I", buffer, 2 + slug_len)[0]
+            size = 2 + slug_len + 4 + meta_len + dim * 4
+            if len(buffer) < size:
+                break
+            slug = bytes(buffer[2:2 + slug_len]).decode()
+            meta_start = 2 + slug_len + 4
+            metadata = json.loads(bytes(buffer[meta_start:meta_start + meta_len])) if meta_len else {}
+            vector = list(struct.unpack_from(f"<{dim}f", buffer, meta_start + meta_len))
+            del buffer[:size]
+            record_no += 1
+            yield record_no, ArticleIndex(slug=slug, vector=vector, metadata=metadata)
+    if dim is None or buffer:
+        raise ValueError("Truncated binary payload")
+
+@app.post("/isomorphisms/index/batch")
+async def index_articles_batch(request: Request, batch_size: int = 256, db: Session = Depends(database.get_db)):
+    """
+    Bulk (re)indexing: streams NDJSON (application/x-ndjson, one ArticleIndex per line) or the
+    MPV1 binary format (application/octet-stream) and upserts in batches of `batch_size`.
+    The body is read only as fast as batches are written, so a slow vector store pushes
+    back on the client instead of the request piling up in memory.
+    """
+    batch_size = max(1, min(batch_size, 4096))
+    content_type = request.headers.get("content-type", "")
+    reader = read_binary_records if "octet-stream" in content_type else read_ndjson_records
+    expected_dim = get_engine().input_dim
+
+    started = time.perf_counter()
+    indexed = 0
+    failed = 0
+    batches = 0
+    errors = []
+    batch: List[ArticleIndex] = []
+
+    async def flush():
+        nonlocal indexed, failed, batches
+        try:
+            await index_vectors(batch, db)
+            indexed += len(batch)
+        except isomorphism.vector_store.ProjectionNotFitted as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            failed += len(batch)
+            errors.append({"batch": batches, "error": str(e)})
+        except asyncio.TimeoutError:
+            failed += len(batch)
+            errors.append({"batch": batches, "error": f"upsert of {len(batch)} records timed out"})
+        batches += 1
+        batch.clear()
+
+    try:
+        async for record_no, record in reader(request.stream()):
+            if isinstance(record, str):
+                failed += 1
+                errors.append({"record": record_no, "error": record})
+                continue
+            if len(record.vector) != expected_dim:
+                failed += 1
+                errors.append({"record": record_no, "slug": record.slug, "error": f"expected {expected_dim} dims, got {len(record.vector)}"})
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                await flush()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{e} (after {indexed} records indexed)")
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "status": "indexed",
+        "indexed": indexed,
+        "failed": failed,
+        "errors": errors[:50],
+        "batches": batches,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(indexed / elapsed, 1) if elapsed > 0 else None
+    }
+
+class ProjectionSample(BaseModel):
+    vectors: List[List[float]]
+
+@app.post("/isomorphisms/projection/fit")
+def fit_vector_projection(sample: ProjectionSample):
+    """
+    Fits the PCA projection for a VECTOR_REDUCTION=pca:<dim> collection from a
+    sample of full-dimension embeddings (at least <dim> of them).
+    """
+    engine = get_engine()
+    try:
+        fitted_on = engine.fit_projection(sample.vectors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "fitted", "collection": engine.collection_name, "sample_size": fitted_on}
 
 @app.post("/tasks/{task_id}/claim")
 def claim_task(task_id: str, claim: TaskClaim, db: Session = Depends(database.get_db)):
@@ -1565,65 +2573,254 @@ def claim_task(task_id: str, claim: TaskClaim, db: Session = Depends(database.ge
     
     return {"status": "success", "message": f"Task claimed by {claim.agent_id}"}
 
-@app.get("/isomorphisms/discovery")
-async def discover_mappings(db: Session = Depends(database.get_db)):
+# ISOMORPHISM_SPEC 3.1: candidates below this similarity are never persisted
+DISCOVERY_SIMILARITY_FLOOR = float(os.getenv("DISCOVERY_SIMILARITY_FLOOR", "0.75"))
+# An open run older than this is taken to have crashed and no longer blocks new runs
+DISCOVERY_RUN_TIMEOUT_S = float(os.getenv("DISCOVERY_RUN_TIMEOUT_S", "3600"))
+
+class DiscoveryInProgress(RuntimeError):
+    pass
+
+class DiscoveryFailed(RuntimeError):
+    pass
+
+def get_discovery_watermark(db: Session) -> Optional[datetime.datetime]:
     """
-    Implements ISOMORPHISM_SPEC Section 3.1: Cosine similarity scan across domains.
-    Discovers potential mappings between articles in different domains.
+    Returns the start time of the last completed discovery run.
+    Vectors indexed after this point have not been searched yet.
     """
-    articles = db.query(models.Article).all()
-    if not articles:
-        return {"candidates": []}
-
-    candidates = []
-    processed_pairs = set()
+    last_run = db.query(models.DiscoveryRun).filter(
+        models.DiscoveryRun.finished_at.isnot(None)
+    ).order_by(models.DiscoveryRun.started_at.desc()).first()
+    return last_run.started_at if last_run else None
 
-    for art in articles:
-        # Fetch vector for this article
-        point_id = hashlib.md5(art.slug.encode()).hexdigest()
-        try:
-            # We need to get the vector from Qdrant to search with it
-            res = engine.client.retrieve(
-                collection_name=engine.collection_name,
-                ids=[point_id],
-                with_vectors=True
+def start_discovery_run(db: Session, full: bool):
+    """
+    Opens a DiscoveryRun and works out what it has to recompute; candidate rows are
+    left alone until finish_discovery_run replaces them. Raises DiscoveryInProgress
+    while an earlier run is still open: of two runs opened together, the first proceeds.
+    Returns (run, changed slugs, counterparts to re-search, article domains, vector versions, indexed domains).
+    """
+    run = models.DiscoveryRun(started_at=datetime.datetime.utcnow(), full_scan=full)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    abandoned = run.started_at - datetime.timedelta(seconds=DISCOVERY_RUN_TIMEOUT_S)
+    open_run = db.query(models.DiscoveryRun).filter(
+        models.DiscoveryRun.finished_at.is_(None),
+        models.DiscoveryRun.id < run.id,
+        models.DiscoveryRun.started_at > abandoned
+    ).first()
+    if open_run:
+        db.delete(run)
+        db.commit()
+        raise DiscoveryInProgress(f"Discovery run {open_run.id} is still running")
+
+    watermark = None if full else get_discovery_watermark(db)
+    article_domains = {slug: domain for slug, domain in db.query(models.Article.slug, models.Article.domain).all()}
+    vector_rows = db.query(models.ArticleVector.slug, models.ArticleVector.version, models.ArticleVector.domain).all()
+    vector_versions = {row.slug: row.version for row in vector_rows}
+    indexed_domains = {row.slug: row.domain for row in vector_rows if row.domain}
+
+    # Unchanged articles whose pairs with a changed article are replaced
+    counterparts = []
+    if watermark is None:
+        run.full_scan = True
+        slugs = list(article_domains.keys())
+    else:
+        slugs = [row.slug for row in db.query(models.ArticleVector.slug).filter(
+            models.ArticleVector.indexed_at > watermark
+        ).all()]
+        if slugs:
+            touching = db.query(models.IsomorphismCandidate).filter(
+                (models.IsomorphismCandidate.source_slug.in_(slugs)) |
+                (models.IsomorphismCandidate.target_slug.in_(slugs))
             )
-            if not res or not res[0].vector:
-                continue
-            
-            vector = res[0].vector
-            
-            # Search for similar articles
-            results = await engine.find_candidates(vector, threshold=0.75, limit=10)
-            
-            for hit in results:
-                target_slug = hit.payload.get("slug")
-                if target_slug == art.slug:
-                    continue
-                
-                # Check domain mismatch (isomorphisms are cross-domain)
-                target_art = db.query(models.Article).filter(models.Article.slug == target_slug).first()
-                if not target_art or target_art.domain == art.domain:
+            changed = set(slugs)
+            counterparts = sorted({
+                slug for pair in touching.with_entities(
+                    models.IsomorphismCandidate.source_slug, models.IsomorphismCandidate.target_slug
+                ).all() for slug in pair if slug not in changed
+            })
+    db.commit()
+    db.refresh(run)
+    return run, slugs, counterparts, article_domains, vector_versions, indexed_domains
+
+def finish_discovery_run(db: Session, run: models.DiscoveryRun, slugs: List[str], candidates: List[models.IsomorphismCandidate], scanned: int):
+    """Swaps the recomputed candidate rows in and moves the watermark, in one transaction."""
+    stale = db.query(models.IsomorphismCandidate)
+    if not run.full_scan:
+        stale = stale.filter(
+            (models.IsomorphismCandidate.source_slug.in_(slugs)) |
+            (models.IsomorphismCandidate.target_slug.in_(slugs))
+        )
+    stale.delete(synchronize_session=False)
+    db.add_all(candidates)
+    run.articles_scanned = scanned
+    run.candidates_found = len(candidates)
+    run.finished_at = datetime.datetime.utcnow()
+    db.commit()
+    db.refresh(run)
+
+def abandon_discovery_run(db: Session, run: models.DiscoveryRun):
+    """Drops a run that could not finish; the watermark and candidate rows stay as they were."""
+    db.rollback()
+    db.delete(run)
+    db.commit()
+
+async def run_discovery_scan(db: Session, full: bool = False) -> models.DiscoveryRun:
+    """
+    Incremental cosine similarity scan across domains (ISOMORPHISM_SPEC 3.1).
+    Only articles whose vectors changed since the watermark are re-searched; every
+    candidate row touching them is replaced. The unchanged end of each replaced row is
+    searched again too (keeping only hits on changed articles), so pairs it had found
+    survive even when the changed side's own top results miss them.
+    Without a watermark every article is scanned. Database work runs in the threadpool.
+    If any search fails nothing is replaced and the watermark stays put (DiscoveryFailed),
+    so the next run searches the same articles again.
+    """
+    engine = get_engine()
+    run, slugs, counterparts, article_domains, vector_versions, indexed_domains = await run_in_threadpool(start_discovery_run, db, full)
+
+    async def neighbours(slug: str):
+        # We need the stored vector to search with it
+        point = await engine.get_vector(slug)
+        if not point:
+            return None, []
+        source_domain = indexed_domains.get(slug) or point.payload.get("domain") or article_domains[slug]
+        if point.payload.get("domain") != source_domain:
+            # The payload update after a domain change failed; filters read the payload, so repair it
+            await engine.set_domain(slug, source_domain)
+        # Search for similar articles outside the source domain (isomorphisms are cross-domain)
+        results = await engine.find_candidates(
+            point.vector,
+            threshold=DISCOVERY_SIMILARITY_FLOOR,
+            limit=10,
+            exclude_domain=source_domain,
+            exclude_slug=slug,
+            projected=True
+        )
+        return source_domain, results
+
+    try:
+        changed = set(slugs)
+        scan = [slug for slug in slugs if slug in article_domains]
+        rescan = [slug for slug in counterparts if slug in article_domains]
+        processed_pairs = set()
+        candidates = []
+        failed = []
+        scanned = 0
+        # Searches overlap up to the backend's concurrency limit; results are applied in slug order
+        window = engine.backend.max_concurrency * 2
+        for start in range(0, len(scan) + len(rescan), window):
+            chunk = (scan + rescan)[start:start + window]
+            outcomes = await asyncio.gather(*(neighbours(slug) for slug in chunk), return_exceptions=True)
+            for slug, outcome in zip(chunk, outcomes):
+                if isinstance(outcome, BaseException):
+                    print(f"Error discovering mappings for {slug}: {outcome!r}")
+                    failed.append(slug)
                     continue
-                
-                # Ensure stable pair ID to avoid duplicates
-                pair = tuple(sorted([art.slug, target_slug]))
-                if pair in processed_pairs:
+                source_domain, results = outcome
+                if source_domain is None:
                     continue
-                
-                processed_pairs.add(pair)
-                candidates.append({
-                    "source": art.slug,
-                    "source_domain": art.domain,
-                    "target": target_slug,
-                    "target_domain": target_art.domain,
-                    "similarity": hit.score
-                })
-        except Exception as e:
-            print(f"Error discovering mappings for {art.slug}: {e}")
-            continue
+                version = vector_versions.get(slug)
+
+                for hit in results:
+                    target_slug = hit.payload.get("slug")
+                    if target_slug not in article_domains:
+                        continue
+                    # Rows between two unchanged articles were kept; only pairs with a changed one are new
+                    if slug not in changed and target_slug not in changed:
+                        continue
+                    # Points indexed before domain payloads existed, or with a stale one, slip through the filter
+                    target_domain = indexed_domains.get(target_slug) or hit.payload.get("domain") or article_domains[target_slug]
+                    if target_domain == source_domain:
+                        continue
+
+                    # Ensure stable pair ID to avoid duplicates
+                    pair = tuple(sorted([slug, target_slug]))
+                    if pair in processed_pairs:
+                        continue
+                    processed_pairs.add(pair)
+
+                    candidates.append(models.IsomorphismCandidate(
+                        source_slug=slug,
+                        target_slug=target_slug,
+                        source_domain=source_domain,
+                        target_domain=target_domain,
+                        similarity=hit.score,
+                        source_vector_version=version
+                    ))
+                scanned += 1
+
+        if failed:
+            raise DiscoveryFailed(f"Search failed for {len(failed)} articles: {', '.join(failed[:10])}")
+        await run_in_threadpool(finish_discovery_run, db, run, slugs, candidates, scanned)
+    except Exception:
+        await run_in_threadpool(abandon_discovery_run, db, run)
+        raise
+    return run
+
+@app.post("/isomorphisms/discovery/run")
+async def run_discovery(full: bool = False, db: Session = Depends(database.get_db)):
+    """
+    Refreshes the persisted candidate table. Incremental by default;
+    full=true rescans the whole corpus.
+    """
+    try:
+        run = await run_discovery_scan(db, full=full)
+    except DiscoveryInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except DiscoveryFailed as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {
+        "status": "discovery complete",
+        "run_id": run.id,
+        "full_scan": run.full_scan,
+        "articles_scanned": run.articles_scanned,
+        "candidates_found": run.candidates_found,
+        "watermark": run.started_at
+    }
 
-    return {"candidates": candidates}
+@app.get("/isomorphisms/discovery")
+def discover_mappings(
+    min_similarity: float = DISCOVERY_SIMILARITY_FLOOR,
+    limit: int = 50,
+    offset: int = 0,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Implements ISOMORPHISM_SPEC Section 3.1: Cosine similarity scan across domains.
+    Serves cross-domain candidates from the persisted table, highest similarity first.
+    Run POST /isomorphisms/discovery/run to pick up newly indexed vectors.
+    """
+    limit = max(1, min(limit, 500))
+    query = db.query(models.IsomorphismCandidate).filter(
+        models.IsomorphismCandidate.similarity >= min_similarity
+    )
+    total = query.count()
+    rows = query.order_by(
+        models.IsomorphismCandidate.similarity.desc(),
+        models.IsomorphismCandidate.id.asc()
+    ).offset(offset).limit(limit).all()
+
+    candidates = [{
+        "source": c.source_slug,
+        "source_domain": c.source_domain,
+        "target": c.target_slug,
+        "target_domain": c.target_domain,
+        "similarity": c.similarity,
+        "source_vector_version": c.source_vector_version,
+        "discovered_at": c.discovered_at
+    } for c in rows]
+
+    next_offset = offset + len(rows)
+    return {
+        "candidates": candidates,
+        "total": total,
+        "next_offset": next_offset if next_offset < total else None,
+        "watermark": get_discovery_watermark(db)
+    }
 
 class MappingProposal(BaseModel):
     agent_id: str
@@ -1731,6 +2928,8 @@ def link_citation_to_article(slug: str, citation_id: str, db: Session = Depends(
         article.citations.append(citation)
         # Recalculate confidence score
         article.confidence_score = sum(c.quality_score for c in article.citations) / len(article.citations)
+        db.flush()
+        knowledge_graph.update_shared_citations(db, slug)
         db.commit()
         
     return {"status": "linked", "article_confidence": article.confidence_score}
@@ -0,0 +1,383 @@
+"""
+Graph matcher backends for isomorphism proposals.
+
+Every backend takes two relational-map graphs (nx.DiGraph or nx.Graph, nodes tagged with
+"tag", edges typed with "type") and returns a MatchResult. `match_graphs(..., "auto")`
+picks a backend from graph size, symmetry and the time budget; see `choose_matcher`.
+
+Registered backends:
+  vf2         exact, induced-subgraph VF2 with tag/type matching; enumerates mappings
+  vf2pp       exact, VF2++ full isomorphism (faster on large equal-size graphs)
+  degree      heuristic pairing by (tag, in/out degree); O(n log n), never exact
+  approx_ged  bipartite graph-edit-distance approximation; polynomial, never exact
+"""
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import networkx as nx
+import numpy as np
+from networkx.algorithms import isomorphism
+from pydantic import BaseModel
+
+# Enumeration stops here even within budget; symmetric maps otherwise grow factorially
+MAX_MAPPINGS = 5000
+DEFAULT_BUDGET_S = 1.0
+
+
+class MatchResult(BaseModel):
+    matcher: str
+    mapping: Dict[str, str] = {}
+    isomorphic: bool = False
+    subgraph_isomorphic: bool = False
+    exact: bool = True # False when the mapping is a heuristic guess rather than a proven match
+    ambiguity_count: Optional[int] = None # Valid mappings found (exact matchers only)
+    ambiguity_truncated: bool = False # Enumeration hit MAX_MAPPINGS or the budget
+    score: float = 0.0 # Structural similarity in [0, 1]
+    elapsed_ms: float = 0.0
+
+
+def build_graph(relational_map: Dict) -> nx.DiGraph:
+    """relational_map {"nodes": [{"id", "tag"}], "links": [{"source", "target", "type"}]} -> tagged DiGraph."""
+    graph = nx.DiGraph()
+    for node in relational_map.get("nodes", []):
+        graph.add_node(node["id"], tag=node.get("tag", "generic"))
+    for link in relational_map.get("links", []):
+        graph.add_edge(link["source"], link["target"], type=link.get("type", "link"))
+    return graph
+
+
+def node_match():
+    return isomorphism.categorical_node_match("tag", "generic")
+
+
+def edge_match():
+    return isomorphism.categorical_edge_match("type", "link")
+
+
+def degree_similarity(graph_a: nx.Graph, graph_b: nx.Graph) -> float:
+    """Jaccard overlap of the sorted degree sequences (the lab engine's original fallback)."""
+    deg_a = sorted(d for _, d in graph_a.degree())
+    deg_b = sorted(d for _, d in graph_b.degree())
+    size = max(len(deg_a), len(deg_b))
+    deg_a += [0] * (size - len(deg_a))
+    deg_b += [0] * (size - len(deg_b))
+    union = sum(max(a, b) for a, b in zip(deg_a, deg_b))
+    return sum(min(a, b) for a, b in zip(deg_a, deg_b)) / union if union else 0.0
+
+
+def signature(graph: nx.Graph, node) -> tuple:
+    tag = graph.nodes[node].get("tag", "generic")
+    if graph.is_directed():
+        return tag, graph.in_degree(node), graph.out_degree(node)
+    return tag, graph.degree(node)
+
+
+def symmetry_log10(graph: nx.Graph) -> float:
+    """
+    log10 of an upper estimate of the automorphism count: nodes sharing a (tag, degree)
+    signature are the ones VF2 cannot tell apart, so the estimate is the product of
+    the factorials of those class sizes.
+    """
+    classes = Counter(signature(graph, node) for node in graph.nodes)
+    return sum(math.lgamma(size + 1) for size in classes.values()) / math.log(10)
+
+
+def is_valid_mapping(graph_a: nx.Graph, graph_b: nx.Graph, mapping: Dict) -> bool:
+    """True if `mapping` is a tag- and type-preserving isomorphism from graph_a onto graph_b."""
+    if len(mapping) != len(graph_a) or len(graph_a) != len(graph_b) or graph_a.number_of_edges() != graph_b.number_of_edges():
+        return False
+    if len(set(mapping.values())) != len(mapping):
+        return False
+    for node, target in mapping.items():
+        if target not in graph_b or graph_a.nodes[node].get("tag", "generic") != graph_b.nodes[target].get("tag", "generic"):
+            return False
+    for source, target, data in graph_a.edges(data=True):
+        if not graph_b.has_edge(mapping[source], mapping[target]):
+            return False
+        if data.get("type", "link") != graph_b.edges[mapping[source], mapping[target]].get("type", "link"):
+            return False
+    return True
+
+
+class Matcher:
+    name = ""
+
+    def match(self, graph_a: nx.Graph, graph_b: nx.Graph, budget_s: float) -> MatchResult:
+        raise NotImplementedError
+
+
+def _select(mappings: List[Dict]) -> Dict[str, str]:
+    """Deterministic selection: the smallest mapping by its sorted item string (VF2-RELIABILITY-REPORT)."""
+    if not mappings:
+        return {}
+    return min(mappings, key=lambda m: str(sorted(m.items())))
+
+
+class BudgetExceeded(Exception):
+    """Raised from inside a search when its deadline passes."""
+
+
+def _enumerate(iterator, deadline: float):
+    mappings = []
+    truncated = False
+    try:
+        for mapping in iterator:
+            mappings.append(mapping)
+            if len(mappings) >= MAX_MAPPINGS or time.perf_counter() > deadline:
+                truncated = True
+                break
+    except BudgetExceeded:
+        truncated = True
+    return mappings, truncated
+
+
+class _DeadlineMixin:
+    """
+    Checks the deadline while VF2 explores candidate pairs, not only between yielded
+    mappings, so a search that finds no (or a slow first) mapping still stops on time.
+    """
+    CHECK_EVERY = 256
+
+    def __init__(self, *args, deadline: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deadline = deadline
+        self.checks = 0
+
+    def syntactic_feasibility(self, G1_node, G2_node):
+        self.checks += 1
+        if self.checks % self.CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise BudgetExceeded()
+        return super().syntactic_feasibility(G1_node, G2_node)
+
+
+class _TimedGraphMatcher(_DeadlineMixin, isomorphism.GraphMatcher):
+    pass
+
+
+class _TimedDiGraphMatcher(_DeadlineMixin, isomorphism.DiGraphMatcher):
+    pass
+
+
+class VF2Matcher(Matcher):
+    """Induced-subgraph VF2 (graph_a's subgraph onto graph_b), the original propose_mapping behaviour."""
+    name = "vf2"
+
+    def match(self, graph_a, graph_b, budget_s):
+        deadline = time.perf_counter() + budget_s
+        matcher_class = _TimedDiGraphMatcher if graph_a.is_directed() else _TimedGraphMatcher
+        matcher = matcher_class(graph_a, graph_b, node_match=node_match(), edge_match=edge_match(), deadline=deadline)
+        mappings, truncated = _enumerate(matcher.subgraph_isomorphisms_iter(), deadline)
+        # An induced subgraph of graph_a matching all of an equal-size graph_b is an isomorphism
+        isomorphic = bool(mappings) and len(graph_a) == len(graph_b)
+        return MatchResult(
+            matcher=self.name,
+            mapping=_select(mappings),
+            isomorphic=isomorphic,
+            subgraph_isomorphic=bool(mappings),
+            ambiguity_count=len(mappings),
+            ambiguity_truncated=truncated,
+            score=1.0 if isomorphic else degree_similarity(graph_a, graph_b),
+        )
+
+
+class VF2PPMatcher(Matcher):
+    """
+    VF2++ (networkx vf2pp_*): full isomorphism only, node tags as labels. It cannot match
+    edge types itself, so candidate mappings are filtered for type agreement. networkx
+    offers no hook inside the VF2++ search, so the budget is checked between candidates;
+    its refined node ordering keeps the wait for the first one short on tagged graphs.
+    """
+    name = "vf2pp"
+
+    def match(self, graph_a, graph_b, budget_s):
+        if len(graph_a) != len(graph_b) or graph_a.number_of_edges() != graph_b.number_of_edges():
+            return MatchResult(matcher=self.name, ambiguity_count=0, score=degree_similarity(graph_a, graph_b))
+        candidates = isomorphism.vf2pp_all_isomorphisms(graph_a, graph_b, node_label="tag", default_label="generic")
+        deadline = time.perf_counter() + budget_s
+
+        def typed():
+            for mapping in candidates:
+                if time.perf_counter() > deadline:
+                    raise BudgetExceeded()
+                if is_valid_mapping(graph_a, graph_b, mapping):
+                    yield mapping
+
+        mappings, truncated = _enumerate(typed(), deadline)
+        return MatchResult(
+            matcher=self.name,
+            mapping=_select(mappings),
+            isomorphic=bool(mappings),
+            subgraph_isomorphic=bool(mappings),
+            ambiguity_count=len(mappings),
+            ambiguity_truncated=truncated,
+            score=1.0 if mappings else degree_similarity(graph_a, graph_b),
+        )
+
+
+class DegreeMatcher(Matcher):
+    """
+    Pairs nodes within each tag by descending (in, out) degree, the lab engine's centrality
+    fallback made tag-aware. The guess is checked, so an exact hit still reports isomorphic.
+    """
+    name = "degree"
+
+    def match(self, graph_a, graph_b, budget_s):
+        def ranked(graph):
+            groups: Dict[str, List] = {}
+            for node in sorted(graph.nodes, key=lambda n: (signature(graph, n)[1:], str(n)), reverse=True):
+                groups.setdefault(graph.nodes[node].get("tag", "generic"), []).append(node)
+            return groups
+
+        groups_a, groups_b = ranked(graph_a), ranked(graph_b)
+        mapping = {}
+        for tag, nodes in groups_a.items():
+            mapping.update(zip(nodes, groups_b.get(tag, [])))
+        isomorphic = is_valid_mapping(graph_a, graph_b, mapping)
+        return MatchResult(
+            matcher=self.name,
+            mapping=mapping,
+            isomorphic=isomorphic,
+            subgraph_isomorphic=isomorphic,
+            exact=isomorphic,
+            score=1.0 if isomorphic else degree_similarity(graph_a, graph_b),
+        )
+
+
+class ApproxGEDMatcher(Matcher):
+    """
+    Bipartite approximation of graph edit distance (Riesen & Bunke): nodes are assigned by a
+    cost matrix of tag mismatch plus in/out degree difference, then the edit cost that
+    assignment induces is counted exactly (unit costs for node/edge insert, delete, relabel).
+    Uses scipy's Hungarian solver when installed, a greedy assignment otherwise.
+    Score is 1 - cost / (nodes + edges of both graphs).
+    """
+    name = "approx_ged"
+
+    @staticmethod
+    def _assign(cost: np.ndarray):
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:
+            linear_sum_assignment = None
+        if linear_sum_assignment is not None:
+            return list(zip(*linear_sum_assignment(cost)))
+        pairs, used_rows, used_cols = [], set(), set()
+        for flat in np.argsort(cost, axis=None, kind="stable"):
+            i, j = divmod(int(flat), cost.shape[1])
+            if i not in used_rows and j not in used_cols:
+                pairs.append((i, j))
+                used_rows.add(i)
+                used_cols.add(j)
+                if len(pairs) == min(cost.shape):
+                    break
+        return pairs
+
+    def match(self, graph_a, graph_b, budget_s):
+        nodes_a, nodes_b = list(graph_a.nodes), list(graph_b.nodes)
+        if not nodes_a or not nodes_b:
+            return MatchResult(matcher=self.name, exact=False, score=degree_similarity(graph_a, graph_b))
+
+        sig_a = [signature(graph_a, n) for n in nodes_a]
+        sig_b = [signature(graph_b, n) for n in nodes_b]
+        tags_a = np.array([s[0] for s in sig_a], dtype=object)
+        tags_b = np.array([s[0] for s in sig_b], dtype=object)
+        degrees_a = np.array([s[1:] for s in sig_a], dtype=np.float64)
+        degrees_b = np.array([s[1:] for s in sig_b], dtype=np.float64)
+        # Half an edge edit per unit of degree difference: each edge touches two nodes
+        cost = (tags_a[:, None] != tags_b[None, :]).astype(np.float64)
+        cost += 0.5 * np.abs(degrees_a[:, None, :] - degrees_b[None, :, :]).sum(axis=2)
+
+        mapping = {nodes_a[i]: nodes_b[j] for i, j in self._assign(cost)}
+
+        edit_cost = abs(len(nodes_a) - len(nodes_b))
+        edit_cost += sum(graph_a.nodes[a].get("tag", "generic") != graph_b.nodes[b].get("tag", "generic") for a, b in mapping.items())
+        covered = set()
+        for source, target, data in graph_a.edges(data=True):
+            mapped = (mapping.get(source), mapping.get(target))
+            if None in mapped or not graph_b.has_edge(*mapped):
+                edit_cost += 1 # Deleted edge
+                continue
+            covered.add(mapped)
+            edit_cost += data.get("type", "link") != graph_b.edges[mapped].get("type", "link")
+        edit_cost += graph_b.number_of_edges() - len(covered) # Inserted edges
+
+        scale = len(graph_a) + len(graph_b) + graph_a.number_of_edges() + graph_b.number_of_edges()
+        isomorphic = edit_cost == 0
+        return MatchResult(
+            matcher=self.name,
+            mapping=mapping,
+            isomorphic=isomorphic,
+            subgraph_isomorphic=isomorphic,
+            exact=isomorphic,
+            score=max(0.0, 1.0 - edit_cost / scale),
+        )
+
+
+MATCHERS: Dict[str, Matcher] = {}
+
+
+def register(matcher: Matcher):
+    MATCHERS[matcher.name] = matcher
+
+
+for _matcher in (VF2Matcher(), VF2PPMatcher(), DegreeMatcher(), ApproxGEDMatcher()):
+    register(_matcher)
+
+
+# Auto-selection thresholds (tuned against lab/experiments/vf2-benchmarks)
+VF2_MAX_NODES = 32 # Full VF2 enumeration stays cheap below this when symmetry is low
+VF2_MAX_SYMMETRY_LOG10 = 2.0 # ~100 indistinguishable arrangements
+GED_MAX_NODES = 500 # The assignment cost matrix is nodes_a x nodes_b
+EXACT_MAX_NODES = 2000
+SUBGRAPH_MAX_NODES = 128 # Subgraph VF2 has no VF2++ equivalent; past this it rarely finishes within budget
+MIN_EXACT_BUDGET_S = 0.005
+
+
+def choose_matcher(graph_a: nx.Graph, graph_b: nx.Graph, budget_s: float) -> str:
+    """
+    auto policy:
+      - tiny budget or huge graphs                    -> degree
+      - same node/edge counts (isomorphism question)  -> vf2 when small and asymmetric
+                                                         (exact ambiguity count), else vf2pp
+      - graph_a larger (subgraph question)            -> vf2, the only subgraph matcher,
+                                                         up to SUBGRAPH_MAX_NODES
+      - otherwise (no exact answer, or too large)     -> approx_ged when small, else degree
+    match_graphs falls back the same way when an exact search runs out of budget
+    before finding any mapping.
+    """
+    size = max(len(graph_a), len(graph_b))
+    if budget_s < MIN_EXACT_BUDGET_S or size > EXACT_MAX_NODES:
+        return "degree"
+    if len(graph_a) == len(graph_b) and graph_a.number_of_edges() == graph_b.number_of_edges():
+        if size <= VF2_MAX_NODES and symmetry_log10(graph_a) <= VF2_MAX_SYMMETRY_LOG10:
+            return "vf2"
+        return "vf2pp"
+    if len(graph_a) > len(graph_b) and size <= SUBGRAPH_MAX_NODES:
+        return "vf2"
+    return _approximate_matcher(size)
+
+
+def _approximate_matcher(size: int) -> str:
+    return "approx_ged" if size <= GED_MAX_NODES else "degree"
+
+
+def match_graphs(graph_a: nx.Graph, graph_b: nx.Graph, matcher: str = "auto", budget_s: float = DEFAULT_BUDGET_S) -> MatchResult:
+    """
+    Runs the named backend (or the auto policy's pick) and stamps its wall time on the result.
+    Under auto, an exact search that used up its budget without a mapping is replaced by
+    an approximate one, whose score still reflects the structure.
+    """
+    auto = matcher == "auto"
+    if auto:
+        matcher = choose_matcher(graph_a, graph_b, budget_s)
+    if matcher not in MATCHERS:
+        raise ValueError(f"Unknown matcher '{matcher}'; expected auto or one of {', '.join(sorted(MATCHERS))}")
+    started = time.perf_counter()
+    result = MATCHERS[matcher].match(graph_a, graph_b, budget_s)
+    if auto and result.ambiguity_truncated and not result.mapping:
+        result = MATCHERS[_approximate_matcher(max(len(graph_a), len(graph_b)))].match(graph_a, graph_b, budget_s)
+        result.ambiguity_truncated = True
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return result
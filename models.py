@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum, Table, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum, Table, UniqueConstraint, LargeBinary
+from sqlalchemy import event
+from sqlalchemy.orm import Session, relationship
 import datetime
 import enum
+import functools
+import hashlib
 try:
     from .database import Base
+    from .compressed import CompressedText, codec
 except ImportError:
     from database import Base
+    from compressed import CompressedText, codec
 
 # Association table for Article <-> Citation (Many-to-Many)
 article_citations = Table(
@@ -31,7 +36,7 @@ class Article(Base):
 
     slug = Column(String, primary_key=True, index=True)
     title = Column(String)
-    content = Column(String, nullable=True)
+    content = Column(CompressedText, nullable=True)
     author_id = Column(String, ForeignKey("agents.id"), nullable=True)
     domain = Column(String, default="General") # e.g. Biology, CS, Ethics
     status = Column(String, default="active") # active, archived
@@ -40,10 +45,18 @@ class Article(Base):
     total_weight = Column(Float, default=0.0) # Cached voting weight
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
-    relational_map = Column(String, default="{}") # JSON string of predicates and links
+    relational_map = Column(CompressedText, default="{}") # JSON string of predicates and links
+    content_hash = Column(String, nullable=True) # sha256 hex of content, kept current by the listener below
 
     citations = relationship("Citation", secondary=article_citations, back_populates="articles")
 
+def hash_content(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest() if content is not None else None
+
+@event.listens_for(Article.content, "set")
+def _update_content_hash(target, value, oldvalue, initiator):
+    target.content_hash = hash_content(value)
+
 class Agent(Base):
     __tablename__ = "agents"
 
@@ -82,7 +95,7 @@ class TaskSubmission(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, ForeignKey("tasks.id"))
     agent_id = Column(String, ForeignKey("agents.id"))
-    content = Column(String) # The findings/findings
+    content = Column(CompressedText) # The findings/findings
     uri = Column(String, nullable=True) # Link to artifact
     metabolic_impact = Column(Float, default=0.0) # Muda reduction / Efficiency gain
     verification_status = Column(String, default="pending") # pending, verified, disputed
@@ -115,16 +128,16 @@ class Isomorphism(Base):
     __tablename__ = "isomorphisms"
 
     id = Column(Integer, primary_key=True, index=True)
-    article_a_slug = Column(String, ForeignKey("articles.slug"))
-    article_b_slug = Column(String, ForeignKey("articles.slug"))
+    article_a_slug = Column(String, ForeignKey("articles.slug"), index=True)
+    article_b_slug = Column(String, ForeignKey("articles.slug"), index=True)
     mapping_table = Column(String) # JSON string: Node A_1 -> B_1, etc.
     confidence_score = Column(Float, default=0.0)
     ged_score = Column(Float, nullable=True) # Graph Edit Distance
     semantic_similarity = Column(Float, nullable=True)
     experimental_evidence_uri = Column(String, nullable=True) # Link to citation or task submission
-    status = Column(String, default="proposed") # proposed, verified, disputed
+    status = Column(String, default="proposed", index=True) # proposed, verified, disputed
     total_weight = Column(Float, default=0.0) # Cached voting weight
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Relationships
@@ -132,6 +145,150 @@ class Isomorphism(Base):
     article_b = relationship("Article", foreign_keys=[article_b_slug])
     votes = relationship("Vote", back_populates="isomorphism")
 
+class ArticleVector(Base):
+    __tablename__ = "article_vectors"
+
+    slug = Column(String, primary_key=True, index=True)
+    version = Column(String) # Hash of the indexed vector; unchanged re-index keeps the version
+    domain = Column(String, nullable=True)
+    embedder = Column(String, nullable=True) # Server embedder for /isomorphisms/index/content vectors; NULL for client vectors
+    indexed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True) # Compared against the discovery watermark
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    # Server-side embeddings keyed by embedder + content hash; unchanged content is never re-embedded
+    cache_key = Column(String, primary_key=True, index=True)
+    embedder = Column(String)
+    vector = Column(LargeBinary) # float32 bytes
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class IsomorphismCandidate(Base):
+    __tablename__ = "isomorphism_candidates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_slug = Column(String, index=True)
+    target_slug = Column(String, index=True)
+    source_domain = Column(String, nullable=True)
+    target_domain = Column(String, nullable=True)
+    similarity = Column(Float, index=True)
+    source_vector_version = Column(String, nullable=True)
+    discovered_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('source_slug', 'target_slug', name='_candidate_pair_uc'),
+    )
+
+class DiscoveryRun(Base):
+    __tablename__ = "discovery_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow) # Watermark once the run finishes
+    finished_at = Column(DateTime, nullable=True)
+    full_scan = Column(Boolean, default=False)
+    articles_scanned = Column(Integer, default=0)
+    candidates_found = Column(Integer, default=0)
+
+class AnalogClass(Base):
+    __tablename__ = "analog_classes"
+
+    # Union-find over verified isomorphisms; every member points straight at its class root
+    slug = Column(String, primary_key=True, index=True)
+    root = Column(String, index=True)
+    joined_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class AnalogMapping(Base):
+    __tablename__ = "analog_mappings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_slug = Column(String, index=True)
+    target_slug = Column(String, index=True)
+    mapping = Column(String) # JSON: source node -> target node, composed along `path`
+    path = Column(String) # JSON list of verified isomorphism ids, source side first
+    hops = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('source_slug', 'target_slug', name='_analog_pair_uc'),
+    )
+
+class ArticleEdge(Base):
+    __tablename__ = "article_edges"
+
+    # Knowledge-graph adjacency, maintained on write. backlink edges are directed (source links to target);
+    # shared_citation and isomorphism edges are undirected and stored with source_slug < target_slug.
+    id = Column(Integer, primary_key=True, index=True)
+    source_slug = Column(String, index=True)
+    target_slug = Column(String, index=True)
+    kind = Column(String, index=True) # backlink, shared_citation, isomorphism
+    weight = Column(Float, default=1.0) # Shared citation count; 1.0 otherwise
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('source_slug', 'target_slug', 'kind', name='_article_edge_uc'),
+    )
+
+class ArticleLink(Base):
+    __tablename__ = "article_links"
+
+    # [[wiki links]] parsed out of article content by sync_article; one row per distinct (target, anchor)
+    id = Column(Integer, primary_key=True, index=True)
+    source_slug = Column(String, index=True)
+    target_slug = Column(String, index=True)
+    anchor = Column(String)
+
+class StaleLink(Base):
+    __tablename__ = "stale_links"
+
+    # Reverse-dependency invalidation: source_slug links to target_slug, which changed after source was last saved
+    id = Column(Integer, primary_key=True, index=True)
+    source_slug = Column(String, index=True)
+    target_slug = Column(String)
+    marked_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('source_slug', 'target_slug', name='_stale_link_uc'),
+    )
+
+class ArticleRevision(Base):
+    __tablename__ = "article_revisions"
+
+    # One row per title/content change; data is zlib JSON, full text (kind=full) or a line delta
+    # against revision number - 1 (kind=delta). keyframe is the number of the chain's full row.
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String, index=True)
+    number = Column(Integer)
+    kind = Column(String) # full, delta
+    keyframe = Column(Integer)
+    title = Column(String)
+    content_hash = Column(String)
+    size = Column(Integer) # Uncompressed content length
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('slug', 'number', name='_article_revision_uc'),
+    )
+
+class PropertyExtraction(Base):
+    __tablename__ = "property_extractions"
+
+    # Response cache for latent-property extraction, keyed by backend + content hash
+    cache_key = Column(String, primary_key=True, index=True)
+    backend = Column(String)
+    properties = Column(String) # JSON list of latent properties
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ArticleDerivation(Base):
+    __tablename__ = "article_derivations"
+
+    # Input fingerprint of what a batch job last derived from an article, so unchanged inputs
+    # are skipped; kept out of relational_map, which is user data
+    slug = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True) # "extraction" (latent properties) | "synthesis" (primitive)
+    input_hash = Column(String)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 class Citation(Base):
     __tablename__ = "citations"
 
@@ -209,3 +366,28 @@ class DocWeight(Base):
     path = Column(String, primary_key=True, index=True)
     weight = Column(Float, default=1.0)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class CompressionDictionary(Base):
+    __tablename__ = "compression_dictionaries"
+
+    # zstd dictionaries for CompressedText columns; rows are never deleted, old values reference them by ID
+    dict_id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary)
+    samples = Column(Integer) # Values the dictionary was trained on
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+def load_compression_dictionaries(bind):
+    with bind.connect() as conn:
+        table = CompressionDictionary.__table__
+        rows = conn.execute(table.select().order_by(table.c.created_at, table.c.dict_id)).fetchall()
+    return [(row.dict_id, row.data) for row in rows]
+
+def use_compression_dictionaries(bind):
+    """Points the CompressedText codec at the dictionaries stored in `bind` (done by the API at startup)."""
+    codec.loader = functools.partial(load_compression_dictionaries, bind)
+
+@event.listens_for(Session, "after_begin")
+def _default_dictionary_source(session, transaction, connection):
+    # Scripts and workers that never run the API startup read dictionaries through the first engine they use
+    if codec.loader is None:
+        use_compression_dictionaries(connection.engine)
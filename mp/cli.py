@@ -1281,10 +1281,15 @@ def vote_article(
 @app.command("isomorphisms")
 def isomorphisms_discover(
     threshold: float = typer.Option(0.75, "--threshold", "-t", help="Similarity threshold"),
+    limit: int = typer.Option(50, "--limit", "-n", help="Maximum candidates to show"),
+    refresh: bool = typer.Option(
+        False, "--refresh", "-r", help="Run an incremental discovery scan before listing"
+    ),
 ):
     """Discover potential isomorphic mappings across domains.
     
     Queries the Metabolic Engine for cross-domain similarity candidates.
+    The threshold is applied server-side against the persisted candidate table.
     """
     config = get_config()
     api_url = config.get("api_url")
@@ -1293,10 +1298,19 @@ def isomorphisms_discover(
         typer.secho("API URL not configured.", fg=typer.colors.RED)
         raise typer.Exit(1)
         
-    typer.echo(f"⏳ Scanning for cross-domain isomorphisms (threshold > {threshold})...")
-    
     try:
-        response = httpx.get(f"{api_url}/isomorphisms/discovery")
+        if refresh:
+            typer.echo("⏳ Running incremental discovery scan...")
+            response = httpx.post(f"{api_url}/isomorphisms/discovery/run", timeout=None)
+            response.raise_for_status()
+            run = response.json()
+            typer.echo(f"  (Scanned {run['articles_scanned']} articles, {run['candidates_found']} new candidates)")
+
+        typer.echo(f"⏳ Scanning for cross-domain isomorphisms (threshold > {threshold})...")
+        response = httpx.get(
+            f"{api_url}/isomorphisms/discovery",
+            params={"min_similarity": threshold, "limit": limit},
+        )
         response.raise_for_status()
         data = response.json()
         candidates = data.get("candidates", [])
@@ -1305,13 +1319,239 @@ def isomorphisms_discover(
             typer.echo("No potential isomorphisms discovered above the threshold.")
             return
             
-        typer.secho(f"\n🧬 Discovered {len(candidates)} Isomorphism Candidates:", fg=typer.colors.CYAN, bold=True)
+        typer.secho(f"\n🧬 Discovered {data.get('total', len(candidates))} Isomorphism Candidates:", fg=typer.colors.CYAN, bold=True)
         for c in candidates:
             typer.echo(f"  - [{c['similarity']:.2f}] {c['source']} ({c['source_domain']}) <-> {c['target']} ({c['target_domain']})")
+        if data.get("next_offset") is not None:
+            typer.echo(f"  ... showing first {len(candidates)} (use --limit to see more)")
     except Exception as e:
         typer.secho(f"❌ Discovery failed: {e}", fg=typer.colors.RED)
 
 
+@app.command("reindex")
+def reindex(
+    file: Path = typer.Argument(..., help="NDJSON ({slug, vector, metadata} per line) or MPV1 binary vector dump"),
+    batch_size: int = typer.Option(256, "--batch-size", "-b", help="Records per vector-store upsert"),
+    fmt: str = typer.Option("auto", "--format", "-f", help="auto, ndjson or binary"),
+):
+    """Bulk (re)index article vectors from a file.
+
+    The file is streamed to /isomorphisms/index/batch, so dumps larger than
+    memory can be loaded in one request.
+    """
+    config = get_config()
+    api_url = config.get("api_url")
+
+    if not api_url:
+        typer.secho("API URL not configured.", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    if not file.exists():
+        typer.secho(f"File not found: {file}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    if fmt == "auto":
+        with open(file, "rb") as f:
+            fmt = "binary" if f.read(4) == b"MPV1" else "ndjson"
+    if fmt not in ("ndjson", "binary"):
+        typer.secho(f"Unknown format: {fmt}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    content_type = "application/octet-stream" if fmt == "binary" else "application/x-ndjson"
+
+    def chunks():
+        with open(file, "rb") as f:
+            while chunk := f.read(1 << 20):
+                yield chunk
+
+    typer.echo(f"⏳ Streaming {file} ({file.stat().st_size / 1e6:.1f} MB, {fmt}) in batches of {batch_size}...")
+    try:
+        response = httpx.post(
+            f"{api_url}/isomorphisms/index/batch",
+            params={"batch_size": batch_size},
+            content=chunks(),
+            headers={"Content-Type": content_type},
+            timeout=None,
+        )
+        response.raise_for_status()
+        result = response.json()
+    except Exception as e:
+        typer.secho(f"❌ Reindex failed: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    typer.secho(
+        f"✓ Indexed {result['indexed']} vectors in {result['elapsed_s']}s "
+        f"({result['throughput_per_s']}/s, {result['batches']} batches)",
+        fg=typer.colors.GREEN,
+    )
+    if result["failed"]:
+        typer.secho(f"⚠️ {result['failed']} records failed:", fg=typer.colors.YELLOW)
+        for error in result["errors"]:
+            typer.echo(f"  - {error}")
+
+
+@app.command("publish")
+def publish_articles(
+    batch_size: int = typer.Option(500, "--batch-size", "-b", help="Articles per request"),
+):
+    """Sync every local article to the Metabolic Engine.
+
+    Articles are sent in batches to /articles/sync/batch as content hashes
+    first; only those the server reports as changed are sent again with
+    their content.
+    """
+    config = get_config()
+    api_url = config.get("api_url")
+
+    if not api_url:
+        typer.secho("API URL not configured.", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    articles_path = Path(ARTICLES_DIR)
+    if not articles_path.exists():
+        typer.secho("Articles directory not found.", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    records = {}
+    for art in sorted(articles_path.glob("*.md")):
+        text = art.read_text()
+        front = re.match(r"^---\n(.*?)\n---\n?", text, re.DOTALL)
+        meta = dict(re.findall(r'^(\w+):\s*"?([^"\n]*)"?\s*$', front.group(1), re.MULTILINE)) if front else {}
+        body = text[front.end():] if front else text
+        status = meta.get("status") or None
+        records[art.stem] = {
+            "slug": art.stem,
+            "title": meta.get("title") or art.stem,
+            "domain": meta.get("domain") or None,
+            "status": status,
+            # Only archiving and un-archiving are sent; the server turns is_archived=False into
+            # status "active", which would overwrite statuses such as needs-review
+            "is_archived": True if status == "archived" else False if status == "active" else None,
+            "content": body,
+            "content_hash": hashlib.sha256(body.encode("utf-8")).hexdigest(),
+        }
+
+    typer.echo(f"⏳ Publishing {len(records)} articles to {api_url}...")
+    counts = {}
+    slugs = list(records)
+    try:
+        for start in range(0, len(slugs), batch_size):
+            chunk = slugs[start:start + batch_size]
+            # Hashes only; the server asks for content where it differs
+            payload = [{k: v for k, v in records[s].items() if k != "content"} for s in chunk]
+            response = httpx.post(f"{api_url}/articles/sync/batch", json={"articles": payload}, timeout=None)
+            response.raise_for_status()
+            results = response.json()["results"]
+            needed = [r["slug"] for r in results if r["status"] == "needs_content"]
+            if needed:
+                response = httpx.post(
+                    f"{api_url}/articles/sync/batch",
+                    json={"articles": [records[s] for s in needed]},
+                    timeout=None,
+                )
+                response.raise_for_status()
+                results = [r for r in results if r["status"] != "needs_content"] + response.json()["results"]
+            for result in results:
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                if result["status"] == "error":
+                    typer.secho(f"  ⚠️ {result['slug']}: {result.get('detail')}", fg=typer.colors.YELLOW)
+    except Exception as e:
+        typer.secho(f"❌ Publish failed: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    typer.secho(f"✓ Publish complete: {summary or 'nothing to do'}", fg=typer.colors.GREEN)
+
+
+@app.command("search")
+def search_articles(
+    query: str = typer.Argument(..., help="Words to search for in article titles and content"),
+    limit: int = typer.Option(10, "--limit", "-n", help="Results per page"),
+    pages: int = typer.Option(1, "--pages", "-p", help="Pages to fetch"),
+):
+    """Full-text search over articles.
+
+    Served by the database's full-text index (/api/articles/search), so no
+    article bodies are downloaded.
+    """
+    config = get_config()
+    api_url = config.get("api_url")
+
+    if not api_url:
+        typer.secho("API URL not configured.", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    cursor = None
+    shown = 0
+    try:
+        for _ in range(pages):
+            params = {"q": query, "limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = httpx.get(f"{api_url}/api/articles/search", params=params)
+            response.raise_for_status()
+            data = response.json()
+            for item in data["items"]:
+                snippet = re.sub(r"</?b>", "", item.get("snippet") or "").replace("\n", " ")
+                typer.secho(f"  [{item['rank']:.3f}] {item['slug']}", fg=typer.colors.CYAN, nl=False)
+                typer.echo(f" - {item['title']} ({item.get('domain') or 'General'})")
+                if snippet:
+                    typer.echo(f"      {snippet}")
+                shown += 1
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+    except Exception as e:
+        typer.secho(f"❌ Search failed: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    if not shown:
+        typer.echo("No matching articles.")
+    elif cursor:
+        typer.echo("  ... more results available (use --pages to fetch more)")
+
+
+@app.command("links")
+def what_links_here(
+    slug: str = typer.Argument(..., help="Article slug"),
+):
+    """List articles that link to SLUG (what links here).
+
+    Served from the server's link index, so it also works for pages
+    that do not exist yet.
+    """
+    config = get_config()
+    api_url = config.get("api_url")
+
+    if not api_url:
+        typer.secho("API URL not configured.", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    cursor = None
+    shown = 0
+    try:
+        while True:
+            params = {"limit": 200}
+            if cursor:
+                params["after_slug"] = cursor
+            response = httpx.get(f"{api_url}/api/articles/{slug}/backlinks", params=params)
+            response.raise_for_status()
+            data = response.json()
+            for item in data["items"]:
+                anchors = ", ".join(f'"{a}"' for a in item["anchors"])
+                typer.secho(f"  {item['slug']}", fg=typer.colors.CYAN, nl=False)
+                typer.echo(f" - {item['title']} (as {anchors})")
+                shown += 1
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+    except Exception as e:
+        typer.secho(f"❌ Lookup failed: {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    if not shown:
+        typer.echo(f"Nothing links to {slug}.")
+
+
 @app.command()
 def version():
     """Show the Moltapedia CLI version."""
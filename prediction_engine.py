@@ -5,17 +5,60 @@ import os
 sys.path.append(os.path.join(os.getcwd(), "moltapedia"))
 
 try:
-    # from isomorphism import IsomorphismEngine
     from database import SessionLocal
     from models import Article, Isomorphism as IsomorphismModel
+    import embeddings
     import json
+    import numpy as np
 
-    def run_transfer_test():
+    # Curated synonym pairs the embedder cannot infer from wording alone; always treated as matches.
+    # resilience (network) <-> fault_tolerance (p2p)
+    # resource_sharing (network) <-> load_balancing (p2p)
+    SEMANTIC_PAIRS = [
+        ("resilience", "fault_tolerance"),
+        ("resource_sharing", "load_balancing")
+    ]
+
+    # Cosine similarity at or above which two latent properties count as the same concept
+    MATCH_THRESHOLD = float(os.getenv("PREDICTION_MATCH_THRESHOLD", "0.7"))
+
+    def property_text(prop: dict) -> str:
+        """Text embedded for a latent property: its name in words plus its description."""
+        return f"{prop['name'].replace('_', ' ')}: {prop.get('description', '')}"
+
+    def match_properties(names_a, names_b, similarity, threshold=MATCH_THRESHOLD):
+        """
+        Greedy one-to-one matching over a precomputed (len(names_a), len(names_b)) similarity
+        matrix, best pairs first. SEMANTIC_PAIRS override the matrix.
+        Returns [(name_a, name_b, score)] for every pair at or above the threshold.
+        """
+        similarity = similarity.copy()
+        overrides = set(SEMANTIC_PAIRS) | {(b, a) for a, b in SEMANTIC_PAIRS}
+        for i, name_a in enumerate(names_a):
+            for j, name_b in enumerate(names_b):
+                if (name_a, name_b) in overrides:
+                    similarity[i, j] = 1.0
+
+        matches = []
+        used_a, used_b = set(), set()
+        for flat in np.argsort(similarity, axis=None)[::-1]:
+            i, j = np.unravel_index(flat, similarity.shape)
+            score = float(similarity[i, j])
+            if score < threshold:
+                break
+            if i in used_a or j in used_b:
+                continue
+            used_a.add(i)
+            used_b.add(j)
+            matches.append((names_a[i], names_b[j], score))
+        return matches
+
+    def run_transfer_test(embedder=None, threshold=MATCH_THRESHOLD):
         print("Starting Cross-Domain Prediction Engine (Transfer Test)...")
-        
+
         db = SessionLocal()
         isos = db.query(IsomorphismModel).filter(IsomorphismModel.status == "verified").all()
-        
+
         if not isos:
             print("No verified isomorphisms found for predictive transfer.")
             # FALLBACK for testing: get all proposed isos if none verified
@@ -24,73 +67,70 @@ try:
                 db.close()
                 return
 
+        # Bulk prefetch: every article referenced by the batch in one query, parsed once
+        slugs = {iso.article_a_slug for iso in isos} | {iso.article_b_slug for iso in isos}
+        properties = {}
+        for article in db.query(Article).filter(Article.slug.in_(slugs)).all():
+            rmap = json.loads(article.relational_map) if article.relational_map else {}
+            properties[article.slug] = rmap.get("latent_properties", [])
+
+        # Embed every distinct property text of the batch in one backend call
+        cache = embeddings.EmbeddingCache(embedder or embeddings.create_embedder("hashing"))
+        rows = {}
+        texts = []
+        for slug, props in properties.items():
+            rows[slug] = list(range(len(texts), len(texts) + len(props)))
+            texts.extend(property_text(p) for p in props)
+        vectors = cache.embed(texts)
+
+        summary = {"isomorphisms": 0, "predictions": 0, "confirmed": 0}
         for iso in isos:
+            if iso.article_a_slug not in properties or iso.article_b_slug not in properties:
+                continue
+            summary["isomorphisms"] += 1
             print(f"Testing Prediction for: {iso.article_a_slug} <-> {iso.article_b_slug}")
             mapping = json.loads(iso.mapping_table)
-            
-            # Fetch the articles
-            article_a = db.query(Article).filter(Article.slug == iso.article_a_slug).first()
-            article_b = db.query(Article).filter(Article.slug == iso.article_b_slug).first()
-            
-            if not article_a or not article_b:
+
+            props_a = properties[iso.article_a_slug]
+            props_b = properties[iso.article_b_slug]
+
+            # Mapping is Node A -> Node B.
+            # A property P of A that the mapping does not cover predicts a counterpart in B.
+            unmapped = [i for i, prop in enumerate(props_a) if prop["name"] not in mapping]
+            if not unmapped:
                 continue
+            for i in unmapped:
+                print(f"Prediction: Since {iso.article_a_slug} has '{props_a[i]['name']}', {iso.article_b_slug} likely has a corresponding property.")
+            summary["predictions"] += len(unmapped)
+
+            # Phase 4.2: Semantic verification, one similarity matrix per isomorphism
+            row_a = [rows[iso.article_a_slug][i] for i in unmapped]
+            similarity = embeddings.cosine_matrix(vectors[row_a], vectors[rows[iso.article_b_slug]])
+            matches = match_properties(
+                [props_a[i]["name"] for i in unmapped],
+                [p["name"] for p in props_b],
+                similarity,
+                threshold
+            )
 
-            rmap_a = json.loads(article_a.relational_map)
-            rmap_b = json.loads(article_b.relational_map)
-            
-            props_a = rmap_a.get("latent_properties", [])
-            props_b = rmap_b.get("latent_properties", [])
-
-            # Mapping is Node A -> Node B. 
-            # We want to check if a property P exists in A but has no mapping to B.
-            for prop in props_a:
-                prop_name = prop["name"]
-                # A mapping usually maps IDs or keys. If our properties are just in a list,
-                # we check if the mapping keys (from A) include this property.
-                
-                is_mapped = False
-                for key_a in mapping.keys():
-                    if key_a == prop_name:
-                        is_mapped = True
-                        break
-                
-                if not is_mapped:
-                    print(f"Prediction: Since {iso.article_a_slug} has '{prop_name}', {iso.article_b_slug} likely has a corresponding property.")
-                    
-                    # Phase 4.2: Semantic verification
-                    # Here we would normally call an LLM. Since I am the agent, I will perform the verification.
-                    # We look at props_b and see if any name/description matches semantically.
-                    
-                    print(f"  [LLM Audit] Scanning {iso.article_b_slug} for semantic matches to '{prop_name}'...")
-                    match_found = False
-                    for p_b in props_b:
-                        # Semantic check (simulated)
-                        # resilience (network) <-> fault_tolerance (p2p)
-                        # resource_sharing (network) <-> load_balancing (p2p)
-                        
-                        semantic_pairs = [
-                            ("resilience", "fault_tolerance"),
-                            ("resource_sharing", "load_balancing")
-                        ]
-                        
-                        for pair in semantic_pairs:
-                            if (prop_name == pair[0] and p_b["name"] == pair[1]) or \
-                               (prop_name == pair[1] and p_b["name"] == pair[0]):
-                                match_found = True
-                                print(f"  [Match Found] '{prop_name}' in {iso.article_a_slug} matches '{p_b['name']}' in {iso.article_b_slug}!")
-                                # Update mapping table
-                                mapping[prop_name] = p_b["name"]
-                                break
-                        if match_found: break
-                    
-                    if not match_found:
-                        print(f"  [No Match] No semantic match found for '{prop_name}' in {iso.article_b_slug}. Property remains a prediction.")
+            matched = set()
+            for name_a, name_b, score in matches:
+                print(f"  [Match Found] '{name_a}' in {iso.article_a_slug} matches '{name_b}' in {iso.article_b_slug} ({score:.2f})!")
+                # Update mapping table
+                mapping[name_a] = name_b
+                matched.add(name_a)
+            for i in unmapped:
+                if props_a[i]["name"] not in matched:
+                    print(f"  [No Match] No semantic match found for '{props_a[i]['name']}' in {iso.article_b_slug}. Property remains a prediction.")
+            summary["confirmed"] += len(matches)
 
             iso.mapping_table = json.dumps(mapping)
             print(f"Updated mapping: {mapping}")
-            
+
         db.commit()
         db.close()
+        print(f"Transfer test complete: {summary['isomorphisms']} isomorphisms, {summary['predictions']} predictions, {summary['confirmed']} confirmed (embedding cache: {cache.misses} embedded, {cache.hits} reused).")
+        return summary
 
     if __name__ == "__main__":
         run_transfer_test()
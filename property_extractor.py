@@ -1,42 +1,158 @@
 import sys
 import os
 import json
+import asyncio
+import hashlib
+import time
 
 # Add the moltapedia directory to sys.path so we can import from it
 sys.path.append(os.path.join(os.getcwd(), "moltapedia"))
 
 try:
     from database import SessionLocal
-    from models import Article, Isomorphism as IsomorphismModel
-    # Since we are an AI agent, we simulate the LLM call using our own capabilities.
-    # In a real production script, this would call an OpenAI/Anthropic/Gemini API.
+    from models import Article, ArticleDerivation, Isomorphism as IsomorphismModel, PropertyExtraction
 
-    def extract_latent_properties(article):
+    # Backend calls in flight at once, and the sustained request rate allowed to the model API
+    EXTRACTION_MAX_CONCURRENCY = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", "4"))
+    EXTRACTION_RATE_PER_S = float(os.getenv("EXTRACTION_RATE_PER_S", "2"))
+    # Articles written per transaction
+    EXTRACTION_CHUNK_SIZE = int(os.getenv("EXTRACTION_CHUNK_SIZE", "50"))
+
+    def content_hash(content) -> str:
+        return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+    class ExtractionBackend:
+        """A model that turns article content into latent properties ({name, value, description})."""
+        name = "base"
+        rate_limited = True # Remote model APIs are throttled; local backends are not
+
+        def cache_key(self, slug: str, content: str) -> str:
+            # Real models only see the content, so identical content shares one cached response
+            return f"{self.name}:{content_hash(content)}"
+
+        async def extract(self, slug: str, content: str) -> list:
+            raise NotImplementedError
+
+    class StubBackend(ExtractionBackend):
         """
-        Simulate LLM extraction of latent properties.
+        Deterministic local stand-in for an LLM call: fixed properties for the reference
+        articles, none for anything else. Used for tests and offline runs.
         """
-        content = article.content
-        # For 'mycelial-network'
-        if article.slug == 'mycelial-network':
-            return [
+        name = "stub"
+        rate_limited = False
+
+        FIXTURES = {
+            "mycelial-network": [
                 {"name": "resilience", "value": "high", "description": "Redundant pathways allow the network to survive damage."},
                 {"name": "resource_sharing", "value": "active", "description": "Nutrients are moved from areas of abundance to areas of scarcity."}
-            ]
-        # For 'p2p-network'
-        elif article.slug == 'p2p-network':
-            return [
+            ],
+            "p2p-network": [
                 {"name": "fault_tolerance", "value": "high", "description": "Decentralization ensures the system continues even if some nodes fail."},
                 {"name": "load_balancing", "value": "algorithmic", "description": "Traffic is distributed among peers to prevent bottlenecks."}
-            ]
-        return []
+            ],
+        }
+
+        def cache_key(self, slug: str, content: str) -> str:
+            # Output depends on the slug as well as the content
+            return f"{self.name}:{slug}:{content_hash(content)}"
+
+        async def extract(self, slug: str, content: str) -> list:
+            return [dict(p) for p in self.FIXTURES.get(slug, [])]
+
+    BACKENDS = {
+        "stub": StubBackend,
+    }
+
+    def create_backend(name: str = None) -> ExtractionBackend:
+        name = name or os.getenv("EXTRACTION_BACKEND", "stub")
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown extraction backend '{name}'")
+        return BACKENDS[name]()
+
+    class RateLimiter:
+        """Token bucket: at most `rate` acquisitions per second, bursting up to `burst`."""
+
+        def __init__(self, rate: float, burst: int = 1):
+            self.rate = rate
+            self.burst = burst
+            self.tokens = float(burst)
+            self.updated = time.monotonic()
+            self.lock = asyncio.Lock()
+
+        async def acquire(self):
+            if self.rate <= 0:
+                return
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def extract_latent_properties(article):
+        """
+        Single-article extraction through the default backend (kept for callers of the old
+        stub, which now await it; safe to call from a running event loop).
+        """
+        return await create_backend().extract(article.slug, article.content)
 
-    def run_property_extraction():
+    async def extract_all(articles, backend, db, concurrency=EXTRACTION_MAX_CONCURRENCY, rate=EXTRACTION_RATE_PER_S):
+        """
+        Returns {slug: properties} for the given articles. Cached responses are fetched in
+        one query; misses go to the backend with bounded concurrency and rate, and are
+        added to the cache (the caller commits).
+        """
+        keys = {a.slug: backend.cache_key(a.slug, a.content) for a in articles}
+        cached = {
+            row.cache_key: json.loads(row.properties)
+            for row in db.query(PropertyExtraction).filter(PropertyExtraction.cache_key.in_(set(keys.values()))).all()
+        }
+
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = RateLimiter(rate if backend.rate_limited else 0, burst=concurrency)
+        inflight = {}
+
+        async def call(article):
+            async with semaphore:
+                await limiter.acquire()
+                return await backend.extract(article.slug, article.content)
+
+        results = {}
+        for article in articles:
+            key = keys[article.slug]
+            if key in cached:
+                results[article.slug] = cached[key]
+            elif key not in inflight:
+                inflight[key] = asyncio.ensure_future(call(article))
+
+        if inflight:
+            responses = await asyncio.gather(*inflight.values(), return_exceptions=True)
+            for key, response in zip(list(inflight), responses):
+                if isinstance(response, Exception):
+                    print(f"Extraction failed for {key}: {response}")
+                    continue
+                cached[key] = response
+                db.add(PropertyExtraction(cache_key=key, backend=backend.name, properties=json.dumps(response)))
+
+        for article in articles:
+            key = keys[article.slug]
+            if article.slug not in results and key in cached:
+                results[article.slug] = cached[key]
+        return results
+
+    async def run_property_extraction(backend=None, force=False, all_articles=False, chunk_size=EXTRACTION_CHUNK_SIZE):
         print("Starting Automated Property Extraction...")
+        backend = backend or create_backend()
         db = SessionLocal()
-        
-        isos = db.query(IsomorphismModel).filter(IsomorphismModel.status == "verified").all()
-        
-        if not isos:
+
+        isos = [] if all_articles else db.query(IsomorphismModel).filter(IsomorphismModel.status == "verified").all()
+
+        if all_articles:
+            articles = db.query(Article).all()
+        elif not isos:
             articles = db.query(Article).filter(Article.status == "active").all()
         else:
             article_slugs = set()
@@ -45,23 +161,46 @@ try:
                 article_slugs.add(iso.article_b_slug)
             articles = db.query(Article).filter(Article.slug.in_(list(article_slugs))).all()
 
-        results = {}
+        # Incremental: only articles whose content changed since their last extraction
+        extracted = {
+            row.slug: row for row in db.query(ArticleDerivation).filter(
+                ArticleDerivation.kind == "extraction", ArticleDerivation.slug.in_([a.slug for a in articles])
+            ).all()
+        }
+        stale = []
         for article in articles:
-            print(f"Extracting latent properties for: {article.slug}")
-            properties = extract_latent_properties(article)
-            results[article.slug] = properties
-            
-            # Update the relational_map with these latent properties
-            rmap = json.loads(article.relational_map)
-            rmap["latent_properties"] = properties
-            article.relational_map = json.dumps(rmap)
-        
-        db.commit()
+            previous = extracted.get(article.slug)
+            if force or previous is None or previous.input_hash != content_hash(article.content):
+                stale.append(article)
+        print(f"{len(stale)} of {len(articles)} articles need extraction ({backend.name} backend).")
+
+        summary = {"articles": len(articles), "extracted": 0, "unchanged": len(articles) - len(stale), "failed": 0}
+        for start in range(0, len(stale), chunk_size):
+            chunk = stale[start:start + chunk_size]
+            results = await extract_all(chunk, backend, db)
+            for article in chunk:
+                if article.slug not in results:
+                    summary["failed"] += 1
+                    continue
+                print(f"Extracted latent properties for: {article.slug}")
+                # Update the relational_map with these latent properties
+                rmap = json.loads(article.relational_map) if article.relational_map else {}
+                rmap["latent_properties"] = results[article.slug]
+                rmap.pop("extraction_hash", None) # Stored here by earlier versions
+                article.relational_map = json.dumps(rmap)
+                if article.slug not in extracted:
+                    extracted[article.slug] = ArticleDerivation(slug=article.slug, kind="extraction")
+                    db.add(extracted[article.slug])
+                extracted[article.slug].input_hash = content_hash(article.content)
+                summary["extracted"] += 1
+            db.commit()
+
         db.close()
-        print("Property extraction complete. Updated database.")
+        print(f"Property extraction complete. Updated database: {summary}")
+        return summary
 
     if __name__ == "__main__":
-        run_property_extraction()
+        asyncio.run(run_property_extraction(force="--force" in sys.argv, all_articles="--all" in sys.argv))
 
 except ImportError as e:
     print(f"Import error: {e}")
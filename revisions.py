@@ -0,0 +1,151 @@
+"""
+Article revision history, stored as compressed deltas.
+
+Every title or content change made through sync_article appends a row to
+`article_revisions`. Most rows hold a line-level delta against the previous revision;
+every REVISION_KEYFRAME_INTERVAL-th row (and any revision whose predecessor is not the
+last stored one) holds the full text instead, so rebuilding a revision replays at most
+that many deltas. Payloads are zlib-compressed JSON, so a delta costs roughly the size
+of the edit rather than the article.
+
+Delta format: a list of ops over the predecessor's lines (split keeping line endings):
+  [i1, i2]   copy predecessor lines i1..i2
+  "text"     insert text
+"""
+import difflib
+import hashlib
+import json
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from . import models
+except ImportError:
+    import models
+
+# Full-text keyframe every N revisions bounds reconstruction to N - 1 delta applications
+REVISION_KEYFRAME_INTERVAL = int(os.getenv("REVISION_KEYFRAME_INTERVAL", "20"))
+
+
+def content_hash(content: Optional[str]) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def make_delta(old: str, new: str) -> List:
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old: str, ops: List) -> str:
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def encode(payload) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def decode(data: bytes):
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def record(db, slug: str, title: Optional[str], content: Optional[str], previous: Optional[str] = None) -> models.ArticleRevision:
+    """
+    Appends a revision for the article's new title/content. `previous` is the content being
+    replaced; the delta is taken against it when it matches the last stored revision.
+    The caller commits.
+    """
+    content = content or ""
+    last = db.query(models.ArticleRevision).filter(
+        models.ArticleRevision.slug == slug
+    ).order_by(models.ArticleRevision.number.desc()).first()
+
+    number = last.number + 1 if last else 1
+    delta_ok = (
+        last is not None
+        and previous is not None
+        and last.content_hash == content_hash(previous)
+        and number - last.keyframe < REVISION_KEYFRAME_INTERVAL
+    )
+    if delta_ok:
+        kind, keyframe, data = "delta", last.keyframe, encode(make_delta(previous, content))
+    else:
+        kind, keyframe, data = "full", number, encode(content)
+
+    revision = models.ArticleRevision(
+        slug=slug,
+        number=number,
+        kind=kind,
+        keyframe=keyframe,
+        title=title,
+        content_hash=content_hash(content),
+        size=len(content),
+        data=data
+    )
+    db.add(revision)
+    return revision
+
+
+def _chain(db, slug: str, first: int, last: int) -> List[models.ArticleRevision]:
+    """Rows from the keyframe of `first` through `last`, oldest first, in two indexed queries."""
+    start = db.query(models.ArticleRevision.keyframe).filter(
+        models.ArticleRevision.slug == slug, models.ArticleRevision.number == first
+    ).scalar()
+    if start is None:
+        return []
+    return db.query(models.ArticleRevision).filter(
+        models.ArticleRevision.slug == slug,
+        models.ArticleRevision.number >= start,
+        models.ArticleRevision.number <= last
+    ).order_by(models.ArticleRevision.number).all()
+
+
+def contents(db, slug: str, numbers: List[int]) -> Dict[int, str]:
+    """
+    Reconstructs the content of several revisions in one pass: the chain is read once
+    from the keyframe of the lowest number and replayed forward. Unknown numbers are omitted.
+    """
+    wanted = set(numbers)
+    if not wanted:
+        return {}
+    found = {}
+    text = ""
+    for row in _chain(db, slug, min(wanted), max(wanted)):
+        text = decode(row.data) if row.kind == "full" else apply_delta(text, decode(row.data))
+        if row.number in wanted:
+            found[row.number] = text
+    return found
+
+
+def diff(db, slug: str, old: int, new: int, context: int = 3) -> Optional[Tuple[str, Dict]]:
+    """Unified diff between two revisions, with added/removed line counts. None if either is missing."""
+    texts = contents(db, slug, [old, new])
+    if old not in texts or new not in texts:
+        return None
+    lines = list(difflib.unified_diff(
+        texts[old].splitlines(keepends=True),
+        texts[new].splitlines(keepends=True),
+        fromfile=f"{slug}@{old}",
+        tofile=f"{slug}@{new}",
+        n=context
+    ))
+    stats = {
+        "added": sum(1 for line in lines if line.startswith("+") and not line.startswith("+++")),
+        "removed": sum(1 for line in lines if line.startswith("-") and not line.startswith("---"))
+    }
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines), stats
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+try:
+    from moltapedia import database, models
+except ImportError:
+    import database, models
+
+def migrate():
+    db = next(database.get_db())
+    print("Adding 'content_hash' column to articles table...")
+    try:
+        db.execute(text("ALTER TABLE articles ADD COLUMN content_hash VARCHAR;"))
+        db.commit()
+        print("Added content_hash column.")
+    except Exception as e:
+        if "already exists" in str(e) or "duplicate column" in str(e):
+            print("Column content_hash already exists.")
+        else:
+            print(f"Error adding content_hash column: {e}")
+        db.rollback()
+
+    print("Backfilling content hashes...")
+    try:
+        # Read through the ORM so compressed content is hashed decoded
+        rows = db.query(models.Article.slug, models.Article.content).filter(
+            models.Article.content_hash.is_(None), models.Article.content.isnot(None)
+        ).all()
+        updates = [{"slug": row.slug, "content_hash": models.hash_content(row.content)} for row in rows]
+        for start in range(0, len(updates), 1000):
+            db.execute(text("UPDATE articles SET content_hash = :content_hash WHERE slug = :slug"), updates[start:start + 1000])
+        db.commit()
+        print(f"Hashed {len(updates)} articles.")
+    except Exception as e:
+        print(f"Error backfilling content hashes: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+try:
+    from moltapedia import database
+except ImportError:
+    import database
+
+# Indexes backing the filters on GET /api/isomorphisms; new databases get them from create_all
+INDEXES = {
+    "ix_isomorphisms_article_a_slug": "article_a_slug",
+    "ix_isomorphisms_article_b_slug": "article_b_slug",
+    "ix_isomorphisms_status": "status",
+    "ix_isomorphisms_created_at": "created_at",
+}
+
+def migrate():
+    db = next(database.get_db())
+    print("Adding filter indexes to isomorphisms table...")
+    for name, column in INDEXES.items():
+        try:
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON isomorphisms ({column});"))
+            db.commit()
+            print(f"Index {name} ready.")
+        except Exception as e:
+            print(f"Error creating index {name}: {e}")
+            db.rollback()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,22 @@
+from sqlalchemy import text
+try:
+    from moltapedia import database
+except ImportError:
+    import database
+
+def migrate():
+    db = next(database.get_db())
+    print("Adding 'embedder' column to article_vectors table...")
+    try:
+        db.execute(text("ALTER TABLE article_vectors ADD COLUMN embedder VARCHAR;"))
+        db.commit()
+        print("Added embedder column. Re-run /isomorphisms/index/content so hybrid search can use existing vectors.")
+    except Exception as e:
+        if "already exists" in str(e) or "duplicate column" in str(e):
+            print("Column embedder already exists.")
+        else:
+            print(f"Error adding embedder column: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,18 @@
+try:
+    from moltapedia import database, knowledge_graph
+except ImportError:
+    import database, knowledge_graph
+
+def backfill():
+    db = next(database.get_db())
+    print("Parsing article content into article_links...")
+    try:
+        count = knowledge_graph.rebuild_links(db)
+        db.commit()
+        print(f"Stored {count} links.")
+    except Exception as e:
+        print(f"Error backfilling article links: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,18 @@
+try:
+    from moltapedia import database, knowledge_graph
+except ImportError:
+    import database, knowledge_graph
+
+def backfill():
+    db = next(database.get_db())
+    print("Seeding stale_links from a full outdated-link scan...")
+    try:
+        count = knowledge_graph.rebuild_stale(db)
+        db.commit()
+        print(f"Marked {count} stale links.")
+    except Exception as e:
+        print(f"Error backfilling stale links: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,70 @@
+from sqlalchemy import bindparam, func, select, text
+try:
+    from moltapedia import database, models
+except ImportError:
+    import database, models
+
+# (model, column) pairs stored as CompressedText
+COLUMNS = [
+    (models.Article, "content"),
+    (models.Article, "relational_map"),
+    (models.TaskSubmission, "content"),
+]
+BATCH_SIZE = 500
+
+def convert_postgres_columns(db):
+    """Text -> BYTEA, marking existing values raw (0x00 header) so they stay readable."""
+    for model, name in COLUMNS:
+        table = model.__tablename__
+        data_type = db.execute(text(
+            "SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = :column"
+        ), {"table": table, "column": name}).scalar()
+        if data_type == "bytea":
+            print(f"{table}.{name} is already BYTEA.")
+            continue
+        db.execute(text(
+            f"ALTER TABLE {table} ALTER COLUMN {name} TYPE BYTEA USING ('\\x00'::bytea || convert_to({name}, 'UTF8'))"
+        ))
+        db.commit()
+        print(f"Converted {table}.{name} to BYTEA.")
+
+def recompress(db, model, name):
+    """Rewrites every value through CompressedText with the current dictionary, in primary-key batches."""
+    table = model.__table__
+    pk = list(table.primary_key.columns)[0]
+    column = table.c[name]
+    update = table.update().where(pk == bindparam("_pk")).values({name: bindparam("_value", type_=column.type)})
+
+    count = raw = 0
+    last = None
+    while True:
+        query = table.select().with_only_columns(pk, column).where(column.isnot(None)).order_by(pk).limit(BATCH_SIZE)
+        if last is not None:
+            query = query.where(pk > last)
+        batch = db.execute(query).fetchall()
+        if not batch:
+            break
+        db.execute(update, [{"_pk": row[0], "_value": row[1]} for row in batch])
+        db.commit()
+        count += len(batch)
+        raw += sum(len(row[1].encode("utf-8")) for row in batch)
+        last = batch[-1][0]
+    stored = db.execute(select(func.coalesce(func.sum(func.length(column)), 0))).scalar()
+    print(f"{table.name}.{name}: {count} values, {raw / 1e6:.2f} MB -> {stored / 1e6:.2f} MB")
+
+def migrate():
+    db = next(database.get_db())
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            convert_postgres_columns(db)
+        models.use_compression_dictionaries(db.get_bind())
+        models.codec.reload()
+        print(f"Compressing with dictionary {models.codec.active_id or 'none'}...")
+        for model, name in COLUMNS:
+            recompress(db, model, name)
+    except Exception as e:
+        print(f"Error compressing text columns: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    migrate()
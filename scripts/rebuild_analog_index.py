@@ -0,0 +1,18 @@
+try:
+    from moltapedia import database, isomorphism_index
+except ImportError:
+    import database, isomorphism_index
+
+def rebuild():
+    db = next(database.get_db())
+    print("Rebuilding analog class index from verified isomorphisms...")
+    try:
+        count = isomorphism_index.rebuild(db)
+        db.commit()
+        print(f"Indexed {count} verified isomorphisms.")
+    except Exception as e:
+        print(f"Error rebuilding analog index: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    rebuild()
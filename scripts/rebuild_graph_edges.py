@@ -0,0 +1,18 @@
+try:
+    from moltapedia import database, knowledge_graph
+except ImportError:
+    import database, knowledge_graph
+
+def rebuild():
+    db = next(database.get_db())
+    print("Rebuilding article_edges from content, citations and verified isomorphisms...")
+    try:
+        count = knowledge_graph.rebuild(db)
+        db.commit()
+        print(f"Stored {count} edges.")
+    except Exception as e:
+        print(f"Error rebuilding graph edges: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,26 @@
+try:
+    from moltapedia import database, models, revisions
+except ImportError:
+    import database, models, revisions
+
+def seed():
+    db = next(database.get_db())
+    print("Recording a base revision for articles without history...")
+    try:
+        tracked = {slug for (slug,) in db.query(models.ArticleRevision.slug).distinct()}
+        count = 0
+        for slug, title, content in db.query(models.Article.slug, models.Article.title, models.Article.content).yield_per(500):
+            if slug in tracked:
+                continue
+            revisions.record(db, slug, title, content)
+            count += 1
+            if count % 500 == 0:
+                db.flush()
+        db.commit()
+        print(f"Seeded {count} articles.")
+    except Exception as e:
+        print(f"Error seeding revisions: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    seed()
@@ -0,0 +1,33 @@
+import sys
+try:
+    from moltapedia import compressed, database, models
+except ImportError:
+    import compressed, database, models
+
+# zstd needs a reasonable spread of samples; below this the dictionary tends to hurt
+MIN_SAMPLES = 100
+
+def train(size=64 * 1024, max_samples=20000):
+    db = next(database.get_db())
+    print("Collecting article and submission bodies...")
+    try:
+        samples = []
+        for column in (models.Article.content, models.TaskSubmission.content, models.Article.relational_map):
+            for (value,) in db.query(column).filter(column.isnot(None)).limit(max_samples).yield_per(500):
+                if len(value.encode("utf-8")) >= compressed.COMPRESSION_MIN_BYTES:
+                    samples.append(value)
+        samples = samples[:max_samples]
+        if len(samples) < MIN_SAMPLES:
+            print(f"Only {len(samples)} values large enough to compress; need {MIN_SAMPLES}. Nothing trained.")
+            return
+        dictionary = compressed.train_dictionary(samples, size=size)
+        db.add(models.CompressionDictionary(dict_id=dictionary.dict_id(), data=dictionary.as_bytes(), samples=len(samples)))
+        db.commit()
+        print(f"Stored dictionary {dictionary.dict_id()} ({len(dictionary.as_bytes())} bytes, {len(samples)} samples).")
+        print("New writes use it once workers restart; run scripts/compress_text_columns.py to recompress existing rows.")
+    except Exception as e:
+        print(f"Error training compression dictionary: {e}")
+        db.rollback()
+
+if __name__ == "__main__":
+    train(size=int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024)
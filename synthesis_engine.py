@@ -1,3 +1,4 @@
+import hashlib
 import json
 import sys
 import os
@@ -6,24 +7,28 @@ import os
 sys.path.append(os.path.join(os.getcwd(), "moltapedia"))
 
 try:
-    from database import SessionLocal
-    from models import Article, Isomorphism as IsomorphismModel
+    from database import SessionLocal, engine as db_engine
+    from models import Article, ArticleDerivation, Isomorphism as IsomorphismModel
+    import article_sync
+
+    # Writes per transaction in batch mode
+    SYNTHESIS_CHUNK_SIZE = int(os.getenv("SYNTHESIS_CHUNK_SIZE", "100"))
+
+    def input_hash(iso, article_a, article_b) -> str:
+        """Fingerprint of everything a primitive is derived from; an unchanged hash means an unchanged primitive."""
+        payload = json.dumps([
+            article_a.slug, article_a.title, article_a.relational_map,
+            article_b.slug, article_b.title, article_b.relational_map,
+            iso.mapping_table
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
 
     class SynthesisEngine:
         def __init__(self, db_session):
             self.db = db_session
 
-        def synthesize(self, iso_id: int, title_override=None, content_override=None):
-            iso = self.db.query(IsomorphismModel).filter(IsomorphismModel.id == iso_id).first()
-            if not iso:
-                return "Isomorphism not found."
-
-            article_a = self.db.query(Article).filter(Article.slug == iso.article_a_slug).first()
-            article_b = self.db.query(Article).filter(Article.slug == iso.article_b_slug).first()
-
-            if not article_a or not article_b:
-                return "Source articles not found."
-
+        def build_primitive(self, iso, article_a, article_b, title_override=None, content_override=None):
+            """Returns (slug, title, content, relational_map) for the primitive of one isomorphism."""
             mapping = json.loads(iso.mapping_table)
             
             # 1. Merge Predicates (Intersection + Mapped Properties)
@@ -33,7 +38,7 @@ try:
             preds_a = set(rel_a.get("predicates", []))
             preds_b = set(rel_b.get("predicates", []))
             
-            shared_logic = list(preds_a.intersection(preds_b))
+            shared_logic = sorted(preds_a.intersection(preds_b))
             
             # Extract mapped latent properties
             latent_a = {p["name"]: p for p in rel_a.get("latent_properties", [])}
@@ -68,44 +73,139 @@ try:
                     for pred in shared_logic:
                         content += f"- {pred}\n"
 
+            relational_map = {
+                "predicates": shared_logic,
+                "mapped_properties": mapped_properties,
+                "mapping_ref": iso.id,
+                "is_primitive": True
+            }
+            return primitive_slug, primitive_title, content, relational_map
+
+        def write_primitive(self, slug, title, content, relational_map, existing=None) -> Article:
+            """
+            Creates or rewrites a primitive through the same path as sync_article, so its
+            full-text entry, links, revision history and stale marks stay current.
+            The caller commits; running API workers pick the primitive up on their next
+            keyword-index refresh.
+            """
+            record = article_sync.ArticleUpdate(
+                slug=slug,
+                title=title,
+                content=content,
+                # New primitives only: an existing one keeps any domain or archive flag set since
+                domain=None if existing else "Primitive",
+                is_archived=None if existing else False,
+                relational_map=relational_map
+            )
+            return article_sync.apply_article_update(slug, record, existing, self.db)
+
+        def record_input_hash(self, slug, value, derivation=None) -> ArticleDerivation:
+            """Remembers what a primitive was built from, so batch mode can skip it until that changes."""
+            if derivation is None:
+                derivation = self.db.query(ArticleDerivation).filter(
+                    ArticleDerivation.slug == slug, ArticleDerivation.kind == "synthesis"
+                ).first()
+            if derivation is None:
+                derivation = ArticleDerivation(slug=slug, kind="synthesis")
+                self.db.add(derivation)
+            derivation.input_hash = value
+            return derivation
+
+        def synthesize(self, iso_id: int, title_override=None, content_override=None):
+            iso = self.db.query(IsomorphismModel).filter(IsomorphismModel.id == iso_id).first()
+            if not iso:
+                return "Isomorphism not found."
+
+            articles = {
+                a.slug: a for a in self.db.query(Article).filter(
+                    Article.slug.in_([iso.article_a_slug, iso.article_b_slug])
+                ).all()
+            }
+            article_a = articles.get(iso.article_a_slug)
+            article_b = articles.get(iso.article_b_slug)
+
+            if not article_a or not article_b:
+                return "Source articles not found."
+
+            primitive_slug, primitive_title, content, relational_map = self.build_primitive(
+                iso, article_a, article_b, title_override, content_override
+            )
+
             # 3. Upsert Article (Update if exists)
             existing = self.db.query(Article).filter(Article.slug == primitive_slug).first()
+            primitive = self.write_primitive(primitive_slug, primitive_title, content, relational_map, existing)
+            self.record_input_hash(primitive_slug, input_hash(iso, article_a, article_b))
+            self.db.commit()
             if existing:
-                existing.title = primitive_title
-                existing.content = content
-                existing.relational_map = json.dumps({
-                    "predicates": shared_logic,
-                    "mapped_properties": mapped_properties,
-                    "mapping_ref": iso.id,
-                    "is_primitive": True
-                })
-                self.db.commit()
                 return f"Updated Primitive: {primitive_slug}"
-            
-            new_article = Article(
-                title=primitive_title,
-                slug=primitive_slug,
-                domain="Primitive",
-                content=content,
-                relational_map=json.dumps({
-                    "predicates": shared_logic,
-                    "mapped_properties": mapped_properties,
-                    "mapping_ref": iso.id,
-                    "is_primitive": True
-                }),
-                is_archived=False
-            )
-            
-            self.db.add(new_article)
-            self.db.commit()
             return f"Synthesized Primitive: {primitive_slug}"
 
+        def synthesize_all(self, chunk_size: int = SYNTHESIS_CHUNK_SIZE, force: bool = False):
+            """
+            Batch mode: (re)synthesizes the primitive of every verified isomorphism.
+            Source articles and existing primitives are prefetched in bulk; a primitive whose
+            input hash matches the stored one is left untouched unless `force`.
+            Writes are committed every `chunk_size` primitives.
+            """
+            isos = self.db.query(IsomorphismModel).filter(
+                IsomorphismModel.status == "verified"
+            ).order_by(IsomorphismModel.id.asc()).all()
+
+            slugs = {iso.article_a_slug for iso in isos} | {iso.article_b_slug for iso in isos}
+            articles = {a.slug: a for a in self.db.query(Article).filter(Article.slug.in_(slugs)).all()}
+            primitive_slugs = {f"primitive-{iso.article_a_slug}-{iso.article_b_slug}" for iso in isos}
+            primitives = {a.slug: a for a in self.db.query(Article).filter(Article.slug.in_(primitive_slugs)).all()}
+            derivations = {
+                d.slug: d for d in self.db.query(ArticleDerivation).filter(
+                    ArticleDerivation.kind == "synthesis", ArticleDerivation.slug.in_(primitive_slugs)
+                ).all()
+            }
+
+            summary = {"created": 0, "updated": 0, "unchanged": 0, "missing_sources": 0}
+            pending = []
+            for iso in isos:
+                article_a = articles.get(iso.article_a_slug)
+                article_b = articles.get(iso.article_b_slug)
+                if not article_a or not article_b:
+                    summary["missing_sources"] += 1
+                    continue
+
+                existing = primitives.get(f"primitive-{article_a.slug}-{article_b.slug}")
+                derivation = derivations.get(f"primitive-{article_a.slug}-{article_b.slug}")
+                fingerprint = input_hash(iso, article_a, article_b)
+                if existing and derivation and not force and derivation.input_hash == fingerprint:
+                    summary["unchanged"] += 1
+                    continue
+
+                primitive_slug, primitive_title, content, relational_map = self.build_primitive(iso, article_a, article_b)
+                primitive = self.write_primitive(primitive_slug, primitive_title, content, relational_map, existing)
+                primitives[primitive_slug] = primitive
+                derivations[primitive_slug] = self.record_input_hash(primitive_slug, fingerprint, derivation)
+                summary["updated" if existing else "created"] += 1
+
+                pending.append(primitive)
+                if len(pending) >= chunk_size:
+                    self.flush(pending)
+
+            if pending:
+                self.flush(pending)
+            return summary
+
+        def flush(self, written):
+            self.db.commit()
+            written.clear()
+
     if __name__ == "__main__":
+        article_sync.prepare_database(db_engine) # Full-text and compression setup that apply_article_update relies on
         db = SessionLocal()
         engine = SynthesisEngine(db)
-        # Assuming ID 1 for testing purposes if it exists
-        res = engine.synthesize(1)
-        print(res)
+        if "--all" in sys.argv:
+            # Nightly regeneration: only primitives whose inputs moved are rewritten
+            print(engine.synthesize_all(force="--force" in sys.argv))
+        else:
+            # Assuming ID 1 for testing purposes if it exists
+            res = engine.synthesize(1)
+            print(res)
         db.close()
 
 except Exception as e:
@@ -0,0 +1,55 @@
+"""
+Shared fixtures. Every test runs against a throwaway SQLite database and embedded vector
+store; both are configured here, before any project module creates its engine.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="moltapedia-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/test.db"
+os.environ["VECTOR_DB_URL"] = f"local://{WORKDIR}/vectors"
+os.environ["EMBEDDING_BACKEND"] = "hashing"
+
+import database  # noqa: E402
+import models  # noqa: E402
+from sqlalchemy import inspect, text  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A session on an emptied database (tables are created once and cleared per test)."""
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        # Full-text structures live outside the ORM metadata
+        existing = set(inspect(conn).get_table_names())
+        if "article_fts" in existing:
+            conn.execute(text("INSERT INTO article_fts (article_fts) VALUES ('delete-all')"))
+        if "article_fts_docs" in existing:
+            conn.execute(text("DELETE FROM article_fts_docs"))
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        main.schema.get()
+        yield client
+
+
+@pytest.fixture
+def client(app_client, db):
+    """The API on an emptied database."""
+    return app_client
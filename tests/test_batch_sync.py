@@ -0,0 +1,82 @@
+import hashlib
+
+import models
+
+
+def sha(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sync(client, *records):
+    response = client.post("/articles/sync/batch", json={"articles": list(records)})
+    assert response.status_code == 200, response.text
+    return {r["slug"]: r["status"] for r in response.json()["results"]}
+
+
+def test_create_then_unchanged(client):
+    record = {"slug": "fungi", "title": "Fungi", "content": "Mycelium.", "domain": "Bio", "content_hash": sha("Mycelium.")}
+    assert sync(client, record) == {"fungi": "created"}
+    assert sync(client, record) == {"fungi": "unchanged"}
+    # Hash only, matching what the server holds
+    assert sync(client, {"slug": "fungi", "title": "Fungi", "content_hash": sha("Mycelium.")}) == {"fungi": "unchanged"}
+
+
+def test_hash_only_changes_ask_for_content(client, db):
+    sync(client, {"slug": "fungi", "title": "Fungi", "content": "Mycelium."})
+    result = sync(
+        client,
+        {"slug": "fungi", "content_hash": sha("Mycelium, edited.")},
+        {"slug": "new", "title": "New", "content_hash": sha("anything")},
+    )
+    assert result == {"fungi": "needs_content", "new": "needs_content"}
+    assert db.query(models.Article).filter_by(slug="fungi").one().content == "Mycelium."
+    assert db.query(models.Article).filter_by(slug="new").first() is None
+
+    assert sync(client, {"slug": "fungi", "content": "Mycelium, edited.", "content_hash": sha("Mycelium, edited.")}) == {"fungi": "updated"}
+    db.expire_all()
+    assert db.query(models.Article).filter_by(slug="fungi").one().content == "Mycelium, edited."
+
+
+def test_mismatched_hash_is_rejected_per_record(client, db):
+    result = sync(
+        client,
+        {"slug": "bad", "title": "Bad", "content": "text", "content_hash": sha("other text")},
+        {"slug": "good", "title": "Good", "content": "text"},
+    )
+    assert result == {"bad": "error", "good": "created"}
+    assert db.query(models.Article).filter_by(slug="bad").first() is None
+
+
+def test_metadata_changes_are_not_skipped(client):
+    sync(client, {"slug": "fungi", "title": "Fungi", "content": "x", "domain": "Bio", "relational_map": {"predicates": ["p"]}})
+    base = {"slug": "fungi", "content_hash": sha("x")}
+    assert sync(client, {**base, "title": "Fungi"}) == {"fungi": "unchanged"}
+    assert sync(client, {**base, "title": "Fungal networks"}) == {"fungi": "updated"}
+    assert sync(client, {**base, "domain": "Ecology"}) == {"fungi": "updated"}
+    assert sync(client, {**base, "relational_map": {"predicates": ["p"]}}) == {"fungi": "unchanged"}
+    assert sync(client, {**base, "relational_map": {"predicates": ["q"]}}) == {"fungi": "updated"}
+    assert sync(client, {**base, "is_archived": True}) == {"fungi": "updated"}
+    assert sync(client, {**base, "is_archived": True}) == {"fungi": "unchanged"}
+
+
+def test_status_survives_a_sync_without_is_archived(client, db):
+    sync(client, {"slug": "fungi", "title": "Fungi", "content": "x", "status": "needs-review"})
+    assert sync(client, {"slug": "fungi", "content_hash": sha("x"), "status": "needs-review"}) == {"fungi": "unchanged"}
+    assert sync(client, {"slug": "fungi", "content": "y"}) == {"fungi": "updated"}
+    assert db.query(models.Article).filter_by(slug="fungi").one().status == "needs-review"
+
+
+def test_batch_limits(client):
+    duplicate = client.post("/articles/sync/batch", json={"articles": [{"slug": "a"}, {"slug": "a"}]})
+    assert duplicate.status_code == 400
+    too_many = client.post("/articles/sync/batch", json={"articles": [{"slug": f"a{i}"} for i in range(1001)]})
+    assert too_many.status_code == 400
+
+
+def test_batch_writes_revisions_and_search_entries(client, db):
+    sync(client, {"slug": "fungi", "title": "Fungi", "content": "Mycelium spreads underground."})
+    sync(client, {"slug": "fungi", "content": "Mycelium spreads underground.\nIt trades sugars."})
+    assert [r.number for r in db.query(models.ArticleRevision).filter_by(slug="fungi")] == [1, 2]
+    hits = client.get("/api/articles/search", params={"q": "sugars"}).json()["items"]
+    assert [h["slug"] for h in hits] == ["fungi"]
+    assert client.get("/api/articles/search", params={"q": "nonexistentword"}).json()["items"] == []
@@ -0,0 +1,117 @@
+import zlib
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, insert, select, text
+from sqlalchemy.orm import declarative_base
+
+import compressed
+
+needs_zstd = pytest.mark.skipif(compressed.zstandard is None, reason="zstandard is not installed")
+
+LONG = "The mycelial network routes nutrients around damaged hyphae. " * 40
+
+
+def codec():
+    c = compressed.Codec(level=3, min_bytes=256)
+    c.set_dictionaries([])
+    return c
+
+
+def test_short_values_are_stored_raw():
+    encoded = codec().encode("short")
+    assert encoded == compressed.RAW + b"short"
+    assert codec().decode(encoded) == "short"
+
+
+def test_long_values_are_compressed():
+    c = codec()
+    encoded = c.encode(LONG)
+    expected = compressed.ZSTD if compressed.zstandard is not None else compressed.ZLIB
+    assert encoded[:1] == expected
+    assert len(encoded) < len(LONG) // 4
+    assert c.decode(encoded) == LONG
+
+
+def test_values_that_do_not_shrink_are_stored_raw():
+    # Past the size threshold, but a compressed frame would be larger than the text
+    c = compressed.Codec(min_bytes=0)
+    c.set_dictionaries([])
+    assert c.encode("ab") == compressed.RAW + b"ab"
+    assert c.decode(c.encode("ab")) == "ab"
+
+
+@pytest.mark.parametrize("value", [None, "plain text left by a TEXT column"])
+def test_legacy_and_missing_values_pass_through(value):
+    assert codec().decode(value) == value
+
+
+def test_headerless_bytes_decode_as_utf8():
+    assert codec().decode("converted ünicode".encode("utf-8")) == "converted ünicode"
+
+
+def test_zlib_values_stay_readable():
+    assert codec().decode(compressed.ZLIB + zlib.compress(LONG.encode("utf-8"))) == LONG
+
+
+@needs_zstd
+def test_dictionary_frames_record_their_dictionary():
+    samples = [f"Article {i}: the {w} network shares resources between distant nodes.\n" * 8
+               for i, w in enumerate(["fungal", "peer", "neural", "market", "road"] * 40)]
+    dictionary = compressed.train_dictionary(samples, size=4096)
+    writer = compressed.Codec(min_bytes=0)
+    writer.set_dictionaries([(dictionary.dict_id(), dictionary.as_bytes())])
+    value = "Article 999: the lichen network shares resources between distant nodes.\n" * 8
+    encoded = writer.encode(value)
+
+    assert compressed.zstandard.get_frame_parameters(encoded[1:]).dict_id == dictionary.dict_id()
+    assert writer.decode(encoded) == value
+
+    # A process that has not loaded the dictionary reloads once, then refuses
+    reader = compressed.Codec()
+    reader.set_dictionaries([])
+    with pytest.raises(ValueError, match="Unknown compression dictionary"):
+        reader.decode(encoded)
+    reader.loader = lambda: [(dictionary.dict_id(), dictionary.as_bytes())]
+    assert reader.decode(encoded) == value
+
+
+def test_compressed_text_column_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(compressed.codec, "loader", None)
+    compressed.codec.set_dictionaries([])
+    Base = declarative_base()
+
+    class Row(Base):
+        __tablename__ = "rows"
+        id = Column(Integer, primary_key=True)
+        body = Column(compressed.CompressedText)
+
+    engine = create_engine(f"sqlite:///{tmp_path}/rows.db")
+    Base.metadata.create_all(engine)
+    values = {1: "tiny", 2: LONG, 3: None}
+    with engine.begin() as conn:
+        conn.execute(insert(Row.__table__), [{"id": k, "body": v} for k, v in values.items()])
+        # A row written as TEXT before the column switched type
+        conn.execute(text("INSERT INTO rows (id, body) VALUES (4, 'legacy text')"))
+    with engine.connect() as conn:
+        stored = dict(conn.execute(text("SELECT id, body FROM rows")).fetchall())
+        read = dict(conn.execute(select(Row.id, Row.body)).fetchall())
+    engine.dispose()
+
+    assert stored[1] == compressed.RAW + b"tiny"
+    assert len(stored[2]) < len(LONG)
+    assert read == {**values, 4: "legacy text"}
+
+
+def test_text_columns_only_checks_postgres(tmp_path):
+    Base = declarative_base()
+
+    class Doc(Base):
+        __tablename__ = "docs"
+        id = Column(Integer, primary_key=True)
+        body = Column(compressed.CompressedText)
+        title = Column(String)
+
+    engine = create_engine(f"sqlite:///{tmp_path}/docs.db")
+    Base.metadata.create_all(engine)
+    assert compressed.text_columns(engine, Base.metadata) == []
+    engine.dispose()
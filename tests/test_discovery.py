@@ -0,0 +1,106 @@
+import datetime
+import random
+
+import pytest
+
+import main
+import models
+import isomorphism
+
+
+@pytest.fixture
+def index(client, request):
+    """Indexes articles with vectors near a per-test random direction, so pairs clear the floor."""
+    rng = random.Random(request.node.name)
+    base = [rng.gauss(0, 1) for _ in range(isomorphism.EMBEDDING_DIM)]
+
+    def index_article(slug, domain, sync=True):
+        if sync:
+            client.post(f"/articles/{slug}/sync", json={"slug": slug, "title": slug, "domain": domain})
+        vector = [x + rng.gauss(0, 0.1) for x in base]
+        response = client.post("/isomorphisms/index", json={"slug": slug, "vector": vector})
+        assert response.status_code == 200, response.text
+    return index_article
+
+
+def run(client, **params):
+    response = client.post("/isomorphisms/discovery/run", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def pairs(client):
+    candidates = client.get("/isomorphisms/discovery").json()["candidates"]
+    return {tuple(sorted((c["source"], c["target"]))) for c in candidates}
+
+
+def test_incremental_runs_only_rescan_changed_vectors(client, index):
+    index("fungi", "Bio")
+    index("moss", "Bio")
+    index("p2p", "CS")
+
+    first = run(client)
+    assert first["full_scan"] and first["articles_scanned"] == 3
+    assert pairs(client) == {("fungi", "p2p"), ("moss", "p2p")}
+
+    assert run(client)["articles_scanned"] == 0
+
+    # Re-indexing one article re-searches it and the unchanged ends of its pairs
+    index("fungi", "Bio", sync=False)
+    again = run(client)
+    assert not again["full_scan"] and again["articles_scanned"] == 2
+    assert pairs(client) == {("fungi", "p2p"), ("moss", "p2p")}
+
+
+def test_domain_change_requeues_the_article(client, index):
+    index("fungi", "Bio")
+    index("p2p", "CS")
+    run(client)
+    assert pairs(client) == {("fungi", "p2p")}
+
+    client.post("/articles/p2p/sync", json={"slug": "p2p", "domain": "Bio"})
+    assert run(client)["articles_scanned"] >= 1
+    assert pairs(client) == set()
+
+
+def test_failed_search_keeps_candidates_and_watermark(client, index, db, monkeypatch):
+    index("fungi", "Bio")
+    index("p2p", "CS")
+    watermark = run(client)["watermark"]
+    index("fungi", "Bio", sync=False)
+
+    engine = main.get_engine()
+    get_vector = engine.get_vector
+
+    async def failing(slug):
+        if slug == "fungi":
+            raise RuntimeError("vector store down")
+        return await get_vector(slug)
+    monkeypatch.setattr(engine, "get_vector", failing)
+
+    response = client.post("/isomorphisms/discovery/run")
+    assert response.status_code == 502
+    assert pairs(client) == {("fungi", "p2p")}
+    assert db.query(models.DiscoveryRun).filter(models.DiscoveryRun.finished_at.is_(None)).count() == 0
+    assert main.get_discovery_watermark(db).isoformat() == watermark
+
+    # The next run picks the same article up again
+    monkeypatch.setattr(engine, "get_vector", get_vector)
+    assert run(client)["articles_scanned"] == 2
+    assert pairs(client) == {("fungi", "p2p")}
+
+
+def test_open_run_blocks_a_second_one(client, index, db):
+    index("fungi", "Bio")
+    open_run = models.DiscoveryRun(started_at=datetime.datetime.utcnow())
+    db.add(open_run)
+    db.commit()
+
+    response = client.post("/isomorphisms/discovery/run")
+    assert response.status_code == 409
+    assert db.query(models.DiscoveryRun).count() == 1
+
+    # A run left open past the timeout is taken to have crashed
+    open_run.started_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=main.DISCOVERY_RUN_TIMEOUT_S + 60)
+    db.commit()
+    assert run(client)["full_scan"]
@@ -0,0 +1,77 @@
+import json
+
+import isomorphism_index
+import models
+
+
+def verify(db, slug_a, slug_b, mapping):
+    iso = models.Isomorphism(article_a_slug=slug_a, article_b_slug=slug_b, mapping_table=json.dumps(mapping), status="verified")
+    db.add(iso)
+    db.flush()
+    isomorphism_index.add_verified(db, iso)
+    db.commit()
+    return iso
+
+
+def mapping(db, source, target):
+    row = isomorphism_index.lookup(db, source, target)
+    return json.loads(row.mapping) if row else None
+
+
+def test_compose_and_invert():
+    assert isomorphism_index.compose({"a": "x", "b": "y"}, {"x": 1, "y": 2}) == {"a": 1, "b": 2}
+    # Nodes without an image on the second hop drop out
+    assert isomorphism_index.compose({"a": "x", "b": "z"}, {"x": 1}) == {"a": 1}
+    assert isomorphism_index.compose(None, {"x": 1}) == {"x": 1}
+    assert isomorphism_index.invert({"a": "x"}) == {"x": "a"}
+
+
+def test_mappings_compose_along_paths(db):
+    first = verify(db, "fungi", "p2p", {"hypha": "link", "spore": "packet"})
+    second = verify(db, "p2p", "roads", {"link": "road", "packet": "car"})
+
+    assert isomorphism_index.members(db, "fungi") == ["fungi", "p2p", "roads"]
+    assert mapping(db, "fungi", "roads") == {"hypha": "road", "spore": "car"}
+    assert mapping(db, "roads", "fungi") == {"road": "hypha", "car": "spore"}
+    row = isomorphism_index.lookup(db, "fungi", "roads")
+    assert row.hops == 2 and json.loads(row.path) == [first.id, second.id]
+    assert [a.target_slug for a in isomorphism_index.analogs(db, "fungi")] == ["p2p", "roads"]
+
+
+def test_union_merges_classes_under_one_root(db):
+    verify(db, "a", "b", {"n": "n"})
+    verify(db, "c", "d", {"n": "n"})
+    assert isomorphism_index.find(db, "a") != isomorphism_index.find(db, "c")
+
+    verify(db, "b", "c", {"n": "n"})
+    roots = {isomorphism_index.find(db, slug) for slug in "abcd"}
+    assert len(roots) == 1
+    # Every member points straight at the root
+    assert {row.root for row in db.query(models.AnalogClass)} == roots
+    assert isomorphism_index.lookup(db, "a", "d").hops == 3
+    assert isomorphism_index.find(db, "unrelated") == "unrelated"
+
+
+def test_shorter_path_replaces_longer_one(db):
+    verify(db, "a", "b", {"n": "m"})
+    verify(db, "b", "c", {"m": "k"})
+    assert isomorphism_index.lookup(db, "a", "c").hops == 2
+
+    direct = verify(db, "a", "c", {"n": "direct"})
+    row = isomorphism_index.lookup(db, "a", "c")
+    assert row.hops == 1 and json.loads(row.path) == [direct.id]
+    assert mapping(db, "a", "c") == {"n": "direct"}
+    assert mapping(db, "c", "a") == {"direct": "n"}
+
+
+def test_rebuild_matches_incremental_index(db):
+    verify(db, "a", "b", {"1": "2"})
+    verify(db, "b", "c", {"2": "3"})
+    verify(db, "d", "c", {"4": "3"})
+    incremental = {(r.source_slug, r.target_slug): (r.mapping, r.hops) for r in db.query(models.AnalogMapping)}
+
+    assert isomorphism_index.rebuild(db) == 3
+    db.commit()
+    rebuilt = {(r.source_slug, r.target_slug): (r.mapping, r.hops) for r in db.query(models.AnalogMapping)}
+    assert rebuilt == incremental
+    assert mapping(db, "a", "d") == {"1": "4"}
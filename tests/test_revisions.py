@@ -0,0 +1,64 @@
+import pytest
+
+import models
+import revisions
+
+
+@pytest.mark.parametrize("old, new", [
+    ("", "first line\n"),
+    ("a\nb\nc\n", "a\nb\nc\n"),
+    ("a\nb\nc\n", "a\nB\nc\nd\n"),
+    ("a\nb\nc\n", "c\n"),
+    ("no trailing newline", "no trailing newline\nnow two lines"),
+    ("x\n" * 50, "y\n" + "x\n" * 49),
+])
+def test_delta_round_trip(old, new):
+    assert revisions.apply_delta(old, revisions.make_delta(old, new)) == new
+
+
+def test_delta_references_unchanged_lines():
+    old = "".join(f"line {i}\n" for i in range(100))
+    new = old.replace("line 50\n", "line fifty\n")
+    ops = revisions.make_delta(old, new)
+    assert ops == [[0, 50], "line fifty\n", [51, 100]]
+
+
+def record_history(db, slug, texts):
+    previous = None
+    for number, text in enumerate(texts, start=1):
+        revisions.record(db, slug, f"{slug} v{number}", text, previous=previous)
+        db.commit()
+        previous = text
+
+
+def test_keyframe_interval_and_reconstruction(db, monkeypatch):
+    monkeypatch.setattr(revisions, "REVISION_KEYFRAME_INTERVAL", 4)
+    texts = ["".join(f"paragraph {j} of version {i if j == i % 5 else 0}\n" for j in range(5)) for i in range(10)]
+    record_history(db, "doc", texts)
+
+    rows = db.query(models.ArticleRevision).filter_by(slug="doc").order_by(models.ArticleRevision.number).all()
+    assert [r.kind for r in rows] == ["full", "delta", "delta", "delta", "full", "delta", "delta", "delta", "full", "delta"]
+    assert [r.keyframe for r in rows] == [1, 1, 1, 1, 5, 5, 5, 5, 9, 9]
+
+    rebuilt = revisions.contents(db, "doc", list(range(1, 11)))
+    assert rebuilt == {i + 1: text for i, text in enumerate(texts)}
+    # A single late revision only needs its own keyframe chain
+    assert revisions.contents(db, "doc", [7]) == {7: texts[6]}
+    assert revisions.contents(db, "doc", [11]) == {}
+
+
+def test_unexpected_previous_starts_a_keyframe(db):
+    record_history(db, "doc", ["one\n", "one\ntwo\n"])
+    # Content changed behind the history's back: a delta against it would not replay
+    revision = revisions.record(db, "doc", "doc", "one\ntwo\nthree\n", previous="something else\n")
+    db.commit()
+    assert revision.kind == "full"
+    assert revisions.contents(db, "doc", [3]) == {3: "one\ntwo\nthree\n"}
+
+
+def test_diff_between_revisions(db):
+    record_history(db, "doc", ["a\nb\nc\n", "a\nB\nc\n", "a\nB\nc\nd\n"])
+    text, stats = revisions.diff(db, "doc", 1, 3)
+    assert stats == {"added": 2, "removed": 1}
+    assert "-b\n" in text and "+B\n" in text and "+d\n" in text
+    assert revisions.diff(db, "doc", 1, 9) is None
@@ -0,0 +1,843 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+from pydantic import BaseModel
+
+
+# Quantized storage modes: mode -> (file suffix, dtype)
+QUANTIZED_DTYPES = {
+    "float16": ("f16", np.float16),
+    "int8": ("i8", np.int8),
+}
+
+
+class ProjectionNotFitted(RuntimeError):
+    """Raised when a PCA-reduced collection is used before its projection was fitted."""
+
+
+class Projection:
+    """
+    Index-time dimensionality reduction applied to both stored and query vectors.
+    Outputs are re-normalized so cosine scores stay comparable.
+    """
+    kind = "identity"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors
+
+    def apply(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        reduced = self._reduce(vectors)
+        norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+        return reduced / np.where(norms == 0, 1.0, norms)
+
+
+class TruncateProjection(Projection):
+    """Matryoshka-style: keep the leading `dim` components (text-embedding-3 models are trained for this)."""
+    kind = "truncate"
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors[..., :self.dim]
+
+
+class PCAProjection(Projection):
+    """Fitted linear projection onto the top `dim` principal components of a sample."""
+    kind = "pca"
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        super().__init__(components.shape[0])
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        return (vectors - self.mean) @ self.components.T
+
+    @classmethod
+    def fit(cls, sample, dim: int) -> "PCAProjection":
+        sample = np.asarray(sample, dtype=np.float32)
+        if sample.ndim != 2 or len(sample) < dim:
+            raise ValueError(f"PCA to {dim} dims needs at least {dim} sample vectors")
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        return cls(mean, vt[:dim])
+
+    def save(self, path: str):
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "PCAProjection":
+        data = np.load(path)
+        return cls(data["mean"], data["components"])
+
+
+def parse_reduction(spec: Optional[str]):
+    """'truncate:512' / 'pca:256' -> (kind, dim); empty or 'none' -> None."""
+    if not spec or spec == "none":
+        return None
+    kind, _, dim = spec.partition(":")
+    if kind not in ("truncate", "pca") or not dim.isdigit():
+        raise ValueError(f"Invalid vector reduction '{spec}'; expected truncate:<dim> or pca:<dim>")
+    return kind, int(dim)
+
+
+class VectorHit(BaseModel):
+    """A point returned by any backend (search hit or retrieved record)."""
+    id: str
+    score: Optional[float] = None
+    payload: Dict = {}
+    vector: Optional[List[float]] = None
+
+
+class VectorBackend:
+    """
+    Interface shared by every vector store behind the IsomorphismEngine.
+    Filters are plain {field: value} dicts: `must` keeps matching points,
+    `must_not` drops them.
+
+    Collection setup is synchronous (it runs once at startup); the data-plane
+    calls are coroutines so vector traffic never blocks the event loop. Each
+    call waits for one of `max_concurrency` slots and is cut off after
+    `timeout` seconds with asyncio.TimeoutError.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_concurrency: int = 16):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def _bounded(self, coro):
+        async with self._slots:
+            return await asyncio.wait_for(coro, self.timeout)
+
+    def ensure_collection(self, name: str, size: int):
+        raise NotImplementedError
+
+    def ensure_payload_index(self, name: str, field: str):
+        raise NotImplementedError
+
+    async def upsert(self, name: str, points: List[Dict]):
+        """points: [{"id": str, "vector": List[float], "payload": dict}]"""
+        raise NotImplementedError
+
+    async def retrieve(self, name: str, ids: List[str], with_vectors: bool = False) -> List[VectorHit]:
+        raise NotImplementedError
+
+    async def search(
+        self,
+        name: str,
+        vector: List[float],
+        limit: int = 5,
+        score_threshold: Optional[float] = None,
+        must: Optional[Dict] = None,
+        must_not: Optional[Dict] = None,
+    ) -> List[VectorHit]:
+        raise NotImplementedError
+
+    async def set_payload(self, name: str, ids: List[str], payload: Dict):
+        raise NotImplementedError
+
+    def collection_dir(self, name: str) -> Optional[str]:
+        """Local directory holding the collection's files, if the backend has one."""
+        return None
+
+    async def close(self):
+        pass
+
+
+class QdrantBackend(VectorBackend):
+    """
+    Remote Qdrant service (the default for the Docker stack).
+    Setup goes through a short-lived sync client; searches and writes share one
+    AsyncQdrantClient whose HTTP pool is sized to the concurrency limit.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0, max_concurrency: int = 16):
+        # Imported here: qdrant-client is optional and takes most of a second to import
+        try:
+            import httpx
+            from qdrant_client import AsyncQdrantClient, QdrantClient, models
+        except ImportError:
+            raise RuntimeError("qdrant-client is not installed; use VECTOR_DB_URL=local://<path> instead")
+        super().__init__(timeout=timeout, max_concurrency=max_concurrency)
+        self.models = models
+        self.client = QdrantClient(url=url, timeout=int(timeout))
+        self.aclient = AsyncQdrantClient(
+            url=url,
+            timeout=int(timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+
+    def ensure_collection(self, name: str, size: int):
+        collections = self.client.get_collections().collections
+        if not any(c.name == name for c in collections):
+            self.client.create_collection(
+                collection_name=name,
+                vectors_config=self.models.VectorParams(size=size, distance=self.models.Distance.COSINE),
+            )
+
+    def ensure_payload_index(self, name: str, field: str):
+        # Idempotent: re-creating an existing payload index is a no-op
+        self.client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=self.models.PayloadSchemaType.KEYWORD,
+        )
+
+    async def upsert(self, name: str, points: List[Dict]):
+        await self._bounded(self.aclient.upsert(
+            collection_name=name,
+            points=[self.models.PointStruct(id=p["id"], vector=p["vector"], payload=p.get("payload", {})) for p in points],
+        ))
+
+    async def retrieve(self, name: str, ids: List[str], with_vectors: bool = False) -> List[VectorHit]:
+        records = await self._bounded(self.aclient.retrieve(collection_name=name, ids=ids, with_vectors=with_vectors))
+        return [VectorHit(id=str(r.id), payload=r.payload or {}, vector=r.vector if with_vectors else None) for r in records]
+
+    async def search(self, name, vector, limit=5, score_threshold=None, must=None, must_not=None) -> List[VectorHit]:
+        m = self.models
+        query_filter = None
+        if must or must_not:
+            query_filter = m.Filter(
+                must=[m.FieldCondition(key=k, match=m.MatchValue(value=v)) for k, v in (must or {}).items()] or None,
+                must_not=[m.FieldCondition(key=k, match=m.MatchValue(value=v)) for k, v in (must_not or {}).items()] or None,
+            )
+        response = await self._bounded(self.aclient.query_points(
+            collection_name=name,
+            query=vector,
+            query_filter=query_filter,
+            score_threshold=score_threshold,
+            limit=limit,
+        ))
+        return [VectorHit(id=str(h.id), score=h.score, payload=h.payload or {}) for h in response.points]
+
+    async def set_payload(self, name: str, ids: List[str], payload: Dict):
+        await self._bounded(self.aclient.set_payload(collection_name=name, payload=payload, points=ids))
+
+    async def close(self):
+        await self.aclient.close()
+        self.client.close()
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so a steady stream
+    of searches cannot starve upserts. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class LocalCollection:
+    """
+    One embedded collection on disk:
+      vectors.npy  - float32 unit vectors, one row per point (plus unused capacity rows)
+      points.json  - ids and payloads in row order, as of the last compaction
+      points.log   - JSON lines of rows written since then, replayed on load
+      ivf.npz      - optional IVF index (centroids + row assignments)
+      vectors.f16.npy / vectors.i8.npy + scales.npy - quantized copies (quantized modes only)
+    Small corpora are searched brute-force; past `ivf_min_points` an IVF index is
+    built and only the `nprobe` closest lists (plus rows written since the build) are scanned.
+
+    Writes cost O(rows written): the arrays grow geometrically, changed rows are written
+    in place and ids/payloads are appended to points.log. The log is folded into
+    points.json once it outgrows the collection, so compaction is amortized.
+
+    With quantization="float16" or "int8" nothing is held in RAM: every array is a
+    read-only memory map, the scan runs over the quantized copy and the best
+    `limit * rescore_factor` rows are rescored against the float32 file.
+
+    Searches and retrieves share a read lock and run concurrently (NumPy releases the
+    GIL for the matrix products); writes and IVF builds take the write lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        ivf_min_points: int = 50000,
+        nprobe: int = 8,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+    ):
+        if quantization not in QUANTIZED_DTYPES and quantization != "none":
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self.path = path
+        self.size = size
+        self.ivf_min_points = ivf_min_points
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.lock = ReadWriteLock()
+        os.makedirs(path, exist_ok=True)
+
+        self.ids: List[str] = []
+        self.payloads: List[Dict] = []
+        self.row_of: Dict[str, int] = {}
+        self.indexed_fields: Dict[str, np.ndarray] = {}
+        self.vectors = np.zeros((0, size), dtype=np.float32) # len() is the capacity; rows past `count` are unused
+        self.qvectors = None # Quantized rows (memory-mapped)
+        self.scales = None # Per-row int8 dequantization scale
+        self.count = 0
+        self.log_rows = 0 # Rows appended to points.log since the last compaction
+        self._quantized_dropped = False
+
+        # IVF state
+        self.centroids = None
+        self.assignments = None
+        self.ivf_built_count = 0
+        self.dirty_rows = set()
+
+        self._load()
+
+    # -- persistence -----------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        points_file = self._file("points.json")
+        if os.path.exists(points_file):
+            with open(points_file, "r") as f:
+                data = json.load(f)
+        elif os.path.exists(self._file("points.log")):
+            data = {"ids": [], "payloads": []} # Written to before its first compaction
+        else:
+            return
+        self.ids = data["ids"]
+        self.payloads = data["payloads"]
+        moved = self._replay_log()
+        self.row_of = {pid: i for i, pid in enumerate(self.ids)}
+        self.count = len(self.ids)
+        if not self.count:
+            pass # Only the payload schema was saved (ensure_payload_index on an empty collection)
+        elif self.quantization == "none":
+            self.vectors = np.load(self._file("vectors.npy"))
+        else:
+            self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+            self._open_quantized()
+        if os.path.exists(self._file("ivf.npz")):
+            ivf = np.load(self._file("ivf.npz"))
+            if int(ivf["built_count"]) <= self.count:
+                self.centroids = ivf["centroids"]
+                self.assignments = ivf["assignments"]
+                self.ivf_built_count = int(ivf["built_count"])
+                self.dirty_rows = set(ivf["dirty_rows"].tolist()) | {row for row in moved if row < self.ivf_built_count}
+        for field in data.get("indexed_fields", []):
+            self._index_field(field)
+
+    def _replay_log(self) -> set:
+        """Applies points.log on top of points.json; returns the rows whose vectors were rewritten."""
+        moved = set()
+        log_file = self._file("points.log")
+        if not os.path.exists(log_file):
+            return moved
+        with open(log_file, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break # Torn final line from an interrupted write; its vectors are ignored too
+                for row, pid, payload in entry["rows"]:
+                    if row == len(self.ids):
+                        self.ids.append(pid)
+                        self.payloads.append(payload)
+                    else:
+                        self.ids[row] = pid
+                        self.payloads[row] = payload
+                        if entry["op"] == "upsert":
+                            moved.add(row)
+                self.log_rows += len(entry["rows"])
+        return moved
+
+    def _append_log(self, op: str, rows: List[int]):
+        """Records written rows; vectors must already be on disk so a replayed row is complete."""
+        with open(self._file("points.log"), "a") as f:
+            f.write(json.dumps({"op": op, "rows": [[row, self.ids[row], self.payloads[row]] for row in rows]}) + "\n")
+        self.log_rows += len(rows)
+        if self.log_rows > max(self.count, 1024):
+            self._save()
+
+    def _save(self):
+        """Compaction: writes the full id/payload snapshot and starts a new log."""
+        tmp = self._file("points.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"ids": self.ids, "payloads": self.payloads, "indexed_fields": list(self.indexed_fields)}, f)
+        os.replace(tmp, self._file("points.json"))
+        # Rows replayed from the log mark IVF rows dirty; keep that state now the log is gone
+        if self.centroids is not None:
+            self._save_ivf()
+        if os.path.exists(self._file("points.log")):
+            os.remove(self._file("points.log"))
+        self.log_rows = 0
+
+    @staticmethod
+    def _write_rows(path: str, rows: np.ndarray, values: np.ndarray):
+        """Writes rows in place into an existing .npy file."""
+        out = np.lib.format.open_memmap(path, mode="r+")
+        out[rows] = values
+        out.flush()
+        del out
+
+    def _grow(self, needed: int):
+        """Raises capacity geometrically so appends copy each row O(1) times on average."""
+        capacity = max(needed, len(self.vectors) + len(self.vectors) // 2, 64)
+        for field, values in self.indexed_fields.items():
+            grown = np.empty(capacity, dtype=object)
+            grown[:len(values)] = values
+            self.indexed_fields[field] = grown
+        if self.quantization == "none":
+            grown = np.zeros((capacity, self.size), dtype=np.float32)
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+            with open(self._file("vectors.npy.tmp"), "wb") as f:
+                np.save(f, self.vectors)
+            os.replace(self._file("vectors.npy.tmp"), self._file("vectors.npy"))
+        else:
+            dtype = QUANTIZED_DTYPES[self.quantization][1]
+            self.vectors = self._rewrite_array(self._file("vectors.npy"), self.vectors, capacity, (self.size,), np.float32)
+            self.qvectors = self._rewrite_array(self._quantized_file(), self.qvectors, capacity, (self.size,), dtype)
+            if self.quantization == "int8":
+                self.scales = self._rewrite_array(self._file("scales.npy"), self.scales, capacity, (), np.float32)
+
+    def _store_vectors(self, updates: Dict[int, np.ndarray]):
+        """Writes changed float32 rows (and their quantized copies) in memory and on disk."""
+        rows = np.array(sorted(updates), dtype=np.int64)
+        values = np.stack([updates[row] for row in rows.tolist()])
+        self._write_rows(self._file("vectors.npy"), rows, values)
+        if self.quantization == "none":
+            self.vectors[rows] = values
+            if not self._quantized_dropped:
+                # A quantized copy left by another mode would now be stale; it is rebuilt when needed
+                for suffix, _ in QUANTIZED_DTYPES.values():
+                    if os.path.exists(self._file(f"vectors.{suffix}.npy")):
+                        os.remove(self._file(f"vectors.{suffix}.npy"))
+                self._quantized_dropped = True
+            return
+        q, scales = self.quantize(values, self.quantization)
+        self._write_rows(self._quantized_file(), rows, q)
+        if scales is not None:
+            self._write_rows(self._file("scales.npy"), rows, scales)
+
+    # -- quantized storage -------------------------------------------------
+
+    def _quantized_file(self) -> str:
+        return self._file(f"vectors.{QUANTIZED_DTYPES[self.quantization][0]}.npy")
+
+    @staticmethod
+    def quantize(rows: np.ndarray, mode: str):
+        """float32 unit rows -> (quantized rows, per-row scale or None)."""
+        if mode == "float16":
+            return rows.astype(np.float16), None
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(rows / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _open_quantized(self):
+        """Maps the quantized copy, (re)building it from vectors.npy if missing or stale."""
+        qfile = self._quantized_file()
+        if os.path.exists(qfile):
+            qvectors = np.load(qfile, mmap_mode="r")
+            if len(qvectors) == len(self.vectors):
+                self.qvectors = qvectors
+                self.scales = np.load(self._file("scales.npy"), mmap_mode="r") if self.quantization == "int8" else None
+                return
+        self._requantize()
+
+    @staticmethod
+    def _rewrite_array(path: str, old, capacity: int, tail: tuple, dtype):
+        """Streams `old` into a new memory-mapped .npy of `capacity` rows."""
+        tmp = path + ".tmp"
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=(capacity,) + tail)
+        keep = min(len(old), capacity) if old is not None else 0
+        for start in range(0, keep, 65536):
+            out[start:min(start + 65536, keep)] = old[start:min(start + 65536, keep)]
+        out.flush()
+        del out
+        os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
+
+    def _requantize(self):
+        """Rebuilds the quantized copy of every row from the float32 file."""
+        capacity = len(self.vectors)
+        dtype = QUANTIZED_DTYPES[self.quantization][1]
+        self.qvectors = self._rewrite_array(self._quantized_file(), None, capacity, (self.size,), dtype)
+        if self.quantization == "int8":
+            self.scales = self._rewrite_array(self._file("scales.npy"), None, capacity, (), np.float32)
+        for start in range(0, self.count, 8192):
+            rows = np.arange(start, min(start + 8192, self.count))
+            q, scales = self.quantize(np.asarray(self.vectors[rows], dtype=np.float32), self.quantization)
+            self._write_rows(self._quantized_file(), rows, q)
+            if scales is not None:
+                self._write_rows(self._file("scales.npy"), rows, scales)
+
+    def _save_ivf(self):
+        with open(self._file("ivf.npz.tmp"), "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                assignments=self.assignments,
+                built_count=np.array(self.ivf_built_count),
+                dirty_rows=np.array(sorted(self.dirty_rows), dtype=np.int64),
+            )
+        os.replace(self._file("ivf.npz.tmp"), self._file("ivf.npz"))
+
+    # -- payload fields --------------------------------------------------
+
+    def _index_field(self, field: str):
+        values = np.empty(max(len(self.vectors), self.count), dtype=object)
+        for row, payload in enumerate(self.payloads):
+            values[row] = payload.get(field)
+        self.indexed_fields[field] = values
+
+    def _update_fields(self, rows: List[int]):
+        for field, values in self.indexed_fields.items():
+            for row in rows:
+                values[row] = self.payloads[row].get(field)
+
+    def _field_values(self, field: str) -> np.ndarray:
+        if field in self.indexed_fields:
+            return self.indexed_fields[field][:self.count]
+        return np.array([p.get(field) for p in self.payloads], dtype=object)
+
+    def ensure_payload_index(self, field: str):
+        with self.lock.write():
+            if field not in self.indexed_fields:
+                self._index_field(field)
+                self._save()
+
+    # -- writes ----------------------------------------------------------
+
+    def upsert(self, points: List[Dict]):
+        with self.lock.write():
+            updates = {}
+            for p in points:
+                vec = np.asarray(p["vector"], dtype=np.float32)
+                if vec.shape != (self.size,):
+                    raise ValueError(f"Vector dimension {vec.shape[0]} does not match collection size {self.size}")
+                norm = np.linalg.norm(vec)
+                updates[p["id"]] = (vec / norm if norm > 0 else vec, p.get("payload", {}))
+            if not updates:
+                return
+
+            rows = {}
+            for pid, (vec, payload) in updates.items():
+                row = self.row_of.get(pid)
+                if row is None:
+                    row = self.count
+                    self.ids.append(pid)
+                    self.payloads.append(payload)
+                    self.row_of[pid] = row
+                    self.count += 1
+                else:
+                    self.payloads[row] = payload
+                    if row < self.ivf_built_count:
+                        self.dirty_rows.add(row)
+                rows[row] = vec
+
+            if self.count > len(self.vectors):
+                self._grow(self.count)
+            self._store_vectors(rows)
+            self._update_fields(list(rows))
+            self._append_log("upsert", sorted(rows))
+
+    def set_payload(self, ids: List[str], payload: Dict):
+        with self.lock.write():
+            rows = []
+            for pid in ids:
+                row = self.row_of.get(pid)
+                if row is None:
+                    raise KeyError(pid)
+                self.payloads[row] = {**self.payloads[row], **payload}
+                rows.append(row)
+            self._update_fields(rows)
+            self._append_log("payload", rows)
+
+    # -- reads -----------------------------------------------------------
+
+    def retrieve(self, ids: List[str], with_vectors: bool = False) -> List[VectorHit]:
+        hits = []
+        with self.lock.read():
+            for pid in ids:
+                row = self.row_of.get(pid)
+                if row is None:
+                    continue
+                hits.append(VectorHit(
+                    id=pid,
+                    payload=dict(self.payloads[row]),
+                    vector=np.asarray(self.vectors[row], dtype=np.float32).tolist() if with_vectors else None,
+                ))
+        return hits
+
+    def _filter_mask(self, rows: np.ndarray, must: Optional[Dict], must_not: Optional[Dict]) -> np.ndarray:
+        mask = np.ones(len(rows), dtype=bool)
+        for field, value in (must or {}).items():
+            mask &= self._field_values(field)[rows] == value
+        for field, value in (must_not or {}).items():
+            mask &= self._field_values(field)[rows] != value
+        return mask
+
+    def _ivf_stale(self) -> bool:
+        if self.count < self.ivf_min_points:
+            return False
+        stale = (self.count - self.ivf_built_count) + len(self.dirty_rows)
+        return self.centroids is None or stale > 0.1 * max(self.ivf_built_count, 1)
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        """Rows to score: everything, or the probed IVF lists plus rows written since the build."""
+        if self.count < self.ivf_min_points or self.centroids is None:
+            return np.arange(self.count)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probed = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.flatnonzero(np.isin(self.assignments, probed))
+        extra = np.arange(self.ivf_built_count, self.count)
+        if self.dirty_rows:
+            extra = np.concatenate([extra, np.fromiter(self.dirty_rows, dtype=np.int64)])
+        return np.unique(np.concatenate([rows, extra]))
+
+    def search(self, vector, limit=5, score_threshold=None, must=None, must_not=None) -> List[VectorHit]:
+        if self._ivf_stale():
+            with self.lock.write():
+                if self._ivf_stale(): # Another search may have rebuilt it while we waited
+                    self._build_ivf()
+        with self.lock.read():
+            if self.count == 0:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+
+            rows = self._candidate_rows(query)
+            if must or must_not:
+                rows = rows[self._filter_mask(rows, must, must_not)]
+            if len(rows) == 0:
+                return []
+
+            if self.quantization == "none":
+                # Full scans multiply the matrix in place rather than gathering a copy of it
+                scores = self.vectors[:self.count] @ query if len(rows) == self.count else self.vectors[rows] @ query
+            else:
+                rows, scores = self._rescore(rows, query, limit)
+            if score_threshold is not None:
+                keep = scores >= score_threshold
+                rows, scores = rows[keep], scores[keep]
+            if len(rows) == 0:
+                return []
+
+            k = min(limit, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [VectorHit(id=self.ids[rows[i]], score=float(scores[i]), payload=self.payloads[rows[i]]) for i in top]
+
+    def _rescore(self, rows: np.ndarray, query: np.ndarray, limit: int):
+        """Approximate scan over the quantized rows, then exact float32 scores for the best few."""
+        approx = np.empty(len(rows), dtype=np.float32)
+        contiguous = len(rows) == self.count # Brute-force scan: slice the map instead of gathering rows
+        for start in range(0, len(rows), 2048):
+            chunk = slice(start, min(start + 2048, len(rows))) if contiguous else rows[start:start + 2048]
+            partial = self.qvectors[chunk].astype(np.float32) @ query
+            if self.scales is not None:
+                partial *= self.scales[chunk]
+            approx[start:start + len(partial)] = partial
+        k = min(len(rows), max(limit * self.rescore_factor, 32))
+        best = rows[np.argpartition(-approx, k - 1)[:k]] if k < len(rows) else rows
+        best = np.sort(best)
+        return best, self._read_float32_rows(best) @ query
+
+    def _read_float32_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Reads full-precision rows with positional reads instead of touching the map, so
+        rescoring does not fault whole page-cache folios into the resident set.
+        """
+        row_bytes = self.size * 4
+        out = np.empty((len(rows), self.size), dtype=np.float32)
+        with open(self._file("vectors.npy"), "rb") as f:
+            for i, row in enumerate(rows):
+                out[i] = np.frombuffer(os.pread(f.fileno(), row_bytes, self.vectors.offset + int(row) * row_bytes), dtype=np.float32)
+        return out
+
+    # -- IVF -------------------------------------------------------------
+
+    def build_ivf(self, iterations: int = 10, seed: int = 0):
+        """Spherical k-means over a sample, then assigns every row to its closest centroid."""
+        with self.lock.write():
+            self._build_ivf(iterations, seed)
+
+    def _build_ivf(self, iterations: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        data = self.vectors[:self.count] # Memory-mapped in quantized modes; read in chunks below
+        nlist = max(1, int(np.sqrt(self.count)))
+        sample = np.asarray(data[np.sort(rng.choice(self.count, size=min(self.count, nlist * 40), replace=False))], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assignments = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, 8192):
+            chunk = np.asarray(data[start:start + 8192], dtype=np.float32)
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        self.centroids = centroids
+        self.assignments = assignments
+        self.ivf_built_count = self.count
+        self.dirty_rows = set()
+        self._save() # Also compacts the log, whose older rows would otherwise be marked dirty on reload
+
+
+class LocalBackend(VectorBackend):
+    """
+    Embedded vector store for single-node deployments and CI (VECTOR_DB_URL=local://<path>).
+    Options ride on the URL query string, e.g.
+    local://data/vectors?ivf_min_points=20000&nprobe=16&quantization=int8&rescore_factor=4
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ivf_min_points: int = 50000,
+        nprobe: int = 8,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        timeout: float = 10.0,
+        max_concurrency: int = 16,
+    ):
+        super().__init__(timeout=timeout, max_concurrency=max_concurrency)
+        self.path = path
+        self.ivf_min_points = ivf_min_points
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.collections: Dict[str, LocalCollection] = {}
+
+    def _collection(self, name: str) -> LocalCollection:
+        if name not in self.collections:
+            raise KeyError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def ensure_collection(self, name: str, size: int):
+        if name not in self.collections:
+            self.collections[name] = LocalCollection(
+                os.path.join(self.path, name), size,
+                ivf_min_points=self.ivf_min_points, nprobe=self.nprobe,
+                quantization=self.quantization, rescore_factor=self.rescore_factor,
+            )
+
+    def ensure_payload_index(self, name: str, field: str):
+        self._collection(name).ensure_payload_index(field)
+
+    async def _offload(self, fn, *args, **kwargs):
+        """
+        Runs a collection call on a worker thread under one concurrency slot. A thread
+        cannot be cancelled, so a call that times out keeps its slot until the thread
+        actually finishes; the number of running calls never exceeds max_concurrency.
+        """
+        await self._slots.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._slots.release()
+            raise
+
+        def finished(f):
+            self._slots.release()
+            if not f.cancelled():
+                f.exception() # Mark a late failure as retrieved; the caller has already timed out
+
+        future.add_done_callback(finished)
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    async def upsert(self, name: str, points: List[Dict]):
+        await self._offload(self._collection(name).upsert, points)
+
+    async def retrieve(self, name: str, ids: List[str], with_vectors: bool = False) -> List[VectorHit]:
+        return await self._offload(self._collection(name).retrieve, ids, with_vectors=with_vectors)
+
+    async def search(self, name, vector, limit=5, score_threshold=None, must=None, must_not=None) -> List[VectorHit]:
+        return await self._offload(
+            self._collection(name).search, vector,
+            limit=limit, score_threshold=score_threshold, must=must, must_not=must_not,
+        )
+
+    async def set_payload(self, name: str, ids: List[str], payload: Dict):
+        await self._offload(self._collection(name).set_payload, ids, payload)
+
+    def collection_dir(self, name: str) -> Optional[str]:
+        return os.path.join(self.path, name)
+
+
+def create_backend(url: str, timeout: Optional[float] = None, max_concurrency: Optional[int] = None) -> VectorBackend:
+    """
+    Picks the backend from VECTOR_DB_URL:
+      local://<path>[?ivf_min_points=N&nprobe=N&quantization=none|float16|int8&rescore_factor=N]
+                                                 -> embedded NumPy/IVF store
+      anything else                              -> Qdrant service
+    Per-call timeout and concurrency default to VECTOR_TIMEOUT (10s) / VECTOR_MAX_CONCURRENCY (16).
+    """
+    limits = {
+        "timeout": timeout if timeout is not None else float(os.getenv("VECTOR_TIMEOUT", "10")),
+        "max_concurrency": max_concurrency if max_concurrency is not None else int(os.getenv("VECTOR_MAX_CONCURRENCY", "16")),
+    }
+    if url.startswith("local://"):
+        parsed = urlparse(url)
+        path = (parsed.netloc + parsed.path) or "data/vectors"
+        options = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        return LocalBackend(
+            path,
+            ivf_min_points=int(options.get("ivf_min_points", 50000)),
+            nprobe=int(options.get("nprobe", 8)),
+            quantization=options.get("quantization", "none"),
+            rescore_factor=int(options.get("rescore_factor", 4)),
+            **limits,
+        )
+    return QdrantBackend(url, **limits)